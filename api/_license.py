@@ -0,0 +1,527 @@
+"""ClipPremium license API: POST /api/license/check and /api/license/activate.
+
+ClipPremium desktop clients call /license/check on every start and
+/license/activate once per purchase (same paths and response shapes as the
+PHP api/license/*.php). Nothing on the hot path waits on a counting query:
+  - codes from _tools/generate_license_codes.py carry an HMAC checksum
+    (LICENSE_CODE_SECRET), checked before anything else
+  - issued codes are read once per instance from the license_codes
+    collection (refreshed every LICENSE_CODE_INDEX_TTL) into a bloom filter
+    plus a sorted array of 62-bit code hashes with the license type in the
+    low bits; an unknown code is rejected without touching Mongo
+  - per-HWID and per-IP limits are in-memory sliding windows (per instance,
+    like the "memory" rate limit backend)
+  - request logs go to license_requests through a write-behind buffer
+  - check responses are cached per HWID for LICENSE_CHECK_CACHE_TTL
+Licenses and issued codes live in Mongo (licenses / license_codes keyed by
+HWID / code); claiming an unused code is one atomic update. Codes never go
+into the repo or the function bundle: anyone holding an unused code could
+activate it. _tools/import_licenses_to_mongo.py loads each generator batch
+(and the MySQL tables) into license_codes.
+
+Existing installs keep their paid licenses in the PHP host's MySQL
+`licenses` table. /license/check creates a trial for any HWID it has not
+seen, so the routes stay off (404) until LICENSE_API_ENABLED=true, and that
+must only be set after _tools/import_licenses_to_mongo.py has copied the
+MySQL licenses and license_codes tables.
+
+api/index.py calls configure() with its database handle and helpers, then
+includes `router` under /api. The leading underscore keeps Vercel from
+deploying this file as a function of its own.
+"""
+import asyncio
+import bisect
+import hashlib
+import hmac
+import json
+import logging
+import os
+import re
+import time
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pymongo import ReturnDocument
+
+try:
+    from ._write_behind import WriteBehindBuffer
+except ImportError:
+    from _write_behind import WriteBehindBuffer
+
+logger = logging.getLogger(__name__)
+
+LICENSE_API_ENABLED = os.environ.get("LICENSE_API_ENABLED", "false").lower() == "true"
+LICENSE_CODE_SECRET = os.environ.get("LICENSE_CODE_SECRET", "")
+# new batches imported into license_codes are picked up within this long
+LICENSE_CODE_INDEX_TTL = float(os.environ.get("LICENSE_CODE_INDEX_TTL", "900"))
+# bloom false positives (well under 1%) are settled by the sorted hash array
+LICENSE_BLOOM_BITS_PER_CODE = 16
+LICENSE_MAX_REQUESTS_PER_HOUR = int(os.environ.get("LICENSE_MAX_REQUESTS_PER_HOUR", "100"))  # per HWID
+LICENSE_MAX_REQUESTS_PER_IP = int(os.environ.get("LICENSE_MAX_REQUESTS_PER_IP", "500"))
+LICENSE_LIMITER_MAX_KEYS = 200_000
+LICENSE_TRIAL_VIDEO_LIMIT = int(os.environ.get("LICENSE_TRIAL_VIDEO_LIMIT", "5"))
+LICENSE_PRICES = {"personal": 3000000, "agency": 15000000}
+LICENSE_CHECK_CACHE_TTL = float(os.environ.get("LICENSE_CHECK_CACHE_TTL", "30"))
+LICENSE_CHECK_CACHE_MAX = 100_000
+LICENSE_LOG_FLUSH_INTERVAL = float(os.environ.get("LICENSE_LOG_FLUSH_INTERVAL", "5"))
+LICENSE_LOG_MAX_BUFFER = int(os.environ.get("LICENSE_LOG_MAX_BUFFER", "5000"))
+LICENSE_LOG_RETENTION_DAYS = int(os.environ.get("LICENSE_LOG_RETENTION_DAYS", "30"))
+# config.php runs in Asia/Jakarta; server_time keeps that clock
+LICENSE_SERVER_TZ = timezone(timedelta(hours=7))
+
+CROCKFORD_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+LICENSE_CODE_PATTERN = re.compile(r"^CLIPPREM-(PERS|AGNC|TEST)-\d{4}-[0-9A-HJKMNP-TV-Z]{5}-[0-9A-HJKMNP-TV-Z]{5}-[0-9A-HJKMNP-TV-Z]{5}$")
+LEGACY_LICENSE_CODE_PATTERN = re.compile(r"^CLIPPREM-(PERS|AGNC|TEST)-\d{4}-\d{4}$")
+HWID_PATTERN = re.compile(r"^[a-fA-F0-9]{32}$")
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+LICENSE_TYPE_IDS = {"personal": 1, "agency": 2}
+LICENSE_TYPE_NAMES = {v: k for k, v in LICENSE_TYPE_IDS.items()}
+
+# Set by configure(): index.py owns the Mongo client and the JSON response class
+db: Any = None
+client_ip: Optional[Callable[[Request], str]] = None
+json_response: Any = None
+is_serverless = False
+
+
+def configure(database: Any, ip_of: Callable[[Request], str], response_class: Any, serverless: bool) -> None:
+    global db, client_ip, json_response, is_serverless
+    db, client_ip, json_response, is_serverless = database, ip_of, response_class, serverless
+
+
+def license_code_checksum(body: str) -> str:
+    """First 50 bits of HMAC-SHA256(LICENSE_CODE_SECRET, body) in Crockford base32."""
+    digest = hmac.new(LICENSE_CODE_SECRET.encode(), body.encode(), hashlib.sha256).digest()
+    value = int.from_bytes(digest[:7], "big") >> 6
+    return "".join(CROCKFORD_ALPHABET[(value >> (5 * i)) & 31] for i in range(9, -1, -1))
+
+
+def valid_license_code(code: str) -> bool:
+    if LICENSE_CODE_PATTERN.match(code):
+        # without the secret any checksum would do, so none is accepted
+        if not LICENSE_CODE_SECRET:
+            return False
+        return hmac.compare_digest(license_code_checksum(code[:-12]), code[-11:].replace("-", ""))
+    # sequential codes issued before the checksum; only the index knows them
+    return bool(LEGACY_LICENSE_CODE_PATTERN.match(code))
+
+
+class _LicenseCodeIndex:
+    """Bloom filter in front of a sorted array of issued-code hashes.
+
+    The bloom filter is register-blocked: each code sets five bits inside
+    one 64-bit word, so adding or testing a code is a single OR or AND on an
+    array("Q") instead of k scattered bit probes.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self.loaded_at = 0.0
+        self.size = 0
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+        self._words = None
+        self._keys = None
+
+    @staticmethod
+    def _hashes(code: str) -> tuple:
+        v = int.from_bytes(hashlib.blake2b(code.encode(), digest_size=16).digest(), "little")
+        return v & 0xFFFFFFFFFFFFFFFF, v >> 64
+
+    @staticmethod
+    def _mask(h2: int) -> int:
+        # five bit positions, 6 bits of h2 each
+        return (1 << (h2 & 63)) | (1 << (h2 >> 6 & 63)) | (1 << (h2 >> 12 & 63)) | \
+            (1 << (h2 >> 18 & 63)) | (1 << (h2 >> 24 & 63))
+
+    def load(self, rows: Iterable[tuple]) -> int:
+        """Replace the index with (code, license_type) rows; blocking, run it in a thread."""
+        blake2b = hashlib.blake2b
+        keys = array("Q")
+        masks = array("Q")
+        # hashing and masking inlined: this loop runs once per issued code
+        for code, license_type in rows:
+            v = int.from_bytes(blake2b(code.strip().upper().encode(), digest_size=16).digest(), "little")
+            h2 = v >> 64
+            keys.append((v & 0xFFFFFFFFFFFFFFFC) | LICENSE_TYPE_IDS.get(license_type, 1))
+            masks.append((1 << (h2 & 63)) | (1 << (h2 >> 6 & 63)) | (1 << (h2 >> 12 & 63)) |
+                         (1 << (h2 >> 18 & 63)) | (1 << (h2 >> 24 & 63)))
+        n_words = max(1, len(keys) * LICENSE_BLOOM_BITS_PER_CODE // 64)
+        words = array("Q", bytes(8 * n_words))
+        for key, mask in zip(keys, masks):
+            words[(key >> 2) % n_words] |= mask
+        self._words = words
+        self._keys = array("Q", sorted(keys))
+        self.size = len(keys)
+        self.loaded = True
+        self.loaded_at = time.monotonic()
+        return self.size
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock, self._lock_loop = asyncio.Lock(), loop
+        return self._lock
+
+    async def reload(self) -> int:
+        """Read every issued code from license_codes and rebuild the index."""
+        started = time.perf_counter()
+        cursor = db.license_codes.find({}, {"license_type": 1}, batch_size=10_000)
+        rows = [(doc["_id"], doc.get("license_type")) async for doc in cursor]
+        count = await asyncio.to_thread(self.load, rows)
+        logger.info(f"License code index: {count} codes in {time.perf_counter() - started:.2f}s")
+        return count
+
+    async def ensure_loaded(self) -> None:
+        """Load on first use and again once older than LICENSE_CODE_INDEX_TTL.
+
+        A stale index keeps answering while one request rebuilds it.
+        """
+        if self.loaded and time.monotonic() - self.loaded_at < LICENSE_CODE_INDEX_TTL:
+            return
+        lock = self._get_lock()
+        if self.loaded and lock.locked():
+            return
+        async with lock:
+            if self.loaded and time.monotonic() - self.loaded_at < LICENSE_CODE_INDEX_TTL:
+                return
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.error(f"License code index not loaded: {str(e)}")
+
+    def lookup(self, code: str) -> Optional[str]:
+        """License type for an issued code, None if it was never issued."""
+        if not self.loaded:
+            return None
+        h1, h2 = self._hashes(code)
+        mask = self._mask(h2)
+        if self._words[(h1 >> 2) % len(self._words)] & mask != mask:
+            return None
+        key = h1 & ~3
+        i = bisect.bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] & ~3 == key:
+            return LICENSE_TYPE_NAMES.get(self._keys[i] & 3)
+        return None
+
+
+class _SlidingWindowLimiter:
+    """Sliding-window counter: this window's hits plus the previous window's, weighted by overlap.
+
+    At most max_keys keys are tracked; past that, keys from finished windows
+    go first, then the least recently seen.
+    """
+
+    def __init__(self, limit: int, window: float, max_keys: int = LICENSE_LIMITER_MAX_KEYS):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        # key -> [window number, previous count, current count], least recently seen first
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+
+    def _entry(self, key: str, now: float) -> list:
+        current = int(now // self.window)
+        entry = self._entries.get(key)
+        if entry is None:
+            if len(self._entries) >= self.max_keys:
+                self._evict(current)
+            entry = self._entries[key] = [current, 0, 0]
+        else:
+            self._entries.move_to_end(key)
+            if entry[0] != current:
+                entry[1] = entry[2] if entry[0] == current - 1 else 0
+                entry[0], entry[2] = current, 0
+        return entry
+
+    def check(self, key: str) -> float:
+        """Seconds to wait if key is over the limit, else 0; records nothing."""
+        now = time.time()
+        entry = self._entry(key, now)
+        elapsed = now - entry[0] * self.window
+        weight = 1 - elapsed / self.window
+        if entry[1] * weight + entry[2] < self.limit:
+            return 0.0
+        if entry[2] >= self.limit or not entry[1]:
+            return self.window - elapsed
+        # wait until the previous window's share has decayed enough
+        needed = self.window * (1 - (self.limit - entry[2]) / entry[1])
+        return max(needed - elapsed, 1.0)
+
+    def record(self, key: str) -> None:
+        self._entry(key, time.time())[2] += 1
+
+    def hit(self, key: str) -> float:
+        """check() and, when allowed, record() in one call."""
+        wait = self.check(key)
+        if not wait:
+            self.record(key)
+        return wait
+
+    def _evict(self, current: int) -> None:
+        for key in [k for k, e in self._entries.items() if e[0] < current - 1]:
+            del self._entries[key]
+        while len(self._entries) >= self.max_keys:
+            self._entries.popitem(last=False)
+
+
+class _LicenseLogBuffer(WriteBehindBuffer):
+    def __init__(self):
+        super().__init__(LICENSE_LOG_FLUSH_INTERVAL, LICENSE_LOG_MAX_BUFFER)
+        self.entries: list = []
+        self.dropped = 0
+
+    def size(self) -> int:
+        return len(self.entries)
+
+    def add(self, request: Request, endpoint: str, hwid: Optional[str], data: Any, status_code: int,
+            started: float) -> None:
+        if len(self.entries) >= LICENSE_LOG_MAX_BUFFER:
+            self.dropped += 1
+            return
+        self.entries.append({
+            "hwid": hwid or None,
+            "endpoint": endpoint,
+            "ip_address": client_ip(request),
+            "user_agent": request.headers.get("user-agent", "Unknown"),
+            "request_method": request.method,
+            "request_data": data if isinstance(data, dict) else {},
+            "response_code": status_code,
+            "response_time_ms": round((time.perf_counter() - started) * 1000),
+            "created_at": datetime.now(timezone.utc),
+        })
+
+    async def flush(self) -> int:
+        entries, self.entries = self.entries, []
+        self.last_flush = time.monotonic()
+        if entries:
+            try:
+                await db.license_requests.insert_many(entries, ordered=False)
+            except Exception as e:
+                logger.warning(f"License log flush failed, {len(entries)} entries lost: {str(e)}")
+        return len(entries)
+
+
+license_codes_index = _LicenseCodeIndex()
+license_hwid_limiter = _SlidingWindowLimiter(LICENSE_MAX_REQUESTS_PER_HOUR, 3600)
+license_ip_limiter = _SlidingWindowLimiter(LICENSE_MAX_REQUESTS_PER_IP, 3600)
+license_logs = _LicenseLogBuffer()
+# hwid -> (monotonic expiry, license doc)
+license_check_cache: Dict[str, tuple] = {}
+
+
+def _license_limit_exceeded(hwid: Optional[str], ip: str) -> Optional[str]:
+    # both limits are checked before either is charged, so a request refused
+    # for its IP doesn't use up the HWID's allowance (or the other way round)
+    if hwid and license_hwid_limiter.check(hwid):
+        return f"Rate limit exceeded (max: {LICENSE_MAX_REQUESTS_PER_HOUR} requests per hour)"
+    if license_ip_limiter.check(ip):
+        return f"Rate limit exceeded for IP (max: {LICENSE_MAX_REQUESTS_PER_IP} requests per hour)"
+    if hwid:
+        license_hwid_limiter.record(hwid)
+    license_ip_limiter.record(ip)
+    return None
+
+
+def _license_expired(expires_at: Optional[str]) -> bool:
+    if not expires_at:
+        return False  # lifetime license
+    expires = datetime.fromisoformat(expires_at)
+    if expires.tzinfo is None:
+        # rows migrated from MySQL carry Asia/Jakarta wall-clock times
+        expires = expires.replace(tzinfo=LICENSE_SERVER_TZ)
+    return expires < datetime.now(timezone.utc)
+
+
+def _format_license(license: dict) -> dict:
+    is_paid = license.get("license_type") in ("personal", "agency")
+    expires_at = license.get("expires_at")
+    return {
+        "status": license.get("license_type"),
+        "videos_used": int(license.get("videos_used") or 0),
+        "videos_remaining": -1 if is_paid else int(license.get("videos_remaining") or 0),
+        "license_type": license.get("license_type"),
+        "expires_at": expires_at,
+        "is_expired": _license_expired(expires_at),
+        "created_at": license.get("created_at"),
+    }
+
+
+async def get_or_create_license(hwid: str) -> dict:
+    """License for hwid, created as a trial on first contact (one round trip either way)."""
+    now = datetime.now(timezone.utc).isoformat()
+    return await db.licenses.find_one_and_update(
+        {"_id": hwid},
+        {"$setOnInsert": {
+            "license_type": "trial", "videos_used": 0, "videos_remaining": LICENSE_TRIAL_VIDEO_LIMIT,
+            "expires_at": None, "created_at": now, "updated_at": now,
+        }},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _license_json(request: Request) -> Optional[dict]:
+    try:
+        data = json.loads(await request.body() or b"null")
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) and data else None
+
+
+def _license_response(request: Request, endpoint: str, hwid: Optional[str], data: Any, content: dict,
+                      status_code: int, started: float):
+    license_logs.add(request, endpoint, hwid, data, status_code, started)
+    return json_response(content, status_code=status_code)
+
+
+async def _flush_license_logs_if_due() -> None:
+    if is_serverless and license_logs.due():
+        await license_logs.flush()
+
+
+async def require_license_api() -> None:
+    if not LICENSE_API_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+router = APIRouter(dependencies=[Depends(require_license_api)])
+
+
+@router.post("/license/check")
+async def license_check(request: Request):
+    started = time.perf_counter()
+    data = await _license_json(request)
+    if data is None:
+        return _license_response(request, "/license/check", None, {}, {"ok": False, "error": "Invalid JSON request"}, 400, started)
+    hwid = str(data.get("hwid") or "")
+    if not HWID_PATTERN.match(hwid):
+        return _license_response(request, "/license/check", hwid, data,
+                                 {"ok": False, "error": "Invalid or missing HWID (must be 32 hex characters)"}, 400, started)
+    limited = _license_limit_exceeded(hwid, client_ip(request))
+    if limited:
+        return _license_response(request, "/license/check", hwid, data, {"ok": False, "error": limited}, 429, started)
+
+    cached = license_check_cache.get(hwid)
+    if cached is not None and cached[0] > time.monotonic():
+        license = cached[1]
+    else:
+        try:
+            license = await get_or_create_license(hwid)
+        except Exception as e:
+            logger.error(f"License check failed: {str(e)}")
+            return _license_response(request, "/license/check", hwid, data,
+                                     {"ok": False, "error": "Database error. Please try again later."}, 500, started)
+        if len(license_check_cache) >= LICENSE_CHECK_CACHE_MAX:
+            license_check_cache.clear()
+        license_check_cache[hwid] = (time.monotonic() + LICENSE_CHECK_CACHE_TTL, license)
+
+    if license.get("license_type") == "blocked":
+        response = _license_response(request, "/license/check", hwid, data,
+                                     {"ok": False, "error": "License blocked. Contact support@calius.digital"}, 403, started)
+    else:
+        response = _license_response(request, "/license/check", hwid, data, {
+            "ok": True,
+            "license": _format_license(license),
+            "server_time": datetime.now(LICENSE_SERVER_TZ).strftime("%Y-%m-%d %H:%M:%S"),
+            "version_checked": data.get("version") or "",
+        }, 200, started)
+    await _flush_license_logs_if_due()
+    return response
+
+
+@router.post("/license/activate")
+async def license_activate(request: Request):
+    started = time.perf_counter()
+    data = await _license_json(request)
+
+    def fail(code: Optional[str], message: str, status_code: int, hwid: Optional[str] = None):
+        content = {"ok": False, "status": "error"}
+        content.update({"code": code, "message": message} if code else {"error": message})
+        return _license_response(request, "/license/activate", hwid, data, content, status_code, started)
+
+    if data is None:
+        return fail(None, "Invalid JSON request", 400)
+    email = str(data.get("email") or "").strip()
+    license_code = str(data.get("license_code") or "").strip().upper()
+    hwid = str(data.get("hwid") or "").strip()
+
+    if not EMAIL_PATTERN.match(email):
+        return fail("INVALID_EMAIL", "Email tidak valid", 400, hwid)
+    if not valid_license_code(license_code):
+        return fail("INVALID_FORMAT", "Kode lisensi tidak valid. Periksa kembali kode Anda (CLIPPREM-XXXX-2026-XXXXX-XXXXX-XXXXX).", 400, hwid)
+    if not HWID_PATTERN.match(hwid):
+        return fail("INVALID_HWID", "Hardware ID tidak valid", 400, hwid)
+    limited = _license_limit_exceeded(hwid, client_ip(request))
+    if limited:
+        return fail("RATE_LIMIT", limited, 429, hwid)
+
+    await license_codes_index.ensure_loaded()
+    if not license_codes_index.loaded:
+        return fail("SERVER_ERROR", "Terjadi kesalahan server. Silakan coba lagi.", 503, hwid)
+    license_type = license_codes_index.lookup(license_code)
+    # checksummed codes can't be guessed, so one the index doesn't know yet
+    # (a batch imported since it was built) is looked up in Mongo below
+    if license_type is None and not LICENSE_CODE_PATTERN.match(license_code):
+        return fail("INVALID_CODE", "Kode lisensi tidak ditemukan. Periksa kembali kode Anda.", 400, hwid)
+
+    try:
+        existing = await db.licenses.find_one({"_id": hwid}, {"license_type": 1})
+        if existing and existing.get("license_type") in ("personal", "agency"):
+            return fail("ALREADY_ACTIVATED", f"Perangkat ini sudah memiliki lisensi aktif ({existing['license_type']})", 400, hwid)
+
+        now = datetime.now(timezone.utc).isoformat()
+        activated_at = now
+        code = await db.license_codes.find_one_and_update(
+            {"_id": license_code, "status": "unused"},
+            {"$set": {
+                "status": "active", "activated_by_hwid": hwid, "activated_by_email": email, "activated_at": now,
+            }},
+        )
+        if code is None:
+            # already claimed (or gone since the index was built)
+            code = await db.license_codes.find_one({"_id": license_code})
+            if code is None:
+                return fail("INVALID_CODE", "Kode lisensi tidak ditemukan. Periksa kembali kode Anda.", 400, hwid)
+            if code.get("status") == "revoked":
+                return fail("CODE_REVOKED", "Kode lisensi telah dibatalkan. Hubungi support@calius.digital", 400, hwid)
+            if code.get("activated_by_hwid") != hwid:
+                return fail("CODE_USED", "Kode lisensi sudah digunakan. Hubungi support jika ini adalah kesalahan.", 400, hwid)
+            # this device claimed the code but the license write below
+            # failed last time: finish it instead of burning the code
+            activated_at = code.get("activated_at") or now
+        license_type = code.get("license_type") or license_type or "personal"
+
+        await db.licenses.update_one(
+            {"_id": hwid},
+            {
+                "$set": {
+                    "license_type": license_type, "email": email, "license_code": license_code,
+                    "activated_at": activated_at, "videos_remaining": -1, "payment_status": "paid",
+                    "payment_amount": LICENSE_PRICES[license_type], "updated_at": now,
+                },
+                "$setOnInsert": {"videos_used": 0, "expires_at": None, "created_at": now},
+            },
+            upsert=True,
+        )
+    except Exception as e:
+        logger.error(f"License activation failed: {str(e)}")
+        return fail("SERVER_ERROR", "Terjadi kesalahan server. Silakan coba lagi.", 500, hwid)
+
+    license_check_cache.pop(hwid, None)
+    response = _license_response(request, "/license/activate", hwid, data, {
+        "ok": True,
+        "status": "success",
+        "message": "Lisensi berhasil diaktivasi! 🎉",
+        "license": {
+            "type": license_type,
+            "videos_remaining": -1,
+            "expires_at": None,
+            "email": email,
+            "activated_at": datetime.now(LICENSE_SERVER_TZ).strftime("%Y-%m-%d %H:%M:%S"),
+        },
+    }, 200, started)
+    await _flush_license_logs_if_due()
+    return response
@@ -0,0 +1,56 @@
+"""Base class for the API's in-memory write-behind buffers.
+
+Shared by api/index.py (counters, analytics) and api/_license.py (license
+request logs). The leading underscore keeps Vercel from deploying this file
+as a function of its own.
+"""
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer(ABC):
+    """Base for in-memory buffers flushed periodically (or inline on serverless)."""
+
+    def __init__(self, interval: float, max_pending: int):
+        self.interval = interval
+        self.max_pending = max_pending
+        self.last_flush = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+
+    @abstractmethod
+    def size(self) -> int:
+        """Buffered items, compared against max_pending."""
+
+    @abstractmethod
+    async def flush(self) -> int:
+        """Write the buffer out; returns how many items were written."""
+
+    def due(self) -> bool:
+        return self.size() >= self.max_pending or time.monotonic() - self.last_flush >= self.interval
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"{type(self).__name__} flush failed: {str(e)}")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
@@ -3,60 +3,237 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Awaitable, Callable
 import uuid
 from datetime import datetime, timezone, timedelta
 import hashlib
 import hmac
+import json
+import re
 import time
 import asyncio
-import cloudinary
-import cloudinary.utils
-import cloudinary.uploader
-from passlib.context import CryptContext
-from jose import JWTError, jwt
-import resend
+import threading
+from contextvars import ContextVar
+from collections import OrderedDict
+from collections.abc import Mapping
+from types import MappingProxyType
+from contextlib import asynccontextmanager
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+
+try:
+    from ._write_behind import WriteBehindBuffer
+except ImportError:
+    from _write_behind import WriteBehindBuffer
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection. The client is built on first use so cold starts that
+# never reach Mongo don't pay for topology discovery.
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+DB_NAME = os.environ['DB_NAME']
+
+# Pool sizing. A serverless instance serves one request at a time, so it
+# wants a small pool that it keeps between warm invocations; a uvicorn
+# deployment serves many concurrent requests and closes the pool on shutdown.
+IS_SERVERLESS = bool(os.environ.get("VERCEL") or os.environ.get("AWS_LAMBDA_FUNCTION_NAME"))
+MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", "10" if IS_SERVERLESS else "100"))
+MONGO_MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", "0" if IS_SERVERLESS else "2"))
+MONGO_MAX_IDLE_TIME_MS = int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", "60000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_REUSE_CLIENT = os.environ.get("MONGO_REUSE_CLIENT", str(IS_SERVERLESS)).lower() == "true"
+
+
+class _PoolMetrics(monitoring.ConnectionPoolListener):
+    """Counts pool checkouts and how long callers waited for a connection.
+
+    Checkout start/finish events fire on the same executor thread, so the
+    start timestamp is kept in a thread-local.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.checkins = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.pool_clears = 0
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def _wait_ms(self) -> float:
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        return (time.perf_counter() - started) * 1000 if started else 0.0
+
+    def connection_checked_out(self, event):
+        wait_ms = self._wait_ms()
+        with self._lock:
+            self.checkouts += 1
+            self.wait_ms_total += wait_ms
+            self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+
+    def connection_check_out_failed(self, event):
+        self._wait_ms()
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checkins += 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_created += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_closed += 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "in_use": self.checkouts - self.checkins,
+                "wait_ms_total": round(self.wait_ms_total, 3),
+                "wait_ms_avg": round(self.wait_ms_total / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_ms_max": round(self.wait_ms_max, 3),
+                "connections_created": self.connections_created,
+                "connections_open": self.connections_created - self.connections_closed,
+                "pool_clears": self.pool_clears,
+            }
+
+
+pool_metrics = _PoolMetrics()
+_mongo_client: Optional[AsyncIOMotorClient] = None
+_mongo_client_loop = None
+
+def get_mongo_client() -> AsyncIOMotorClient:
+    global _mongo_client, _mongo_client_loop
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if _mongo_client is not None and loop is not None and _mongo_client_loop not in (None, loop):
+        # Motor binds to the loop it first ran on; runtimes that start a new
+        # loop per invocation get a fresh client instead of a broken one.
+        _mongo_client.close()
+        _mongo_client = None
+    if _mongo_client is None:
+        _mongo_client = AsyncIOMotorClient(
+            mongo_url,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+            serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            appname="calius-api",
+            event_listeners=[pool_metrics, command_metrics, slow_query_profiler],
+        )
+        _mongo_client_loop = None
+    if _mongo_client_loop is None:
+        _mongo_client_loop = loop
+    return _mongo_client
+
+class _LazyDatabase:
+    """Proxy for client[DB_NAME] that creates the client on first access."""
+
+    def __getattr__(self, name: str):
+        return getattr(get_mongo_client()[DB_NAME], name)
+
+    def __getitem__(self, name: str):
+        return get_mongo_client()[DB_NAME][name]
+
+db = _LazyDatabase()
 
 # JWT Config
 SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'calius-digital-secret-key-2024')
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 24
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing (passlib is imported on first use)
+_pwd_context = None
+
+def get_pwd_context():
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
 
 # Midtrans configuration
 MIDTRANS_SERVER_KEY = os.environ.get('MIDTRANS_SERVER_KEY', '')
 MIDTRANS_CLIENT_KEY = os.environ.get('MIDTRANS_CLIENT_KEY', '')
 MIDTRANS_IS_PRODUCTION = os.environ.get('MIDTRANS_IS_PRODUCTION', 'False').lower() == 'true'
+_midtrans_snap = None
 
-# Cloudinary configuration
-cloudinary.config(
-    cloud_name=os.environ.get("CLOUDINARY_CLOUD_NAME", ""),
-    api_key=os.environ.get("CLOUDINARY_API_KEY", ""),
-    api_secret=os.environ.get("CLOUDINARY_API_SECRET", ""),
-    secure=True
-)
+def get_midtrans_snap():
+    """Build the Midtrans Snap client on first checkout."""
+    global _midtrans_snap
+    if _midtrans_snap is None:
+        import midtransclient
+        _midtrans_snap = midtransclient.Snap(
+            is_production=MIDTRANS_IS_PRODUCTION,
+            server_key=MIDTRANS_SERVER_KEY,
+            client_key=MIDTRANS_CLIENT_KEY
+        )
+    return _midtrans_snap
+
+# Cloudinary configuration (SDK is imported and configured on first use)
+_cloudinary_configured = False
+
+def get_cloudinary():
+    global _cloudinary_configured
+    import cloudinary
+    import cloudinary.utils
+    import cloudinary.uploader
+    if not _cloudinary_configured:
+        cloudinary.config(
+            cloud_name=os.environ.get("CLOUDINARY_CLOUD_NAME", ""),
+            api_key=os.environ.get("CLOUDINARY_API_KEY", ""),
+            api_secret=os.environ.get("CLOUDINARY_API_SECRET", ""),
+            secure=True
+        )
+        _cloudinary_configured = True
+    return cloudinary
 
-# Resend Email configuration
+# Resend Email configuration (SDK is imported on first email)
 RESEND_API_KEY = os.environ.get("RESEND_API_KEY", "")
 ADMIN_EMAIL = os.environ.get("ADMIN_EMAIL", "admin@calius.digital")
 SENDER_EMAIL = os.environ.get("SENDER_EMAIL", "onboarding@resend.dev")
 
-if RESEND_API_KEY:
-    resend.api_key = RESEND_API_KEY
+def get_resend():
+    import resend
+    if RESEND_API_KEY:
+        resend.api_key = RESEND_API_KEY
+    return resend
 
 # ==================== EMAIL HELPERS ====================
 
@@ -109,7 +286,7 @@ async def send_order_notification_email(order_data: dict):
             "subject": f"🛒 Order Baru #{order_data.get('order_id', '')} - Rp {order_data.get('gross_amount', 0):,}",
             "html": html_content
         }
-        result = await asyncio.to_thread(resend.Emails.send, params)
+        result = await asyncio.to_thread(get_resend().Emails.send, params)
         logger.info(f"Order notification email sent: {result}")
         return result
     except Exception as e:
@@ -162,36 +339,664 @@ async def send_customer_confirmation_email(order_data: dict):
             "subject": f"✅ Pembayaran Berhasil - Order #{order_data.get('order_id', '')}",
             "html": html_content
         }
-        result = await asyncio.to_thread(resend.Emails.send, params)
+        result = await asyncio.to_thread(get_resend().Emails.send, params)
         logger.info(f"Customer confirmation email sent to {customer_email}")
         return result
     except Exception as e:
         logger.error(f"Failed to send customer email: {str(e)}")
         return None
 
-app = FastAPI(title="Calius Digital API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pre-connect so the first request doesn't pay for server selection and
+    # the TLS handshake. A failed ping is logged, not fatal: routes with
+    # default-data fallbacks still work without Mongo. Vercel's Python
+    # runtime doesn't promise to run the lifespan at all, so nothing here
+    # is required there: the client is created on first use and the
+    # buffers flush inline from requests.
+    try:
+        start = time.perf_counter()
+        await db.command("ping")
+        logger.info(f"MongoDB ready in {(time.perf_counter() - start) * 1000:.0f} ms")
+    except Exception as e:
+        logger.warning(f"MongoDB ping on startup failed: {str(e)}")
+    if BOOTSTRAP_ON_STARTUP:
+        try:
+            await bootstrap_database()
+        except Exception as e:
+            logger.warning(f"Database bootstrap on startup failed: {str(e)}")
+    reconcile_task = None
+    if not IS_SERVERLESS:
+        for buffer in write_behind_buffers:
+            buffer.start()
+        if RECONCILE_INTERVAL_SECONDS > 0:
+            reconcile_task = asyncio.create_task(_reconcile_loop())
+    yield
+    if reconcile_task is not None:
+        reconcile_task.cancel()
+    for buffer in write_behind_buffers:
+        try:
+            await buffer.stop()
+        except Exception as e:
+            logger.warning(f"{type(buffer).__name__} flush on shutdown failed: {str(e)}")
+    # With MONGO_REUSE_CLIENT (the serverless default) a shutdown never
+    # closes the pool, in case a runtime runs the lifespan between
+    # invocations of a warm instance that will be reused.
+    if _mongo_client is not None and not MONGO_REUSE_CLIENT:
+        _mongo_client.close()
+
+app = FastAPI(title="Calius Digital API", lifespan=lifespan)
 api_router = APIRouter(prefix="/api")
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# ==================== FAST JSON RESPONSES ====================
+# Hot read routes opt into FastJSONResponse: documents coming out of Mongo
+# with {"_id": 0} are already JSON-native, so we skip FastAPI's
+# jsonable_encoder walk and serialize straight to bytes with orjson (stdlib
+# json is used when orjson isn't installed).
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CATALOG_CACHE_TTL = float(os.environ.get("CATALOG_CACHE_TTL", "30"))
+CATALOG_CACHE_MAX_ENTRIES = int(os.environ.get("CATALOG_CACHE_MAX_ENTRIES", "512"))
+
+
+def _json_default(obj: Any):
+    """Fallback for values orjson / json can't serialize natively."""
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    # ObjectId, Decimal128 and friends
+    return str(obj)
+
+
+def dumps_json(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, ensure_ascii=False, separators=(",", ":"), default=_json_default
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that serializes with orjson and accepts pre-serialized bytes."""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, (bytes, bytearray)):
+            return bytes(content)
+        return dumps_json(content)
+
+
+class _ResponseCache:
+    """Per-instance TTL cache of serialized JSON bodies for catalog routes.
+
+    Keys are tuples whose first element is the namespace (collection name),
+    so admin CRUD can drop everything for a collection with invalidate().
+    At most max_entries bodies are kept; the least recently used goes first.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = CATALOG_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._dependents: Dict[str, set] = {}
+        self._listeners: List[Callable[[str, tuple], None]] = []
+
+    def link(self, namespace: str, *sources: str) -> None:
+        """Invalidate namespace too whenever any of sources is invalidated."""
+        for source in sources:
+            self._dependents.setdefault(source, set()).add(namespace)
+
+    def get(self, key: tuple) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, body = entry
+        if time.monotonic() >= expires_at:
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return body
+
+    def respond(self, key: tuple, content: Any, store: bool = True) -> FastJSONResponse:
+        """Serialize content; store=False answers without keeping the body."""
+        body = dumps_json(content)
+        if store and self.ttl > 0:
+            self._entries[key] = (time.monotonic() + self.ttl, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return FastJSONResponse(body)
+
+    def add_listener(self, callback: Callable[[str, tuple], None]) -> None:
+        """Call callback(namespace, slugs) on every invalidate(), e.g. to purge the CDN."""
+        self._listeners.append(callback)
+
+    def invalidate(self, namespace: str, *slugs: str) -> None:
+        """Drop cached bodies for namespace; slugs name the items written, if known."""
+        for callback in self._listeners:
+            callback(namespace, slugs)
+        namespaces = {namespace} | self._dependents.get(namespace, set())
+        for key in [k for k in self._entries if k[0] in namespaces]:
+            self._entries.pop(key, None)
+
+
+catalog_cache = _ResponseCache(CATALOG_CACHE_TTL)
+
+
+def etag_response(request: Request, body: bytes, cache_control: Optional[str] = None) -> Response:
+    """JSON body with a content-hash ETag; a matching If-None-Match gets a bare 304."""
+    etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+    headers = {"ETag": etag}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(body, headers=headers)
+
+# ==================== METRICS ====================
+# In-process request and Mongo metrics, rendered in the Prometheus text
+# format by /api/admin/metrics. Counters are per instance: on Vercel each
+# warm function keeps its own, so scrape/aggregate with that in mind.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Mongo command durations of the current request, appended to from the
+# driver's executor threads (Motor copies the context into them).
+_request_db_timings: ContextVar[Optional[list]] = ContextVar("request_db_timings", default=None)
+# ASGI scope of the current request; routing fills in scope["route"] before
+# the handler runs, so listeners can name the originating route.
+_request_scope: ContextVar[Optional[dict]] = ContextVar("request_scope", default=None)
+
+
+class _Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += 1
+        self.sum += value
+
+
+class _MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms: Dict[str, Dict[tuple, _Histogram]] = {}
+        self.counters: Dict[str, Dict[tuple, float]] = {}
+        self.gauges: Dict[str, Dict[tuple, float]] = {}
+        self.help: Dict[str, tuple] = {}
+
+    def describe(self, name: str, kind: str, text: str, labels: tuple) -> None:
+        self.help[name] = (kind, text, labels)
+
+    def observe(self, name: str, labels: tuple, value: float, buckets: tuple = LATENCY_BUCKETS) -> None:
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            hist = series.get(labels)
+            if hist is None:
+                hist = series[labels] = _Histogram(buckets)
+            hist.observe(value)
+
+    def inc(self, name: str, labels: tuple = (), value: float = 1) -> None:
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0) + value
+
+    def gauge_add(self, name: str, labels: tuple, value: float) -> None:
+        with self._lock:
+            series = self.gauges.setdefault(name, {})
+            series[labels] = series.get(labels, 0) + value
+
+    @staticmethod
+    def _escape(value: Any) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    def _labels(self, names: tuple, values: tuple, le: Any = None) -> str:
+        pairs = [f'{n}="{self._escape(v)}"' for n, v in zip(names, values)]
+        if le is not None:
+            pairs.append(f'le="{le}"')
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self, extra: Optional[Dict[str, tuple]] = None) -> str:
+        """Prometheus text exposition; extra maps name -> (kind, value)."""
+        lines = []
+        with self._lock:
+            for name, (kind, text, label_names) in self.help.items():
+                lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == "histogram":
+                    for labels, hist in self.histograms.get(name, {}).items():
+                        cumulative = 0
+                        for bound, count in zip(hist.buckets, hist.counts):
+                            cumulative += count
+                            lines.append(f"{name}_bucket{self._labels(label_names, labels, bound)} {cumulative}")
+                        lines.append(f"{name}_bucket{self._labels(label_names, labels, '+Inf')} {hist.total}")
+                        lines.append(f"{name}_sum{self._labels(label_names, labels)} {hist.sum:.6f}")
+                        lines.append(f"{name}_count{self._labels(label_names, labels)} {hist.total}")
+                else:
+                    source = self.counters if kind == "counter" else self.gauges
+                    for labels, value in source.get(name, {}).items():
+                        lines.append(f"{name}{self._labels(label_names, labels)} {value:g}")
+        for name, (kind, value) in (extra or {}).items():
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = _MetricsRegistry()
+metrics.describe("calius_http_request_duration_seconds", "histogram", "Request latency by route and status.", ("method", "route", "status"))
+metrics.describe("calius_http_response_size_bytes", "histogram", "Response body size by route.", ("method", "route"))
+metrics.describe("calius_http_requests_in_flight", "gauge", "Requests currently being handled.", ("method",))
+metrics.describe("calius_request_mongo_seconds", "histogram", "Total Mongo time spent per request.", ("method", "route"))
+metrics.describe("calius_request_mongo_commands", "histogram", "Mongo commands issued per request.", ("method", "route"))
+metrics.describe("calius_mongo_command_duration_seconds", "histogram", "Mongo command latency.", ("command", "collection"))
+metrics.describe("calius_mongo_command_failures_total", "counter", "Failed Mongo commands.", ("command", "collection"))
+COMMAND_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50)
+
+
+class _CommandMetrics(monitoring.CommandListener):
+    """Records per-command latency and charges it to the current request."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[tuple, tuple] = {}
+
+    @staticmethod
+    def _key(event) -> tuple:
+        return (event.connection_id, event.request_id)
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = ""
+        with self._lock:
+            self._pending[self._key(event)] = (event.command_name, collection)
+
+    def _finish(self, event, failed: bool):
+        with self._lock:
+            command, collection = self._pending.pop(self._key(event), (event.command_name, ""))
+        seconds = event.duration_micros / 1_000_000
+        metrics.observe("calius_mongo_command_duration_seconds", (command, collection), seconds)
+        if failed:
+            metrics.inc("calius_mongo_command_failures_total", (command, collection))
+        timings = _request_db_timings.get()
+        if timings is not None:
+            timings.append(seconds)
+        return command, collection, seconds
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+
+command_metrics = _CommandMetrics()
+
+# ==================== SLOW QUERY PROFILER ====================
+# Opt-in (MONGO_PROFILER_ENABLED=true). Commands slower than MONGO_SLOW_MS
+# are logged with the route that issued them and grouped by query shape
+# (collection, command, filter/sort keys). Once a read shape has been slow
+# MONGO_EXPLAIN_AFTER times we run explain() on a sample and flag plans
+# that scan the whole collection. Report: GET /api/admin/profiler/slow-queries
+
+MONGO_PROFILER_ENABLED = os.environ.get("MONGO_PROFILER_ENABLED", "false").lower() == "true"
+MONGO_SLOW_MS = float(os.environ.get("MONGO_SLOW_MS", "200"))
+MONGO_EXPLAIN_AFTER = int(os.environ.get("MONGO_EXPLAIN_AFTER", "3"))
+MONGO_PROFILER_MAX_SHAPES = 200
+
+# Driver-added fields that must not be sent back inside explain
+_DRIVER_FIELDS = {"$db", "lsid", "$clusterTime", "$readPreference", "txnNumber", "$audit", "apiVersion", "readConcern"}
+_EXPLAINABLE = {"find", "aggregate", "count", "distinct"}
+
+
+def _current_route() -> str:
+    scope = _request_scope.get()
+    if not scope:
+        return "background"
+    route = scope.get("route")
+    return f"{scope.get('method', '')} {getattr(route, 'path', None) or scope.get('path', '')}".strip()
+
+
+# Operators that make a filter field a range (or scan) predicate; anything
+# else, $in included, is matched as equality for index ordering
+_RANGE_OPERATORS = {"$gt", "$gte", "$lt", "$lte", "$ne", "$nin", "$not", "$regex", "$exists"}
+
+
+def _split_filter(query: Any) -> tuple:
+    """(equality keys, range keys) of a filter document, each sorted."""
+    if not isinstance(query, Mapping):
+        return (), ()
+    equality, ranges = [], []
+    for key, value in query.items():
+        if key.startswith("$"):
+            # $or / $and / $expr: no single index prefix to suggest
+            continue
+        if isinstance(value, Mapping) and any(op in _RANGE_OPERATORS for op in value):
+            ranges.append(key)
+        else:
+            equality.append(key)
+    return tuple(sorted(equality)), tuple(sorted(ranges))
+
+
+def _query_shape(command_name: str, command: Mapping) -> tuple:
+    """Reduce a command to the parts that decide index usage."""
+    if command_name == "aggregate":
+        stages = []
+        match_keys: tuple = ((), ())
+        sort_keys: tuple = ()
+        for stage in command.get("pipeline") or []:
+            op = next(iter(stage), "")
+            stages.append(op)
+            if op == "$match" and match_keys == ((), ()):
+                match_keys = _split_filter(stage[op])
+            if op == "$sort" and not sort_keys:
+                sort_keys = tuple(stage[op])
+        return (*match_keys, sort_keys, "|".join(stages))
+    query = command.get("filter") or command.get("query") or command.get("q") or {}
+    sort = command.get("sort") or {}
+    return (*_split_filter(query), tuple(sort), "")
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    stages = []
+    if isinstance(plan, Mapping):
+        if isinstance(plan.get("stage"), str):
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(_plan_stages(value))
+    return stages
+
+
+def _suggested_index(filter_keys: List[str], range_keys: List[str], sort_keys: List[str]) -> dict:
+    """Compound index in equality, sort, range order."""
+    keys: List[str] = [k for k in filter_keys if k not in range_keys]
+    keys += [k for k in sort_keys if k not in keys]
+    keys += [k for k in range_keys if k not in keys]
+    return {k: 1 for k in keys}
+
+
+class _SlowQueryProfiler(monitoring.CommandListener):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[tuple, tuple] = {}
+        self.shapes: Dict[tuple, dict] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def started(self, event):
+        if not MONGO_PROFILER_ENABLED or event.command_name == "explain":
+            return
+        collection = event.command.get(event.command_name)
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (
+                collection if isinstance(collection, str) else "",
+                {k: v for k, v in event.command.items() if k not in _DRIVER_FIELDS},
+                _current_route(),
+            )
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        if not MONGO_PROFILER_ENABLED:
+            return
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        elapsed_ms = event.duration_micros / 1000
+        if elapsed_ms < MONGO_SLOW_MS:
+            return
+        collection, command, route = pending
+        equality_keys, range_keys, sort_keys, pipeline = _query_shape(event.command_name, command)
+        shape = (collection, event.command_name, equality_keys, range_keys, sort_keys, pipeline)
+        logger.warning(
+            f"Slow Mongo {event.command_name} on {collection} took {elapsed_ms:.0f} ms "
+            f"({route}) filter={list(equality_keys + range_keys)} sort={list(sort_keys)}"
+        )
+        with self._lock:
+            entry = self.shapes.get(shape)
+            if entry is None:
+                if len(self.shapes) >= MONGO_PROFILER_MAX_SHAPES:
+                    return
+                entry = self.shapes[shape] = {
+                    "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "routes": set(), "explain": None, "explain_pending": False,
+                }
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            if len(entry["routes"]) < 10:
+                entry["routes"].add(route)
+            wants_explain = (
+                event.command_name in _EXPLAINABLE
+                and entry["count"] >= MONGO_EXPLAIN_AFTER
+                and entry["explain"] is None
+                and not entry["explain_pending"]
+                and self.loop is not None
+            )
+            if wants_explain:
+                entry["explain_pending"] = True
+        if wants_explain:
+            # We're on a driver thread; run explain on the app's event loop
+            self.loop.call_soon_threadsafe(lambda: asyncio.ensure_future(self._explain(shape, command)))
+
+    async def _explain(self, shape: tuple, command: dict) -> None:
+        try:
+            result = await db.command({"explain": command, "verbosity": "queryPlanner"})
+            stages = _plan_stages(result.get("queryPlanner", {}).get("winningPlan") or result.get("stages") or result)
+            summary = {"stages": stages, "collection_scan": "COLLSCAN" in stages}
+        except Exception as e:
+            summary = {"error": str(e)}
+        with self._lock:
+            entry = self.shapes.get(shape)
+            if entry is not None:
+                entry["explain"] = summary
+                entry["explain_pending"] = False
+
+    def report(self) -> dict:
+        with self._lock:
+            rows = []
+            for (collection, command, equality_keys, range_keys, sort_keys, pipeline), entry in self.shapes.items():
+                rows.append({
+                    "collection": collection,
+                    "command": command,
+                    "filter_keys": list(equality_keys + range_keys),
+                    "range_keys": list(range_keys),
+                    "sort_keys": list(sort_keys),
+                    "pipeline": pipeline or None,
+                    "count": entry["count"],
+                    "total_ms": round(entry["total_ms"], 1),
+                    "avg_ms": round(entry["total_ms"] / entry["count"], 1),
+                    "max_ms": round(entry["max_ms"], 1),
+                    "routes": sorted(entry["routes"]),
+                    "explain": entry["explain"],
+                })
+        rows.sort(key=lambda r: r["total_ms"], reverse=True)
+        suspects = [
+            {
+                "collection": r["collection"],
+                "routes": r["routes"],
+                "total_ms": r["total_ms"],
+                "suggested_index": _suggested_index(r["filter_keys"], r["range_keys"], r["sort_keys"]),
+            }
+            for r in rows
+            if (r["explain"] or {}).get("collection_scan")
+        ]
+        return {
+            "enabled": MONGO_PROFILER_ENABLED,
+            "threshold_ms": MONGO_SLOW_MS,
+            "shapes": rows,
+            "missing_index_suspects": suspects,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.shapes.clear()
+
+
+slow_query_profiler = _SlowQueryProfiler()
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    method = request.method
+    db_timings: list = []
+    db_token = _request_db_timings.set(db_timings)
+    scope_token = _request_scope.set(request.scope)
+    slow_query_profiler.loop = asyncio.get_running_loop()
+    metrics.gauge_add("calius_http_requests_in_flight", (method,), 1)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.gauge_add("calius_http_requests_in_flight", (method,), -1)
+        # Label by route template (/api/blog/{slug}), not the raw path, to
+        # keep the series count bounded
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", None) or "unmatched"
+        metrics.observe("calius_http_request_duration_seconds", (method, route_path, str(status)), elapsed)
+        metrics.observe("calius_request_mongo_seconds", (method, route_path), sum(db_timings))
+        metrics.observe("calius_request_mongo_commands", (method, route_path), len(db_timings), COMMAND_COUNT_BUCKETS)
+        if status != 500:
+            size = response.headers.get("content-length")
+            if size is not None:
+                metrics.observe("calius_http_response_size_bytes", (method, route_path), int(size), SIZE_BUCKETS)
+            if db_timings:
+                response.headers["Server-Timing"] = f"db;dur={sum(db_timings) * 1000:.1f};desc=\"{len(db_timings)} commands\""
+        _request_scope.reset(scope_token)
+        _request_db_timings.reset(db_token)
+
+# ==================== REQUEST COALESCING ====================
+# Single-flight for hot detail reads: concurrent callers asking for the same
+# key share one in-flight query and its result instead of each hitting Mongo.
+# Nothing outlives the flight, but a flight that started before an admin
+# write may still return the old document. Each namespace (key[0]) has a
+# generation that catalog_cache invalidations bump, and callers arriving
+# after a write start a new flight instead of joining the old one. Results
+# are shared objects and must be treated as read-only by callers.
+
+
+class _SingleFlight:
+    def __init__(self):
+        self._flights: Dict[tuple, tuple] = {}
+        self._generations: Dict[str, int] = {}
+
+    def invalidate(self, namespace: str, slugs: tuple = ()) -> None:
+        self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    async def do(self, key: tuple, fn: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        key = (self._generations.get(key[0], 0), *key)
+        flight = self._flights.get(key)
+        # A flight left over from a previous event loop (serverless
+        # invocations may each get their own) can't be awaited here
+        if flight is not None and flight[0] is loop:
+            metrics.inc("calius_singleflight_shared_total", (key[1],))
+            return await asyncio.shield(flight[1])
+        task = loop.create_task(fn())
+        self._flights[key] = (loop, task)
+        task.add_done_callback(lambda _t: self._release(key, task))
+        # shield: a disconnecting leader must not cancel the query for
+        # everyone else waiting on it
+        return await asyncio.shield(task)
+
+    def _release(self, key: tuple, task: asyncio.Task) -> None:
+        flight = self._flights.get(key)
+        if flight is not None and flight[1] is task:
+            del self._flights[key]
+        if not task.cancelled():
+            # retrieve the exception so an unawaited failure isn't logged
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+
+read_flights = _SingleFlight()
+catalog_cache.add_listener(read_flights.invalidate)
+metrics.describe("calius_singleflight_shared_total", "counter", "Reads served by joining an in-flight identical query.", ("namespace",))
+
+
+async def find_blog_post(slug: str) -> Optional[dict]:
+    """Blog post by slug (Mongo, then defaults), shared by the API and SSR routes."""
+    async def load():
+        post = await db.blog.find_one({"slug": slug}, {"_id": 0})
+        return post or _DEFAULT_BLOG_POSTS.by_slug.get(slug)
+    return await read_flights.do(("blog", slug), load)
+
+
+async def find_template(slug: str) -> Optional[dict]:
+    """Template by slug (Mongo, then defaults), shared by the API and SSR routes."""
+    async def load():
+        template = await db.templates.find_one({"slug": slug}, {"_id": 0})
+        return template or _DEFAULT_TEMPLATES.by_slug.get(slug)
+    return await read_flights.do(("templates", slug), load)
+
+
+async def list_templates(category: Optional[str], sort: Optional[str] = None) -> list:
+    """Templates for a category ("all"/None for every one), empty if the collection is.
+
+    sort="popular" orders by the downloads counter (served by an index).
+    """
+    query = {}
+    if category and category != "all":
+        query["category"] = category
+
+    def load():
+        cursor = db.templates.find(query, {"_id": 0})
+        if sort == "popular":
+            cursor = cursor.sort("downloads", -1)
+        return cursor.to_list(100)
+
+    return await read_flights.do(("templates", "list", category or "all", sort or ""), load)
+
 # ==================== AUTH HELPERS ====================
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def create_access_token(data: dict) -> str:
+    from jose import jwt
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    from jose import JWTError, jwt
     try:
         token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -215,6 +1020,127 @@ async def require_editor(user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Editor access required")
     return user
 
+# ==================== RATE LIMITING ====================
+# Token buckets per (route, client IP) for the public write endpoints. The
+# check runs as a route dependency, so a flood is answered with 429 before
+# the handler touches Mongo or bcrypt. RATE_LIMIT_BACKEND=memory (default)
+# keeps buckets per instance; =mongo shares them across serverless instances
+# through one atomic find_one_and_update per request on rate_limits.
+#
+# The client IP comes from X-Forwarded-For only behind a trusted proxy:
+# TRUSTED_PROXY_HOPS is the number of proxies in front of the app, and the
+# IP is the hop that many entries from the right (anything further left was
+# written by the client). 0 uses the socket peer. On Vercel the edge
+# overwrites X-Forwarded-For with the client IP, hence the default of 1 there.
+
+TRUSTED_PROXY_HOPS = int(os.environ.get("TRUSTED_PROXY_HOPS", "1" if IS_SERVERLESS else "0"))
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory").lower()
+RATE_LIMIT_MAX_KEYS = 10000
+
+# bucket name -> (burst capacity, tokens refilled per second)
+RATE_LIMIT_RULES: Dict[str, tuple] = {
+    "contact": (5, 5 / 600),        # 5 messages, then one every 2 minutes
+    "create-token": (10, 10 / 60),  # 10 checkouts a minute
+    "login": (5, 5 / 60),           # 5 attempts, then one every 12 seconds
+    "track": (30, 1),               # counter beacons
+    "analytics": (60, 5),           # page-view beacons (batched client-side)
+    "download-link": (10, 10 / 60), # signed installer URLs
+}
+
+
+class _MemoryRateLimitBackend:
+    name = "memory"
+
+    def __init__(self):
+        self.buckets: Dict[str, list] = {}
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        """Take one token; returns 0 if allowed, else seconds until one is available."""
+        now = time.monotonic()
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= RATE_LIMIT_MAX_KEYS:
+                self._prune(now)
+            bucket = self.buckets[key] = [float(capacity), now]
+        tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return 0.0
+        bucket[0] = tokens
+        return (1 - tokens) / rate
+
+    def _prune(self, now: float) -> None:
+        # Oldest-touched buckets first; an idle bucket has refilled anyway
+        for key, _ in sorted(self.buckets.items(), key=lambda kv: kv[1][1])[: RATE_LIMIT_MAX_KEYS // 4]:
+            del self.buckets[key]
+
+
+class _MongoRateLimitBackend:
+    name = "mongo"
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        now = time.time()
+        refilled = {"$min": [capacity, {"$add": [
+            {"$ifNull": ["$tokens", capacity]},
+            {"$multiply": [{"$subtract": [now, {"$ifNull": ["$ts", now]}]}, rate]},
+        ]}]}
+        doc = await db.rate_limits.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled, "ts": now}},
+                {"$set": {
+                    "allowed": {"$gte": ["$tokens", 1]},
+                    "tokens": {"$cond": [{"$gte": ["$tokens", 1]}, {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                    # TTL index on expires_at drops buckets once they'd be full again
+                    "expires_at": {"$add": ["$$NOW", int(capacity / rate * 1000)]},
+                }},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc["allowed"]:
+            return 0.0
+        return (1 - doc["tokens"]) / rate
+
+
+rate_limit_backend = _MongoRateLimitBackend() if RATE_LIMIT_BACKEND == "mongo" else _MemoryRateLimitBackend()
+metrics.describe("calius_rate_limited_total", "counter", "Requests rejected by the rate limiter.", ("bucket",))
+
+
+def client_ip(request: Request) -> str:
+    if TRUSTED_PROXY_HOPS > 0:
+        hops = [h.strip() for h in request.headers.get("x-forwarded-for", "").split(",") if h.strip()]
+        if hops:
+            # fewer hops than proxies: the leftmost was still added by one of ours
+            return hops[-min(TRUSTED_PROXY_HOPS, len(hops))]
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(bucket: str):
+    """Route dependency enforcing RATE_LIMIT_RULES[bucket] per client IP."""
+    capacity, rate = RATE_LIMIT_RULES[bucket]
+
+    async def check(request: Request):
+        if not RATE_LIMIT_ENABLED:
+            return
+        try:
+            retry_after = await rate_limit_backend.take(f"{bucket}:{client_ip(request)}", capacity, rate)
+        except Exception as e:
+            # A broken shared backend must not take the endpoint down with it
+            logger.warning(f"Rate limit check failed, allowing request: {str(e)}")
+            return
+        if retry_after:
+            metrics.inc("calius_rate_limited_total", (bucket,))
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, please try again later",
+                headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+            )
+
+    return check
+
 # ==================== MODELS ====================
 
 class UserCreate(BaseModel):
@@ -332,132 +1258,1412 @@ class ContactRequest(BaseModel):
 
 class PaymentRequest(BaseModel):
     order_id: str
-    gross_amount: int
+    # informational: the amount charged comes from price_index.price_cart()
+    gross_amount: Optional[int] = None
     customer_email: str
     customer_name: str
     customer_phone: Optional[str] = None
     item_details: List[Dict[str, Any]]
 
+class CartPriceRequest(BaseModel):
+    item_details: List[Dict[str, Any]]
+    currency: str = "IDR"
+
+# ==================== WRITE-BEHIND COUNTERS ====================
+# Blog views and template downloads are counted in memory per slug and
+# written as one unordered bulk_write of $inc ops, instead of one write per
+# hit. Long-running servers flush every COUNTER_FLUSH_INTERVAL seconds from a
+# background task; serverless instances (no reliable background work) flush
+# inline from the ingest request once the interval has passed. Every
+# deployment flushes inline once COUNTER_MAX_PENDING slugs are buffered, and
+# new slugs past that are dropped while a flush is in flight, so the buffer
+# stays bounded. On long-running servers the lifespan flushes whatever is left
+# on shutdown; serverless runtimes may never run it. Counts are best-effort: a
+# crashed or frozen instance loses its unflushed buffer.
+
+COUNTER_FLUSH_INTERVAL = float(os.environ.get("COUNTER_FLUSH_INTERVAL", "10"))
+COUNTER_MAX_PENDING = int(os.environ.get("COUNTER_MAX_PENDING", "5000"))
+COUNTER_MAX_EVENTS = 50
+COUNTER_SLUG_PATTERN = re.compile(r"^[a-z0-9][a-z0-9._~-]{0,199}$")
+
+# event kind -> (collection, counter field)
+COUNTER_KINDS: Dict[str, tuple] = {
+    "view": ("blog", "views"),
+    "download": ("templates", "downloads"),
+}
+
+
+class _CounterBuffer(WriteBehindBuffer):
+    def __init__(self):
+        super().__init__(COUNTER_FLUSH_INTERVAL, COUNTER_MAX_PENDING)
+        self.pending: Dict[tuple, int] = {}
+        self.flushed_total = 0
+        self.dropped = 0
+
+    def add(self, kind: str, slug: str, n: int = 1) -> bool:
+        key = (kind, slug)
+        if key not in self.pending and len(self.pending) >= self.max_pending:
+            self.dropped += n
+            return False
+        self.pending[key] = self.pending.get(key, 0) + n
+        return True
+
+    def full(self) -> bool:
+        return len(self.pending) >= self.max_pending
+
+    def size(self) -> int:
+        return len(self.pending)
+
+    async def flush(self) -> int:
+        """Write the buffered increments; returns how many documents were touched."""
+        if not self.pending:
+            self.last_flush = time.monotonic()
+            return 0
+        # swap first so increments arriving during the write go to the next batch
+        batch, self.pending = self.pending, {}
+        self.last_flush = time.monotonic()
+        by_collection: Dict[str, list] = {}
+        for key in batch:
+            by_collection.setdefault(COUNTER_KINDS[key[0]][0], []).append(key)
+        touched = 0
+        for collection, keys in by_collection.items():
+            ops = [
+                UpdateOne({"slug": slug}, {"$inc": {COUNTER_KINDS[kind][1]: batch[(kind, slug)]}})
+                for kind, slug in keys
+            ]
+            try:
+                result = await db[collection].bulk_write(ops, ordered=False)
+                touched += result.modified_count
+            except Exception as e:
+                # Unordered: on a BulkWriteError every op without a write
+                # error was applied, so only the failed ones are kept
+                if isinstance(e, BulkWriteError):
+                    failed = [err["index"] for err in e.details.get("writeErrors", [])]
+                    touched += e.details.get("nModified", 0)
+                else:
+                    failed = range(len(keys))
+                logger.warning(f"Counter flush to {collection} failed, keeping {len(failed)} increments: {str(e)}")
+                for i in failed:
+                    kind, slug = keys[i]
+                    self.add(kind, slug, batch[keys[i]])
+        self.flushed_total += touched
+        return touched
+
+
+counters = _CounterBuffer()
+
+# ==================== PAGE-VIEW ANALYTICS ====================
+# First-party page views from the SPA. Ingest only touches memory: raw events
+# are queued and hourly/daily rollup counts per (path, referrer host) are
+# summed in a dict. A flush writes the raw events as hour-bucketed documents
+# (up to ANALYTICS_BUCKET_SIZE events each, insert_many) and the rollups as
+# one unordered bulk_write of $inc upserts, so the write count depends on
+# the number of distinct paths, not on traffic. Dashboards read the rollups.
+# Raw buckets expire after ANALYTICS_RAW_RETENTION_DAYS and hourly rollups
+# after ANALYTICS_HOURLY_RETENTION_DAYS (TTL indexes); daily rollups are kept.
+#
+# Paths and referrers come from the client, so the rollup key space is
+# bounded twice: paths outside the SPA's public routes are counted as
+# "(other)", and past ANALYTICS_MAX_ROLLUP_KEYS distinct keys in one flush
+# window new (path, referrer) pairs fold into ("(other)", "(other)").
+
+ANALYTICS_FLUSH_INTERVAL = float(os.environ.get("ANALYTICS_FLUSH_INTERVAL", "15"))
+ANALYTICS_MAX_BUFFER = int(os.environ.get("ANALYTICS_MAX_BUFFER", "50000"))
+ANALYTICS_BUCKET_SIZE = 1000
+ANALYTICS_RAW_RETENTION_DAYS = int(os.environ.get("ANALYTICS_RAW_RETENTION_DAYS", "30"))
+ANALYTICS_HOURLY_RETENTION_DAYS = int(os.environ.get("ANALYTICS_HOURLY_RETENTION_DAYS", "14"))
+ANALYTICS_MAX_ROLLUP_KEYS = int(os.environ.get("ANALYTICS_MAX_ROLLUP_KEYS", "5000"))
+ANALYTICS_MAX_EVENTS = 100
+ANALYTICS_OTHER = "(other)"
+SITE_HOSTS = {"calius.digital", "www.calius.digital"}
+
+# first path segment of a public SPA route -> how many slug segments may follow
+ANALYTICS_SECTIONS = {
+    "": 0,
+    "services": 1,
+    "templates": 2,
+    "portfolio": 0,
+    "pricing": 0,
+    "blog": 1,
+    "contact": 0,
+    "privacy-policy": 0,
+    "terms-of-service": 0,
+}
+
+
+def _normalize_path(path: Any) -> Optional[str]:
+    if not isinstance(path, str) or not path.startswith("/"):
+        return None
+    path = path.split("?", 1)[0].split("#", 1)[0].rstrip("/")
+    section, *rest = path[1:].split("/") if path else [""]
+    if (ANALYTICS_SECTIONS.get(section, -1) < len(rest)
+            or not all(COUNTER_SLUG_PATTERN.match(segment) for segment in rest)):
+        return ANALYTICS_OTHER
+    return path or "/"
+
+
+def _referrer_host(referrer: Any) -> str:
+    if not isinstance(referrer, str) or not referrer:
+        return "(direct)"
+    from urllib.parse import urlsplit
+    host = (urlsplit(referrer).hostname or "").lower()
+    if not host:
+        return "(direct)"
+    if host in SITE_HOSTS:
+        return "(internal)"
+    return host[4:] if host.startswith("www.") else host
+
+
+class _AnalyticsBuffer(WriteBehindBuffer):
+    def __init__(self):
+        super().__init__(ANALYTICS_FLUSH_INTERVAL, ANALYTICS_MAX_BUFFER)
+        self.events: list = []
+        self.rollups: Dict[tuple, int] = {}
+        self.dropped = 0
+        self.folded = 0
+        self.ingested_total = 0
+
+    def size(self) -> int:
+        return len(self.events)
+
+    def add(self, path: str, referrer: str, country: Optional[str], at: datetime) -> None:
+        hour = at.strftime("%Y-%m-%dT%H")
+        for key in (("hour", hour, path, referrer), ("day", hour[:10], path, referrer)):
+            if key not in self.rollups and len(self.rollups) >= ANALYTICS_MAX_ROLLUP_KEYS:
+                key = (key[0], key[1], ANALYTICS_OTHER, ANALYTICS_OTHER)
+                self.folded += 1
+            self.rollups[key] = self.rollups.get(key, 0) + 1
+        self.ingested_total += 1
+        # Past the cap the raw event is dropped, but it still counts in the rollups
+        if len(self.events) >= ANALYTICS_MAX_BUFFER:
+            self.dropped += 1
+            return
+        self.events.append({"t": at, "path": path, "ref": referrer, "country": country})
+
+    async def flush(self) -> int:
+        events, self.events = self.events, []
+        rollups, self.rollups = self.rollups, {}
+        self.last_flush = time.monotonic()
+        if events:
+            now = datetime.now(timezone.utc)
+            buckets: Dict[str, list] = {}
+            for event in events:
+                buckets.setdefault(event["t"].strftime("%Y-%m-%dT%H"), []).append(event)
+            docs = [
+                {"hour": hour, "created_at": now, "count": len(chunk), "events": chunk}
+                for hour, rows in buckets.items()
+                for chunk in (rows[i:i + ANALYTICS_BUCKET_SIZE] for i in range(0, len(rows), ANALYTICS_BUCKET_SIZE))
+            ]
+            try:
+                await db.analytics_events.insert_many(docs, ordered=False)
+            except Exception as e:
+                # Raw events are for drill-down only; the rollups below are what matters
+                logger.warning(f"Analytics raw insert failed, {len(events)} events lost: {str(e)}")
+        if not rollups:
+            return len(events)
+        keys = list(rollups)
+        hourly_ttl = timedelta(days=ANALYTICS_HOURLY_RETENTION_DAYS)
+        ops = [
+            UpdateOne(
+                {"g": g, "bucket": bucket, "path": path, "referrer": referrer},
+                {
+                    "$inc": {"count": rollups[(g, bucket, path, referrer)]},
+                    **({"$setOnInsert": {
+                        "expires_at": datetime.strptime(bucket, "%Y-%m-%dT%H").replace(tzinfo=timezone.utc) + hourly_ttl,
+                    }} if g == "hour" else {}),
+                },
+                upsert=True,
+            )
+            for g, bucket, path, referrer in keys
+        ]
+        try:
+            await db.analytics_rollups.bulk_write(ops, ordered=False)
+        except Exception as e:
+            # Re-queue only the ops that failed (e.g. a duplicate-key race on
+            # upsert with another instance); the rest were applied
+            failed = (
+                [err["index"] for err in e.details.get("writeErrors", [])]
+                if isinstance(e, BulkWriteError) else range(len(keys))
+            )
+            for i in failed:
+                self.rollups[keys[i]] = self.rollups.get(keys[i], 0) + rollups[keys[i]]
+            logger.warning(f"Analytics rollup flush failed for {len(failed)} rows: {str(e)}")
+        return len(events)
+
+
+analytics = _AnalyticsBuffer()
+
+# ==================== LICENSE API ====================
+# /api/license/check and /api/license/activate for ClipPremium clients live
+# in api/_license.py (off until LICENSE_API_ENABLED=true, see there). This
+# module hands it the database and helpers and mounts its router.
+
+try:
+    from . import _license as license_api
+except ImportError:
+    import _license as license_api
+
+license_api.configure(db, client_ip, FastJSONResponse, IS_SERVERLESS)
+api_router.include_router(license_api.router)
+
+write_behind_buffers = (counters, analytics, license_api.license_logs)
+
+# ==================== CLIPPREMIUM UPDATE CHECK ====================
+# Every installed ClipPremium client polls for updates, so the answer is
+# computed once per release instead of per request. version.json
+# (UPDATE_MANIFEST_FILE) is parsed on first use and re-read only when its
+# mtime changes (stat'ed at most every UPDATE_MANIFEST_STAT_INTERVAL).
+# A check response depends on current_version only through its class:
+# force (below min_version_required), update (below latest) or current, so
+# each class is serialized ahead of time and only current_version and
+# checked_at are spliced in. Clients already on the latest version get the
+# compact "current" payload without changelog or notes. Responses carry a
+# weak ETag plus Last-Modified, and a revalidating client gets a bare 304.
+# Same actions and fields as api/update-check.php.
+
+UPDATE_MANIFEST_FILE = Path(os.environ.get(
+    "UPDATE_MANIFEST_FILE",
+    str(ROOT_DIR.parent / "calius_extracted" / "calius_website_update" / "api" / "version.json"),
+))
+UPDATE_MANIFEST_STAT_INTERVAL = float(os.environ.get("UPDATE_MANIFEST_STAT_INTERVAL", "30"))
+UPDATE_INSTRUCTIONS = {
+    "step1": "Download file installer",
+    "step2": "Tutup ClipPremium jika sedang berjalan",
+    "step3": "Jalankan installer",
+    "step4": "Ikuti wizard instalasi",
+    "step5": "Buka ClipPremium versi baru",
+}
+
+
+def version_tuple(version: str) -> tuple:
+    """"3.4.10" -> (3, 4, 10); non-numeric parts count as 0, like a lenient version_compare."""
+    parts = []
+    for part in re.split(r"[.\-_+]", str(version or "0")):
+        digits = re.match(r"\d+", part)
+        parts.append(int(digits.group()) if digits else 0)
+    while len(parts) > 1 and parts[-1] == 0:
+        parts.pop()
+    return tuple(parts)
+
+
+class _UpdateManifest:
+    """version.json parsed once, with every response body it can produce prebuilt."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.mtime: Optional[float] = None
+        self.last_stat = 0.0
+        self.tag = ""
+        self.last_modified = ""
+        self.latest: tuple = ()
+        self.min_required: tuple = ()
+        self.check_prefixes: Dict[str, bytes] = {}
+        self.bodies: Dict[tuple, bytes] = {}
+        self.download_tags: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _build(self, data: dict, mtime: float) -> None:
+        from email.utils import formatdate
+        latest = data["version"]
+        full = {
+            "status": "success",
+            "update_available": True,
+            "force_update": False,
+            "latest_version": latest,
+            "is_critical": data.get("is_critical", False),
+            "release_date": data.get("release_date", ""),
+            "download_url": data.get("download_url", ""),
+            "download_size_mb": data.get("download_size_mb", 0),
+            "changelog": data.get("changelog", ""),
+            "update_notes": data.get("update_notes"),
+        }
+        check = {
+            "update": full,
+            "force": {**full, "force_update": True},
+            # already on the latest release: nothing to download or read
+            "current": {"status": "success", "update_available": False, "force_update": False, "latest_version": latest},
+        }
+        # body minus the closing brace, so per-request fields can be appended
+        self.check_prefixes = {name: dumps_json(body)[:-1] for name, body in check.items()}
+
+        bodies: Dict[tuple, bytes] = {}
+        download_tags: Dict[str, str] = {}
+        for file_type, info in (data.get("files") or {}).items():
+            body = bodies[("download", file_type)] = dumps_json({
+                "status": "success",
+                "version": latest,
+                "type": file_type,
+                "filename": info["filename"],
+                "download_url": info["url"],
+                "size_mb": info["size_mb"],
+                "sha256": info.get("sha256") or download_catalog.cached_sha256(info["filename"]) or "",
+                "instructions": UPDATE_INSTRUCTIONS,
+            })
+            # the sha256 can become known after version.json was read, so
+            # the download ETag follows the body rather than self.tag
+            download_tags[file_type] = hashlib.sha256(body).hexdigest()[:12]
+        for fmt in ("text", "html"):
+            changelog = data.get("changelog_html") or data.get("changelog") if fmt == "html" else data.get("changelog")
+            bodies[("changelog", fmt)] = dumps_json({
+                "status": "success",
+                "version": latest,
+                "release_date": data.get("release_date"),
+                "changelog": changelog,
+                "update_notes": data.get("update_notes"),
+            })
+        self.bodies = bodies
+        self.download_tags = download_tags
+        self.latest = version_tuple(latest)
+        self.min_required = version_tuple(data.get("min_version_required") or "1.0.0")
+        self.tag = hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()[:12]
+        self.last_modified = formatdate(mtime, usegmt=True)
+        self.mtime = mtime
+
+    def refresh(self) -> None:
+        """Re-read the file if it changed; checked at most every UPDATE_MANIFEST_STAT_INTERVAL."""
+        now = time.monotonic()
+        if self.mtime is not None and now - self.last_stat < UPDATE_MANIFEST_STAT_INTERVAL:
+            return
+        with self._lock:
+            self.last_stat = now
+            mtime = self.path.stat().st_mtime
+            if mtime != self.mtime:
+                self._build(json.loads(self.path.read_text(encoding="utf-8")), mtime)
+
+    def classify(self, current_version: str) -> str:
+        current = version_tuple(current_version)
+        if current < self.min_required:
+            return "force"
+        return "update" if current < self.latest else "current"
+
+
+update_manifest = _UpdateManifest(UPDATE_MANIFEST_FILE)
+metrics.describe("calius_update_checks_total", "counter", "ClipPremium update checks by result.", ("result",))
+
+
+def _not_modified(request: Request, etag: str, last_modified: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # weak comparison: W/"x" and "x" match
+        tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        return "*" in tags or etag.removeprefix("W/") in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        from email.utils import parsedate_to_datetime
+        try:
+            return parsedate_to_datetime(if_modified_since).timestamp() >= int(mtime)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+# ClipPremium update check (Public, desktop clients). Mirrors
+# api/update-check.php: ?action=check|download|changelog
+@api_router.get("/update-check")
+async def clippremium_update_check(
+    request: Request,
+    action: str = "check",
+    current_version: str = "0.0.0",
+    file_type: str = Query("installer", alias="type"),
+    changelog_format: str = Query("text", alias="format"),
+):
+    try:
+        update_manifest.refresh()
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Update manifest unavailable: {str(e)}")
+        return FastJSONResponse({"error": "Version info not available"}, status_code=500)
+    manifest = update_manifest
+
+    if action == "check":
+        result = manifest.classify(current_version)
+        metrics.inc("calius_update_checks_total", (result,))
+        etag = f'W/"{manifest.tag}-{result}-{re.sub(r"[^0-9A-Za-z.]", "_", current_version[:32])}"'
+        body = None
+    elif action == "download":
+        tags = manifest.download_tags
+        # version.json lists "lite"/"full" but no "installer": serve the first file
+        served = next((t for t in (file_type, "installer", *tags) if t in tags), None)
+        if served is None:
+            return FastJSONResponse({"error": "Download not found"}, status_code=404)
+        body = manifest.bodies[("download", served)]
+        etag = f'W/"{tags[served]}-download-{served[:32]}"'
+    elif action == "changelog":
+        fmt = "html" if changelog_format == "html" else "text"
+        body = manifest.bodies[("changelog", fmt)]
+        etag = f'W/"{manifest.tag}-changelog-{fmt}"'
+    else:
+        return FastJSONResponse({"error": "Invalid action"}, status_code=400)
+
+    headers = {
+        "ETag": etag,
+        "Last-Modified": manifest.last_modified,
+        "Cache-Control": "no-cache, must-revalidate",
+    }
+    if _not_modified(request, etag, manifest.last_modified, manifest.mtime):
+        return Response(status_code=304, headers=headers)
+    if body is None:
+        body = manifest.check_prefixes[result] + b',"current_version":' + dumps_json(current_version) + \
+            b',"checked_at":' + dumps_json(datetime.now(timezone.utc).isoformat(timespec="seconds")) + b"}"
+    return FastJSONResponse(body, headers=headers)
+
+
+# ==================== CLIPPREMIUM DOWNLOADS ====================
+# Installer delivery (the Python counterpart of api/download.php) for
+# long-running deployments: 250 MB installers don't fit in a serverless
+# bundle. Every file directly inside DOWNLOADS_DIR can be downloaded; the
+# directory is the allowlist.
+#   - URLs are signed: /api/downloads/{file}?expires=...&sig=... with
+#     HMAC-SHA256(DOWNLOAD_SIGNING_SECRET, "file\nexpires"), valid for
+#     DOWNLOAD_URL_TTL. GET /api/downloads/{file}/link issues one, and
+#     GET /api/download?file=... (download.php's URL shape) redirects to one.
+#   - Range / If-Range requests are answered with 206, so interrupted
+#     downloads resume and download managers can fetch segments in parallel.
+#   - The SHA-256 of each file is computed once on publish (POST
+#     /api/admin/downloads/publish, or in the background on first request)
+#     and kept in memory and in a "<file>.sha256" sidecar. It is sent as the
+#     Repr-Digest header and the sha256 of the update-check download
+#     payload; the ETag is size plus mtime, so it is the same before and
+#     after hashing.
+#   - The body is streamed with os.pread in DOWNLOAD_CHUNK_SIZE chunks off
+#     the event loop.
+
+DOWNLOADS_DIR = Path(os.environ.get("DOWNLOADS_DIR", str(ROOT_DIR.parent / "downloads" / "clip-premium")))
+DOWNLOAD_SIGNING_SECRET = os.environ.get("DOWNLOAD_SIGNING_SECRET", "") or SECRET_KEY
+DOWNLOAD_URL_TTL = int(os.environ.get("DOWNLOAD_URL_TTL", "3600"))
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_SIDECAR_SUFFIX = ".sha256"
+
+
+class _DownloadCatalog:
+    """Files in DOWNLOADS_DIR with their SHA-256, computed once per (size, mtime)."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._hashes: Dict[str, tuple] = {}  # filename -> (size, mtime_ns, sha256)
+        self._hashing: Dict[str, asyncio.Task] = {}
+
+    def path_for(self, filename: str) -> Optional[Path]:
+        if not filename or filename != os.path.basename(filename) or filename.startswith(".") \
+                or filename.endswith(DOWNLOAD_SIDECAR_SUFFIX):
+            return None
+        path = self.directory / filename
+        return path if path.is_file() else None
+
+    def cached_sha256(self, filename: str, stat: Optional[os.stat_result] = None) -> Optional[str]:
+        """Known hash for the current file contents; never reads the file itself."""
+        path = self.directory / filename
+        try:
+            stat = stat or path.stat()
+        except OSError:
+            return None
+        entry = self._hashes.get(filename)
+        if entry and entry[:2] == (stat.st_size, stat.st_mtime_ns):
+            return entry[2]
+        sidecar = path.with_name(filename + DOWNLOAD_SIDECAR_SUFFIX)
+        try:
+            # sha256sum format; only trusted if written after the file
+            if sidecar.stat().st_mtime_ns >= stat.st_mtime_ns:
+                digest = sidecar.read_text().split()[0].lower()
+                if len(digest) == 64:
+                    self._hashes[filename] = (stat.st_size, stat.st_mtime_ns, digest)
+                    return digest
+        except (OSError, IndexError):
+            pass
+        return None
+
+    def compute_sha256(self, filename: str) -> str:
+        """Hash the file (blocking) and remember it; run in a worker thread."""
+        path = self.directory / filename
+        stat = path.stat()
+        known = self.cached_sha256(filename, stat)
+        if known:
+            return known
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(DOWNLOAD_CHUNK_SIZE):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        self._hashes[filename] = (stat.st_size, stat.st_mtime_ns, digest)
+        # update-check download payloads pick up the new hash
+        update_manifest.mtime = None
+        try:
+            path.with_name(filename + DOWNLOAD_SIDECAR_SUFFIX).write_text(f"{digest}  {filename}\n")
+        except OSError as e:
+            logger.warning(f"SHA-256 sidecar for {filename} not written: {str(e)}")
+        return digest
+
+    def hash_in_background(self, filename: str) -> None:
+        task = self._hashing.get(filename)
+        if task is None or task.done():
+            self._hashing[filename] = asyncio.get_running_loop().create_task(
+                asyncio.to_thread(self.compute_sha256, filename)
+            )
+
+    def publish(self) -> list:
+        """Hash every downloadable file (blocking); returns their descriptions."""
+        files = []
+        for path in sorted(self.directory.iterdir()) if self.directory.is_dir() else []:
+            if self.path_for(path.name) is None:
+                continue
+            files.append({"filename": path.name, "size": path.stat().st_size, "sha256": self.compute_sha256(path.name)})
+        return files
+
+
+download_catalog = _DownloadCatalog(DOWNLOADS_DIR)
+metrics.describe("calius_download_requests_total", "counter", "Installer download requests by response.", ("response",))
+
+
+def _download_signature(filename: str, expires: int) -> str:
+    message = f"{filename}\n{expires}".encode()
+    return hmac.new(DOWNLOAD_SIGNING_SECRET.encode(), message, hashlib.sha256).hexdigest()[:32]
+
+
+def signed_download_url(request: Request, filename: str) -> tuple:
+    """(absolute signed URL, expiry as a unix timestamp)."""
+    from urllib.parse import quote
+    expires = int(time.time()) + DOWNLOAD_URL_TTL
+    url = f"{str(request.base_url).rstrip('/')}/api/downloads/{quote(filename)}" \
+          f"?expires={expires}&sig={_download_signature(filename, expires)}"
+    return url, expires
+
+
+def _byte_range(header: Optional[str], size: int) -> Optional[tuple]:
+    """(start, end inclusive) for a single "bytes=" range, None to send the whole file.
+
+    Raises ValueError for a range that lies outside the file (416).
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        # no range, another unit, or several ranges: a full 200 is allowed
+        return None
+    start_text, _, end_text = header[6:].strip().partition("-")
+    try:
+        if not start_text:
+            length = int(end_text)
+        else:
+            start = int(start_text)
+            end = min(int(end_text), size - 1) if end_text else size - 1
+    except ValueError:
+        # malformed: ignored, like any range we can't parse
+        return None
+    if not start_text:
+        # suffix range: the last `length` bytes; "bytes=-0" selects nothing
+        if length <= 0:
+            raise ValueError(header)
+        return max(0, size - length), size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+async def _file_chunks(path: Path, start: int, length: int):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        offset, remaining = start, length
+        while remaining > 0:
+            chunk = await asyncio.to_thread(os.pread, fd, min(DOWNLOAD_CHUNK_SIZE, remaining), offset)
+            if not chunk:
+                break
+            offset += len(chunk)
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        os.close(fd)
+
+
+@api_router.api_route("/downloads/{filename}", methods=["GET", "HEAD"])
+async def download_file(filename: str, request: Request, expires: int = 0, sig: str = ""):
+    from email.utils import formatdate
+    from fastapi.responses import StreamingResponse
+    if expires < time.time() or not hmac.compare_digest(sig, _download_signature(filename, expires)):
+        metrics.inc("calius_download_requests_total", ("forbidden",))
+        raise HTTPException(status_code=403, detail="Download link expired or invalid")
+    path = download_catalog.path_for(filename)
+    if path is None:
+        metrics.inc("calius_download_requests_total", ("not_found",))
+        raise HTTPException(status_code=404, detail="File not found")
+
+    stat = path.stat()
+    size = stat.st_size
+    digest = download_catalog.cached_sha256(filename, stat)
+    if digest is None:
+        download_catalog.hash_in_background(filename)
+    # size and mtime, not the digest: the ETag must not change while the
+    # file doesn't, or a resume started before hashing finished restarts
+    etag = f'"{size:x}-{stat.st_mtime_ns:x}"'
+    last_modified = formatdate(stat.st_mtime, usegmt=True)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": last_modified,
+        "Cache-Control": "private, no-transform",
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    }
+    if digest is not None:
+        import base64
+        headers["Repr-Digest"] = f"sha-256=:{base64.b64encode(bytes.fromhex(digest)).decode()}:"
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in {t.strip() for t in if_none_match.split(",")}:
+        metrics.inc("calius_download_requests_total", ("not_modified",))
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    # a resume against a changed file must restart from zero; the digest
+    # ETag older responses carried still counts as a match
+    validators = {etag, last_modified} | ({f'"{digest[:32]}"'} if digest else set())
+    if not if_range or if_range in validators:
+        try:
+            byte_range = _byte_range(request.headers.get("range"), size)
+        except ValueError:
+            metrics.inc("calius_download_requests_total", ("unsatisfiable",))
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range is None:
+        start, length, status_code = 0, size, 200
+    else:
+        start, end = byte_range
+        length, status_code = end - start + 1, 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(length)
+    metrics.inc("calius_download_requests_total", ("partial" if status_code == 206 else "full",))
+    if request.method == "HEAD":
+        return Response(status_code=status_code, headers=headers, media_type="application/octet-stream")
+    return StreamingResponse(_file_chunks(path, start, length), status_code=status_code,
+                             headers=headers, media_type="application/octet-stream")
+
+
+# Signed download link for desktop clients (Public)
+@api_router.get("/downloads/{filename}/link", dependencies=[Depends(rate_limit("download-link"))])
+async def download_link(filename: str, request: Request):
+    path = download_catalog.path_for(filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    url, expires = signed_download_url(request, filename)
+    return {
+        "filename": filename,
+        "url": url,
+        "expires_at": datetime.fromtimestamp(expires, timezone.utc).isoformat(),
+        "size": path.stat().st_size,
+        "sha256": download_catalog.cached_sha256(filename) or "",
+    }
+
+
+# download.php?file=... compatible entry point: redirect to a fresh signed URL
+@api_router.get("/download", dependencies=[Depends(rate_limit("download-link"))])
+async def download_redirect(request: Request, file: str = ""):
+    from fastapi.responses import RedirectResponse
+    if not file:
+        raise HTTPException(status_code=400, detail="File parameter required")
+    filename = os.path.basename(file)
+    if download_catalog.path_for(filename) is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    url, _ = signed_download_url(request, filename)
+    return RedirectResponse(url, status_code=302, headers={"Cache-Control": "no-store"})
+
+# ==================== BOOTSTRAP ====================
+# Default rows and indexes are written here, never from public GETs. Run it
+# once per environment via POST /api/admin/bootstrap, or on every start with
+# BOOTSTRAP_ON_STARTUP=true (long-running deployments).
+
+BOOTSTRAP_ON_STARTUP = os.environ.get("BOOTSTRAP_ON_STARTUP", "false").lower() == "true"
+
+
+async def seed_default_services() -> int:
+    """Seed the default services into an empty collection; returns how many were inserted.
+
+    Once any service exists nothing is written, so defaults an admin deleted
+    stay deleted across bootstraps. The upserts keep two concurrent seeds
+    from inserting the same default twice.
+    """
+    if await db.services.count_documents({}, limit=1):
+        return 0
+    now = datetime.now(timezone.utc).isoformat()
+    ops = [
+        UpdateOne({"id": s["id"]}, {"$setOnInsert": {**thaw(s), "created_at": now}}, upsert=True)
+        for s in get_default_services()
+    ]
+    result = await db.services.bulk_write(ops, ordered=False)
+    if result.upserted_count:
+        catalog_cache.invalidate("services")
+    return result.upserted_count
+
+
+async def bootstrap_database() -> dict:
+    """Create indexes and seed defaults. Safe to run any number of times."""
+    report = {"indexes": [], "errors": []}
+    index_specs = [
+        (db.services, "id", {"unique": True}),
+        (db.services, "slug", {}),
+        (db.services, "order", {}),
+        (db.rate_limits, "expires_at", {"expireAfterSeconds": 0}),
+        (db.blog, [("views", -1)], {}),
+        (db.templates, [("downloads", -1)], {}),
+        (db.templates, [("category", 1), ("downloads", -1)], {}),
+        (db.analytics_events, "created_at", {"expireAfterSeconds": ANALYTICS_RAW_RETENTION_DAYS * 86400}),
+        (db.analytics_rollups, [("g", 1), ("bucket", 1), ("path", 1), ("referrer", 1)], {"unique": True}),
+        # only hour rollups carry expires_at; day rollups have none and stay
+        (db.analytics_rollups, "expires_at", {"expireAfterSeconds": 0}),
+        (db.license_requests, "created_at", {"expireAfterSeconds": license_api.LICENSE_LOG_RETENTION_DAYS * 86400}),
+        # one checkout claim per order (CHECKOUT IDEMPOTENCY); rows duplicated
+        # by older double-submits must be removed before this can be built
+        (db.transactions, "order_id", {"unique": True}),
+        (db.transactions, [("created_at", -1)], {}),
+        (db.transactions, [("status", 1), ("created_at", 1)], {}),
+    ]
+    for collection, keys, options in index_specs:
+        try:
+            name = await collection.create_index(keys, **options)
+            report["indexes"].append(f"{collection.name}.{name}")
+        except Exception as e:
+            # e.g. duplicate default services left over from the old
+            # seed-on-read path; POST /api/admin/services/reset cleans them up
+            logger.warning(f"Index {collection.name}.{keys} not created: {str(e)}")
+            report["errors"].append(f"{collection.name}.{keys}: {str(e)}")
+    report["services_seeded"] = await seed_default_services()
+    return report
+
+# ==================== STATIC SNAPSHOTS ====================
+# Catalog reads can be served as static files from the CDN (frontend/public/
+# data/*.json) with the API as the fallback. A snapshot is built from Mongo
+# (falling back to the defaults, like the list routes) and published:
+#   - SNAPSHOT_PUBLISHER=local: written into SNAPSHOT_DIR (long-running or
+#     local deployments; Vercel's function filesystem is read-only)
+#   - SNAPSHOT_PUBLISHER=deploy-hook: POST SNAPSHOT_DEPLOY_HOOK_URL; the build
+#     runs publish_snapshots.py, which pulls GET /api/snapshots
+#   - unset/none: nothing is published automatically
+# The manifest records the publisher, and the SPA only reads snapshots whose
+# publisher is local or deploy-hook: a build-time snapshot taken while the
+# API has no publisher would go stale on the first admin write, so those
+# builds keep reading the API.
+# Admin CRUD marks the affected snapshots dirty through catalog_cache and the
+# write is published before the admin response returns; POST
+# /api/admin/snapshots/publish publishes on demand.
+#
+# Each file is written under a stable name (templates.json, the format
+# templateService already reads) and a versioned one (templates.<version>.json);
+# manifest.json maps names to the current versioned files.
+
+SNAPSHOT_PUBLISHER = os.environ.get("SNAPSHOT_PUBLISHER", "none").lower()
+SNAPSHOT_DIR = Path(os.environ.get("SNAPSHOT_DIR", str(ROOT_DIR.parent / "frontend" / "public" / "data")))
+SNAPSHOT_DEPLOY_HOOK_URL = os.environ.get("SNAPSHOT_DEPLOY_HOOK_URL", "")
+SNAPSHOT_KEEP_VERSIONS = int(os.environ.get("SNAPSHOT_KEEP_VERSIONS", "3"))
+
+
+async def _snapshot_list(collection: str, defaults: tuple, sort: str = None, direction: int = 1,
+                         projection: tuple = None) -> list:
+    fields = {"_id": 0, **{k: 1 for k in projection}} if projection else {"_id": 0}
+    cursor = db[collection].find({}, fields)
+    if sort:
+        cursor = cursor.sort(sort, direction)
+    docs = await cursor.to_list(1000)
+    if docs:
+        return docs
+    if projection:
+        return [{k: d[k] for k in projection if k in d} for d in defaults]
+    return [thaw(d) for d in defaults]
+
+
+async def build_snapshots() -> dict:
+    """Current snapshot bundle: {"version", "generated_at", "files": {name: rows}}."""
+    templates, services, pricing, testimonials, blog = await asyncio.gather(
+        _snapshot_list("templates", get_default_templates()),
+        _snapshot_list("services", get_default_services(), sort="order"),
+        _snapshot_list("pricing", get_default_pricing(), sort="order"),
+        _snapshot_list("testimonials", get_default_testimonials()),
+        # index only: the post bodies stay behind /api/blog/{slug}
+        _snapshot_list("blog", get_default_blog_posts(), sort="published_at", direction=-1,
+                       projection=BOOTSTRAP_FIELDS["blog"] + ("tags", "author", "read_time")),
+    )
+    files = {
+        "templates": templates,
+        "services": services,
+        "pricing": pricing,
+        "testimonials": testimonials,
+        "blog": blog,
+    }
+    version = hashlib.sha256(dumps_json(files)).hexdigest()[:12]
+    return {"version": version, "generated_at": datetime.now(timezone.utc).isoformat(), "files": files}
+
+
+class _LocalSnapshotPublisher:
+    name = "local"
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+
+    def _write(self, filename: str, body: bytes) -> None:
+        # write-then-rename so a reader never sees a half-written file
+        tmp = self.directory / f".{filename}.tmp"
+        tmp.write_bytes(body)
+        os.replace(tmp, self.directory / filename)
+
+    def _prune(self, name: str) -> None:
+        versioned = sorted(
+            self.directory.glob(f"{name}.*.json"), key=lambda p: p.stat().st_mtime, reverse=True
+        )
+        for stale in versioned[SNAPSHOT_KEEP_VERSIONS:]:
+            stale.unlink(missing_ok=True)
+
+    def _publish_sync(self, bundle: dict) -> dict:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        version = bundle["version"]
+        manifest = {"version": version, "generated_at": bundle["generated_at"], "publisher": self.name, "files": {}}
+        for name, rows in bundle["files"].items():
+            body = dumps_json(rows)
+            self._write(f"{name}.{version}.json", body)
+            self._write(f"{name}.json", body)
+            manifest["files"][name] = f"{name}.{version}.json"
+            self._prune(name)
+        self._write("manifest.json", dumps_json(manifest))
+        return {"directory": str(self.directory), "files": sorted(manifest["files"].values())}
+
+    async def publish(self, bundle: dict) -> dict:
+        return await asyncio.to_thread(self._publish_sync, bundle)
+
+
+class _DeployHookSnapshotPublisher:
+    name = "deploy-hook"
+
+    def __init__(self, url: str):
+        self.url = url
+
+    async def publish(self, bundle: dict) -> dict:
+        import httpx
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            response = await client.post(self.url)
+        response.raise_for_status()
+        return {"hook_status": response.status_code}
+
+
+class _NullSnapshotPublisher:
+    name = "none"
+
+    async def publish(self, bundle: dict) -> dict:
+        return {}
+
+
+def _make_snapshot_publisher():
+    if SNAPSHOT_PUBLISHER == "local":
+        return _LocalSnapshotPublisher(SNAPSHOT_DIR)
+    if SNAPSHOT_PUBLISHER == "deploy-hook":
+        if not SNAPSHOT_DEPLOY_HOOK_URL:
+            logger.warning("SNAPSHOT_PUBLISHER=deploy-hook without SNAPSHOT_DEPLOY_HOOK_URL; snapshots disabled")
+            return _NullSnapshotPublisher()
+        return _DeployHookSnapshotPublisher(SNAPSHOT_DEPLOY_HOOK_URL)
+    return _NullSnapshotPublisher()
+
+
+class _SnapshotManager:
+    SOURCES = ("templates", "services", "pricing", "testimonials", "blog")
+
+    def __init__(self, publisher):
+        self.publisher = publisher
+        self.dirty: set = set()
+        self.last: Optional[dict] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+
+    def mark_dirty(self, namespace: str, slugs: tuple = ()) -> None:
+        if namespace in self.SOURCES and not isinstance(self.publisher, _NullSnapshotPublisher):
+            self.dirty.add(namespace)
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock, self._lock_loop = asyncio.Lock(), loop
+        return self._lock
+
+    async def publish(self) -> dict:
+        async with self._get_lock():
+            # clear first: writes landing while we build mark it dirty again
+            self.dirty.clear()
+            start = time.perf_counter()
+            bundle = await build_snapshots()
+            result = await self.publisher.publish(bundle)
+            self.last = {
+                "version": bundle["version"],
+                "generated_at": bundle["generated_at"],
+                "publisher": self.publisher.name,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+                **result,
+            }
+            return self.last
+
+    async def publish_if_dirty(self) -> None:
+        if not self.dirty:
+            return
+        try:
+            await self.publish()
+        except Exception as e:
+            # The catalog write itself succeeded; the snapshot stays dirty
+            # until the next write or an on-demand publish
+            self.dirty.add("retry")
+            logger.error(f"Snapshot publish failed: {str(e)}")
+
+
+snapshots = _SnapshotManager(_make_snapshot_publisher())
+catalog_cache.add_listener(snapshots.mark_dirty)
+
+
+@app.middleware("http")
+async def publish_dirty_snapshots(request: Request, call_next):
+    response = await call_next(request)
+    if snapshots.dirty and request.method != "GET":
+        await snapshots.publish_if_dirty()
+    return response
+
+# ==================== EDGE CACHE POLICY ====================
+# Public reads tell the CDN what it may cache: browsers always revalidate
+# (max-age=0), the edge keeps the response for s-maxage and may serve it
+# stale for stale-while-revalidate while it refetches. Responses are tagged
+# with surrogate keys so catalog writes can purge exactly what changed:
+#   "<ns>"          every response built from the collection
+#   "<ns>:all"      its list responses
+#   "<ns>:<slug>"   one item (API detail and SSR page)
+# plus "settings", "bootstrap" and "sitemap" for the aggregates.
+# Purges go to EDGE_PURGER: "webhook" POSTs {"keys": [...]} to
+# EDGE_PURGE_WEBHOOK_URL (bridge to the CDN's purge API); the default
+# records them in-process only (local runs and tests).
+
+EDGE_CACHE_ENABLED = os.environ.get("EDGE_CACHE_ENABLED", "true").lower() == "true"
+SURROGATE_KEY_HEADER = os.environ.get("SURROGATE_KEY_HEADER", "Surrogate-Key")
+EDGE_PURGER = os.environ.get("EDGE_PURGER", "none").lower()
+EDGE_PURGE_WEBHOOK_URL = os.environ.get("EDGE_PURGE_WEBHOOK_URL", "")
+EDGE_PURGE_WEBHOOK_TOKEN = os.environ.get("EDGE_PURGE_WEBHOOK_TOKEN", "")
+
+# route template -> (s-maxage, stale-while-revalidate, surrogate key templates)
+CACHE_POLICIES: Dict[str, tuple] = {
+    "/api/services": (60, 600, ("services", "services:all")),
+    "/api/services/{slug}": (300, 3600, ("services", "services:{slug}")),
+    "/api/templates": (60, 600, ("templates", "templates:all")),
+    "/api/templates/{slug}": (300, 3600, ("templates", "templates:{slug}")),
+    "/api/portfolio": (60, 600, ("portfolio", "portfolio:all")),
+    "/api/testimonials": (300, 3600, ("testimonials", "testimonials:all")),
+    "/api/blog": (60, 600, ("blog", "blog:all")),
+    "/api/blog/{slug}": (300, 86400, ("blog", "blog:{slug}")),
+    "/api/pricing": (300, 3600, ("pricing", "pricing:all")),
+    "/api/settings": (60, 600, ("settings",)),
+    "/api/settings/version": (60, 600, ("settings",)),
+    "/api/bootstrap": (60, 600, ("bootstrap",)),
+    "/sitemap.xml": (3600, 86400, ("sitemap",)),
+    "/blog/{slug}": (300, 86400, ("blog", "blog:{slug}")),
+    "/templates/{slug}": (300, 86400, ("templates", "templates:{slug}")),
+    "/template/{slug}": (300, 86400, ("templates", "templates:{slug}")),
+}
+
+# Aggregate responses that embed a namespace's rows
+PURGE_DEPENDENTS: Dict[str, tuple] = {
+    "services": ("bootstrap",),
+    "templates": ("bootstrap", "sitemap"),
+    "portfolio": ("bootstrap", "sitemap"),
+    "testimonials": ("bootstrap",),
+    "blog": ("bootstrap", "sitemap"),
+    "pricing": ("bootstrap",),
+    "settings": ("bootstrap",),
+}
+
+
+def surrogate_keys_for(namespace: str, slugs: tuple = ()) -> list:
+    """Keys to purge after a write to namespace (slugs narrow it to those items)."""
+    if slugs:
+        keys = [f"{namespace}:all"] + [f"{namespace}:{slug}" for slug in slugs if slug]
+    else:
+        keys = [namespace]
+    return keys + list(PURGE_DEPENDENTS.get(namespace, ()))
+
+
+class _RecordingPurger:
+    """No-op stand-in: keeps the recent purges for /api/admin/cache/purges."""
+    name = "none"
+
+    def __init__(self):
+        self.history: List[dict] = []
+
+    async def purge(self, keys: List[str]) -> None:
+        self.history.append({"keys": keys, "at": datetime.now(timezone.utc).isoformat()})
+        del self.history[:-50]
+
+
+class _WebhookPurger(_RecordingPurger):
+    name = "webhook"
+
+    def __init__(self, url: str, token: str = ""):
+        super().__init__()
+        self.url = url
+        self.token = token
+
+    async def purge(self, keys: List[str]) -> None:
+        import httpx
+        headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            response = await client.post(self.url, json={"keys": keys}, headers=headers)
+        response.raise_for_status()
+        await super().purge(keys)
+
+
+class _EdgeCache:
+    def __init__(self, purger):
+        self.purger = purger
+        self.pending: set = set()
+
+    def on_invalidate(self, namespace: str, slugs: tuple = ()) -> None:
+        self.pending.update(surrogate_keys_for(namespace, slugs))
+
+    async def flush(self) -> None:
+        if not self.pending:
+            return
+        keys = sorted(self.pending)
+        self.pending.clear()
+        try:
+            await self.purger.purge(keys)
+        except Exception as e:
+            # The edge copies still expire on their own after s-maxage
+            logger.error(f"Edge purge of {keys} failed: {str(e)}")
+
+    @staticmethod
+    def apply(request: Request, response: Response) -> None:
+        if request.method not in ("GET", "HEAD") or response.status_code not in (200, 304):
+            return
+        route = request.scope.get("route")
+        policy = CACHE_POLICIES.get(getattr(route, "path", None))
+        if policy is None:
+            return
+        s_maxage, swr, key_templates = policy
+        # Handlers may set their own policy (e.g. the immutable versioned settings URL)
+        if "cache-control" not in response.headers:
+            response.headers["Cache-Control"] = f"public, max-age=0, s-maxage={s_maxage}, stale-while-revalidate={swr}"
+        response.headers[SURROGATE_KEY_HEADER] = " ".join(
+            key.format(**request.path_params) for key in key_templates
+        )
+
+
+def _make_purger():
+    if EDGE_PURGER == "webhook":
+        if not EDGE_PURGE_WEBHOOK_URL:
+            logger.warning("EDGE_PURGER=webhook without EDGE_PURGE_WEBHOOK_URL; purges are only recorded")
+            return _RecordingPurger()
+        return _WebhookPurger(EDGE_PURGE_WEBHOOK_URL, EDGE_PURGE_WEBHOOK_TOKEN)
+    return _RecordingPurger()
+
+
+edge_cache = _EdgeCache(_make_purger())
+catalog_cache.add_listener(edge_cache.on_invalidate)
+
+
+@app.middleware("http")
+async def edge_cache_headers(request: Request, call_next):
+    response = await call_next(request)
+    if EDGE_CACHE_ENABLED:
+        edge_cache.apply(request, response)
+    if edge_cache.pending and request.method != "GET":
+        # after publish_dirty_snapshots (inner middleware) has run, so the
+        # edge refetches the new content
+        await edge_cache.flush()
+    return response
+
 # ==================== PUBLIC ROUTES ====================
 
 @api_router.get("/")
 async def root():
     return {"message": "Calius Digital API", "version": "2.0.0"}
 
+# Warm-up (hit by uptime pings / after deploys so the first real visitor
+# doesn't pay for the Mongo handshake and the SPA shell read). deep=true
+# also imports the SDKs and needs an admin token.
+@api_router.get("/warmup")
+async def warmup(deep: bool = False, credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)):
+    if deep:
+        if credentials is None:
+            raise HTTPException(status_code=401, detail="Not authenticated")
+        await require_admin(await get_current_user(credentials))
+    timings = {}
+    status = "warm"
+    start = time.perf_counter()
+    try:
+        await db.command("ping")
+        timings["mongo_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    except Exception as e:
+        # the driver error names hosts; it goes to the log, not the response
+        logger.warning(f"Warm-up Mongo ping failed: {str(e)}")
+        status = "degraded"
+
+    step = time.perf_counter()
+    _load_index_html()
+    timings["index_html_ms"] = round((time.perf_counter() - step) * 1000, 1)
+
+    if deep:
+        # Import the SDKs that are otherwise loaded on first use
+        step = time.perf_counter()
+        get_pwd_context()
+        get_cloudinary()
+        get_resend()
+        from jose import jwt  # noqa: F401
+        timings["sdk_imports_ms"] = round((time.perf_counter() - step) * 1000, 1)
+
+    timings["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return {"status": status, "timings": timings}
+
 # Services (Public)
-@api_router.get("/services")
+@api_router.get("/services", response_class=FastJSONResponse)
 async def get_services():
+    cached = catalog_cache.get(("services",))
+    if cached is not None:
+        return FastJSONResponse(cached)
     services = await db.services.find({}, {"_id": 0}).sort("order", 1).to_list(100)
     if not services:
-        # Seed default services to database
-        defaults = get_default_services()
-        for s in defaults:
-            # Check if already exists before inserting
-            existing = await db.services.find_one({"id": s["id"]})
-            if not existing:
-                s["created_at"] = datetime.now(timezone.utc).isoformat()
-                await db.services.insert_one(s)
-        return defaults
-    return services
+        # Not bootstrapped yet: serve the defaults without writing
+        return catalog_cache.respond(("services",), get_default_services())
+    return catalog_cache.respond(("services",), services)
 
 # Admin endpoint to reset services (cleanup duplicates)
 @api_router.post("/admin/services/reset")
 async def reset_services(user: dict = Depends(require_admin)):
     # Delete all services and re-seed with defaults
     await db.services.delete_many({})
-    defaults = get_default_services()
-    for s in defaults:
-        s["created_at"] = datetime.now(timezone.utc).isoformat()
-        await db.services.insert_one(s)
+    now = datetime.now(timezone.utc).isoformat()
+    defaults = [{**thaw(s), "created_at": now} for s in get_default_services()]
+    await db.services.insert_many(defaults)
+    catalog_cache.invalidate("services")
     return {"success": True, "message": f"Reset {len(defaults)} services"}
 
-@api_router.get("/services/{slug}")
+# Admin endpoint to create indexes and seed defaults
+@api_router.post("/admin/bootstrap")
+async def run_bootstrap(user: dict = Depends(require_admin)):
+    report = await bootstrap_database()
+    return {"success": not report["errors"], **report}
+
+@api_router.get("/services/{slug}", response_class=FastJSONResponse)
 async def get_service(slug: str):
     service = await db.services.find_one({"slug": slug}, {"_id": 0})
     if not service:
-        defaults = get_default_services()
-        for s in defaults:
-            if s["slug"] == slug:
-                return s
-        raise HTTPException(status_code=404, detail="Service not found")
-    return service
+        service = _DEFAULT_SERVICES.by_slug.get(slug)
+        if service is None:
+            raise HTTPException(status_code=404, detail="Service not found")
+    return FastJSONResponse(service)
 
 # Templates (Public)
-@api_router.get("/templates")
-async def get_templates(category: Optional[str] = None):
-    query = {}
-    if category and category != "all":
-        query["category"] = category
-    templates = await db.templates.find(query, {"_id": 0}).to_list(100)
+@api_router.get("/templates", response_class=FastJSONResponse)
+async def get_templates(category: Optional[str] = None, sort: Optional[str] = None):
+    category = category or "all"
+    sort = "popular" if sort == "popular" else ""
+    cache_key = ("templates", category, sort)
+    cached = catalog_cache.get(cache_key)
+    if cached is not None:
+        return FastJSONResponse(cached)
+    templates = await list_templates(category, sort)
+    # only categories that exist get a cache entry, so made-up ?category=
+    # values can't fill the cache
+    known = bool(templates) or category == "all" or category in _DEFAULT_TEMPLATES.by_category
     if not templates:
-        defaults = get_default_templates()
-        if not category or category == "all":
-            return defaults
-        return [t for t in defaults if t.get("category") == category]
-    return templates
+        if category == "all":
+            defaults = get_default_templates()
+        else:
+            defaults = _DEFAULT_TEMPLATES.by_category.get(category, ())
+        if sort == "popular":
+            defaults = sorted(defaults, key=lambda t: t.get("downloads") or 0, reverse=True)
+        return catalog_cache.respond(cache_key, defaults, store=known)
+    return catalog_cache.respond(cache_key, templates, store=known)
 
-@api_router.get("/templates/{slug}")
+@api_router.get("/templates/{slug}", response_class=FastJSONResponse)
 async def get_template(slug: str):
-    template = await db.templates.find_one({"slug": slug}, {"_id": 0})
-    if not template:
-        defaults = get_default_templates()
-        for t in defaults:
-            if t["slug"] == slug:
-                return t
+    template = await find_template(slug)
+    if template is None:
         raise HTTPException(status_code=404, detail="Template not found")
-    return template
+    return FastJSONResponse(template)
 
 # Portfolio (Public)
-@api_router.get("/portfolio")
+@api_router.get("/portfolio", response_class=FastJSONResponse)
 async def get_portfolio(category: Optional[str] = None):
+    category = category or "all"
+    cache_key = ("portfolio", category)
+    cached = catalog_cache.get(cache_key)
+    if cached is not None:
+        return FastJSONResponse(cached)
     query = {}
-    if category and category != "all":
+    if category != "all":
         query["category"] = category
     portfolio = await db.portfolio.find(query, {"_id": 0}).to_list(100)
+    known = bool(portfolio) or category == "all" or category in _DEFAULT_PORTFOLIO.by_category
     if not portfolio:
-        return get_default_portfolio()
-    return portfolio
+        return catalog_cache.respond(cache_key, get_default_portfolio(), store=known)
+    return catalog_cache.respond(cache_key, portfolio, store=known)
 
 # Testimonials (Public)
-@api_router.get("/testimonials")
+@api_router.get("/testimonials", response_class=FastJSONResponse)
 async def get_testimonials():
+    cached = catalog_cache.get(("testimonials",))
+    if cached is not None:
+        return FastJSONResponse(cached)
     testimonials = await db.testimonials.find({}, {"_id": 0}).to_list(100)
     if not testimonials:
-        return get_default_testimonials()
-    return testimonials
+        return catalog_cache.respond(("testimonials",), get_default_testimonials())
+    return catalog_cache.respond(("testimonials",), testimonials)
 
 # Blog (Public)
-@api_router.get("/blog")
-async def get_blog_posts(category: Optional[str] = None, limit: int = 10):
+BLOG_MAX_LIMIT = 100
+
+@api_router.get("/blog", response_class=FastJSONResponse)
+async def get_blog_posts(category: Optional[str] = None, limit: int = 10, sort: Optional[str] = None):
+    category = category or "all"
+    limit = max(1, min(limit, BLOG_MAX_LIMIT))
+    sort = "popular" if sort == "popular" else ""
+    cache_key = ("blog", category, limit, sort)
+    cached = catalog_cache.get(cache_key)
+    if cached is not None:
+        return FastJSONResponse(cached)
     query = {}
-    if category and category != "all":
+    if category != "all":
         query["category"] = category
-    posts = await db.blog.find(query, {"_id": 0}).sort("published_at", -1).to_list(limit)
+    # sort=popular reads the write-behind views counter through its index
+    sort_field = "views" if sort == "popular" else "published_at"
+    posts = await db.blog.find(query, {"_id": 0}).sort(sort_field, -1).to_list(limit)
+    known = bool(posts) or category == "all" or category in _DEFAULT_BLOG_POSTS.by_category
     if not posts:
-        return get_default_blog_posts()
-    return posts
+        return catalog_cache.respond(cache_key, get_default_blog_posts(), store=known)
+    return catalog_cache.respond(cache_key, posts, store=known)
 
-@api_router.get("/blog/{slug}")
+@api_router.get("/blog/{slug}", response_class=FastJSONResponse)
 async def get_blog_post(slug: str):
-    post = await db.blog.find_one({"slug": slug}, {"_id": 0})
-    if not post:
-        defaults = get_default_blog_posts()
-        for p in defaults:
-            if p["slug"] == slug:
-                return p
+    post = await find_blog_post(slug)
+    if post is None:
         raise HTTPException(status_code=404, detail="Blog post not found")
-    return post
+    return FastJSONResponse(post)
+
+# View / download counters (Public). Accepts {"events": [{"kind", "slug"}]};
+# the body is parsed by hand so navigator.sendBeacon can post it as
+# text/plain without a CORS preflight.
+@api_router.post("/track", status_code=202, dependencies=[Depends(rate_limit("track"))])
+async def track_counters(request: Request):
+    try:
+        payload = json.loads(await request.body() or b"{}")
+        events = payload.get("events") or [payload]
+    except (ValueError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    accepted = 0
+    for event in events[:COUNTER_MAX_EVENTS]:
+        if not isinstance(event, dict):
+            continue
+        kind, slug = event.get("kind"), event.get("slug")
+        if kind in COUNTER_KINDS and isinstance(slug, str) and COUNTER_SLUG_PATTERN.match(slug):
+            accepted += counters.add(kind, slug)
+    if counters.full() or (IS_SERVERLESS and counters.due()):
+        await counters.flush()
+    return {"accepted": accepted}
+
+# Page-view analytics beacon (Public). {"events": [{"path", "referrer"}]},
+# text/plain like /track so sendBeacon needs no preflight.
+@api_router.post("/analytics/events", status_code=202, dependencies=[Depends(rate_limit("analytics"))])
+async def ingest_analytics(request: Request):
+    try:
+        payload = json.loads(await request.body() or b"{}")
+        events = payload.get("events") or []
+    except (ValueError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    now = datetime.now(timezone.utc)
+    country = request.headers.get("x-vercel-ip-country")
+    accepted = 0
+    for event in events[:ANALYTICS_MAX_EVENTS]:
+        if not isinstance(event, dict):
+            continue
+        path = _normalize_path(event.get("path"))
+        if path is None:
+            continue
+        analytics.add(path, _referrer_host(event.get("referrer")), country, now)
+        accepted += 1
+    if IS_SERVERLESS and analytics.due():
+        await analytics.flush()
+    return {"accepted": accepted}
 
 # Pricing (Public)
-@api_router.get("/pricing")
+@api_router.get("/pricing", response_class=FastJSONResponse)
 async def get_pricing():
+    cached = catalog_cache.get(("pricing",))
+    if cached is not None:
+        return FastJSONResponse(cached)
     packages = await db.pricing.find({}, {"_id": 0}).sort("order", 1).to_list(100)
     if not packages:
-        return get_default_pricing()
-    return packages
+        return catalog_cache.respond(("pricing",), get_default_pricing())
+    return catalog_cache.respond(("pricing",), packages)
+
+# Homepage bootstrap (Public)
+# One request for everything the homepage renders, instead of one serverless
+# invocation per collection. Only the fields the homepage cards use are
+# projected; the full documents stay behind the per-collection routes.
+BOOTSTRAP_FIELDS = {
+    "services": ("id", "slug", "name_id", "name_en", "description_id", "description_en", "icon", "price_start"),
+    "templates": (
+        "id", "slug", "name", "category", "image", "description_id", "description_en", "price", "sale_price",
+        "rating", "downloads", "is_featured", "is_new", "is_bestseller",
+    ),
+    "portfolio": ("id", "title", "client", "category", "image", "url", "is_featured"),
+    "testimonials": ("id", "name", "role", "company", "content_id", "content_en", "rating"),
+    "blog": ("id", "slug", "title_id", "title_en", "excerpt_id", "excerpt_en", "image", "category", "published_at"),
+}
+BOOTSTRAP_LIMIT = 4
+catalog_cache.link("bootstrap", "services", "templates", "portfolio", "testimonials", "blog", "pricing", "settings")
+
+
+def _lean(docs, fields: tuple, limit: int, predicate=None) -> list:
+    rows = [d for d in docs if predicate is None or predicate(d)][:limit]
+    return [{k: d[k] for k in fields if k in d} for d in rows]
+
+
+async def _bootstrap_section(collection: str, defaults: tuple, query: dict = None, sort: str = None,
+                             direction: int = 1, featured: bool = False) -> list:
+    fields = BOOTSTRAP_FIELDS[collection]
+    query = dict(query or {})
+    if featured:
+        query["is_featured"] = True
+    cursor = db[collection].find(query, {"_id": 0, **{k: 1 for k in fields}})
+    if sort:
+        cursor = cursor.sort(sort, direction)
+    docs = await cursor.to_list(BOOTSTRAP_LIMIT)
+    if docs:
+        return docs
+    # Same rule as the list routes: an empty collection serves the defaults,
+    # but a collection that merely has no featured rows serves nothing
+    if featured and await db[collection].find_one({}, {"_id": 1}):
+        return []
+    return _lean(defaults, fields, BOOTSTRAP_LIMIT, (lambda d: d.get("is_featured")) if featured else None)
+
+
+@api_router.get("/bootstrap", response_class=FastJSONResponse)
+async def get_bootstrap(request: Request):
+    body = catalog_cache.get(("bootstrap",))
+    if body is None:
+        (settings_body, settings_version), services, templates, portfolio, testimonials, blog, pricing = await asyncio.gather(
+            settings_cache.get(),
+            _bootstrap_section("services", get_default_services(), sort="order"),
+            _bootstrap_section("templates", get_default_templates(), featured=True),
+            _bootstrap_section("portfolio", get_default_portfolio(), featured=True),
+            _bootstrap_section("testimonials", get_default_testimonials()),
+            _bootstrap_section("blog", get_default_blog_posts(), sort="published_at", direction=-1),
+            db.pricing.find({}, {"_id": 0}).sort("order", 1).to_list(100),
+        )
+        body = catalog_cache.respond(("bootstrap",), {
+            "settings": json.loads(settings_body),
+            "settings_version": settings_version,
+            "services": services,
+            "templates": templates,
+            "portfolio": portfolio,
+            "testimonials": testimonials,
+            "blog": blog,
+            "pricing": pricing or get_default_pricing(),
+        }).body
+    return etag_response(request, body)
+
+# Static snapshot bundle (Public): what publish_snapshots.py writes at build
+# time. "publisher" tells the build whether this API republishes on writes.
+# Always built fresh and never cached: the deploy hook fires right after an
+# admin write, and a cached bundle would deploy the content from before it.
+@api_router.get("/snapshots", response_class=FastJSONResponse)
+async def get_snapshot_bundle():
+    bundle = {**await build_snapshots(), "publisher": snapshots.publisher.name}
+    return FastJSONResponse(bundle, headers={"Cache-Control": "no-store"})
 
 # Contact (Public)
-@api_router.post("/contact")
+@api_router.post("/contact", dependencies=[Depends(rate_limit("contact"))])
 async def submit_contact(request: ContactRequest):
     contact_data = {
         "id": str(uuid.uuid4()),
@@ -494,7 +2700,7 @@ async def register(user: UserCreate, current_user: dict = Depends(require_admin)
     await db.users.insert_one(user_data)
     return {"success": True, "message": "User created successfully"}
 
-@api_router.post("/auth/login")
+@api_router.post("/auth/login", dependencies=[Depends(rate_limit("login"))])
 async def login(credentials: UserLogin):
     user = await db.users.find_one({"username": credentials.username})
     if not user or not verify_password(credentials.password, user["password"]):
@@ -556,16 +2762,40 @@ async def get_stats(user: dict = Depends(require_editor)):
     
     contacts_count = await db.contacts.count_documents({})
     unread_contacts = await db.contacts.count_documents({"is_read": False})
-    orders_count = await db.transactions.count_documents({})
-    successful_orders = await db.transactions.count_documents({"status": "success"})
-    
-    # Calculate revenue
-    pipeline = [
-        {"$match": {"status": "success"}},
-        {"$group": {"_id": None, "total": {"$sum": "$gross_amount"}}}
-    ]
-    revenue_result = await db.transactions.aggregate(pipeline).to_list(1)
-    total_revenue = revenue_result[0]["total"] if revenue_result else 0
+    # Orders and revenue from the daily rollups once they've been built;
+    # before that, fall back to scanning transactions
+    if await db.stats_meta.find_one({"_id": "revenue_daily"}, {"_id": 1}):
+        totals = await db.revenue_daily.aggregate([
+            {"$group": {
+                "_id": None,
+                "orders": {"$sum": "$orders"},
+                "success": {"$sum": "$status.success"},
+                "revenue": {"$sum": "$revenue"},
+            }}
+        ]).to_list(1)
+        totals = totals[0] if totals else {}
+        orders_count = totals.get("orders", 0)
+        successful_orders = totals.get("success", 0)
+        total_revenue = totals.get("revenue", 0)
+    else:
+        orders_count = await db.transactions.count_documents({"status": {"$ne": "creating"}})
+        successful_orders = await db.transactions.count_documents({"status": "success"})
+        
+        # Calculate revenue
+        pipeline = [
+            {"$match": {"status": "success"}},
+            {"$group": {"_id": None, "total": {"$sum": "$gross_amount"}}}
+        ]
+        revenue_result = await db.transactions.aggregate(pipeline).to_list(1)
+        total_revenue = revenue_result[0]["total"] if revenue_result else 0
+
+    # Traffic from the daily analytics rollups (seven small docs per path)
+    week_start = (datetime.now(timezone.utc) - timedelta(days=6)).strftime("%Y-%m-%d")
+    views_result = await db.analytics_rollups.aggregate([
+        {"$match": {"g": "day", "bucket": {"$gte": week_start}}},
+        {"$group": {"_id": None, "total": {"$sum": "$count"}}},
+    ]).to_list(1)
+    page_views_7d = views_result[0]["total"] if views_result else 0
     
     return {
         "templates": templates_count,
@@ -575,7 +2805,115 @@ async def get_stats(user: dict = Depends(require_editor)):
         "unread_contacts": unread_contacts,
         "orders": orders_count,
         "successful_orders": successful_orders,
-        "total_revenue": total_revenue
+        "total_revenue": total_revenue,
+        "page_views_7d": page_views_7d
+    }
+
+# Revenue time series (reads revenue_daily, one doc per day)
+def _period_key(day: str, granularity: str) -> str:
+    if granularity == "month":
+        return day[:7]
+    if granularity == "week":
+        year, week, _ = datetime.strptime(day, "%Y-%m-%d").isocalendar()
+        return f"{year}-W{week:02d}"
+    return day
+
+@api_router.get("/admin/stats/timeseries")
+async def get_stats_timeseries(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    granularity: str = Query("day", pattern="^(day|week|month)$"),
+    user: dict = Depends(require_editor),
+):
+    try:
+        last = datetime.strptime(end or stats_day(datetime.now(timezone.utc)), "%Y-%m-%d")
+        first = datetime.strptime(start, "%Y-%m-%d") if start else last - timedelta(days=29)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start and end must be YYYY-MM-DD")
+    if first > last or (last - first).days > 3660:
+        raise HTTPException(status_code=400, detail="Invalid date range")
+    # revenue_daily _ids are zero-padded, so compare against the normalized
+    # form (strptime also accepts "2026-1-5")
+    start, end = first.strftime("%Y-%m-%d"), last.strftime("%Y-%m-%d")
+    docs = await db.revenue_daily.find({"_id": {"$gte": start, "$lte": end}}).to_list(None)
+    by_day = {doc["_id"]: doc for doc in docs}
+
+    periods: Dict[str, dict] = {}
+    day = first
+    while day <= last:
+        key = day.strftime("%Y-%m-%d")
+        period = periods.setdefault(_period_key(key, granularity), {
+            "period": _period_key(key, granularity), "orders": 0, "revenue": 0, "status": {}, "payment_type": {},
+        })
+        doc = by_day.get(key)
+        if doc:
+            period["orders"] += doc.get("orders", 0)
+            period["revenue"] += doc.get("revenue", 0)
+            for status, n in (doc.get("status") or {}).items():
+                period["status"][status] = period["status"].get(status, 0) + n
+            for pt, row in (doc.get("payment_type") or {}).items():
+                agg = period["payment_type"].setdefault(pt, {"count": 0, "revenue": 0})
+                agg["count"] += row.get("count", 0)
+                agg["revenue"] += row.get("revenue", 0)
+        day += timedelta(days=1)
+
+    series = list(periods.values())
+    return {
+        "start": start,
+        "end": end,
+        "granularity": granularity,
+        "totals": {
+            "orders": sum(p["orders"] for p in series),
+            "revenue": sum(p["revenue"] for p in series),
+        },
+        "series": series,
+    }
+
+@api_router.post("/admin/stats/rollups/rebuild")
+async def rebuild_stats_rollups(user: dict = Depends(require_admin)):
+    return {"success": True, **await rebuild_revenue_rollups()}
+
+# Page-view analytics (reads the rollups, never raw events)
+@api_router.get("/admin/analytics")
+async def get_analytics(
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    days: int = Query(30, ge=1, le=366),
+    path: Optional[str] = None,
+    user: dict = Depends(require_editor),
+):
+    now = datetime.now(timezone.utc)
+    start = now - timedelta(days=days - 1)
+    if granularity == "hour":
+        bucket_range = {"$gte": start.strftime("%Y-%m-%dT00"), "$lte": now.strftime("%Y-%m-%dT%H")}
+    else:
+        bucket_range = {"$gte": start.strftime("%Y-%m-%d"), "$lte": now.strftime("%Y-%m-%d")}
+    match = {"g": granularity, "bucket": bucket_range}
+    if path:
+        match["path"] = path
+
+    def top(field: str, limit: int):
+        return db.analytics_rollups.aggregate([
+            {"$match": match},
+            {"$group": {"_id": f"${field}", "count": {"$sum": "$count"}}},
+            {"$sort": {"count": -1}},
+            {"$limit": limit},
+        ]).to_list(limit)
+
+    series, paths, referrers = await asyncio.gather(
+        db.analytics_rollups.aggregate([
+            {"$match": match},
+            {"$group": {"_id": "$bucket", "count": {"$sum": "$count"}}},
+            {"$sort": {"_id": 1}},
+        ]).to_list(None),
+        top("path", 20),
+        top("referrer", 20),
+    )
+    return {
+        "granularity": granularity,
+        "total": sum(row["count"] for row in series),
+        "series": [{"bucket": row["_id"], "count": row["count"]} for row in series],
+        "top_paths": [{"path": row["_id"], "count": row["count"]} for row in paths],
+        "top_referrers": [{"referrer": row["_id"], "count": row["count"]} for row in referrers],
     }
 
 # Users Management (Admin only)
@@ -613,22 +2951,26 @@ async def create_template(data: TemplateCreate, user: dict = Depends(require_edi
     template_data["rating"] = 5.0
     template_data["created_at"] = datetime.now(timezone.utc).isoformat()
     await db.templates.insert_one(template_data)
+    catalog_cache.invalidate("templates", template_data["slug"])
     return {"success": True, "id": template_data["id"]}
 
 @api_router.put("/admin/templates/{template_id}")
 async def update_template(template_id: str, data: TemplateCreate, user: dict = Depends(require_editor)):
     update_data = data.model_dump()
     update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
-    result = await db.templates.update_one({"id": template_id}, {"$set": update_data})
-    if result.modified_count == 0:
+    # the pre-update document tells us the old slug, which also needs purging
+    previous = await db.templates.find_one_and_update({"id": template_id}, {"$set": update_data}, projection={"slug": 1})
+    if previous is None:
         raise HTTPException(status_code=404, detail="Template not found")
+    catalog_cache.invalidate("templates", previous.get("slug"), update_data["slug"])
     return {"success": True}
 
 @api_router.delete("/admin/templates/{template_id}")
 async def delete_template(template_id: str, user: dict = Depends(require_editor)):
-    result = await db.templates.delete_one({"id": template_id})
-    if result.deleted_count == 0:
+    deleted = await db.templates.find_one_and_delete({"id": template_id}, projection={"slug": 1})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Template not found")
+    catalog_cache.invalidate("templates", deleted.get("slug"))
     return {"success": True}
 
 @api_router.post("/admin/seed-free-templates")
@@ -639,11 +2981,12 @@ async def seed_free_templates(user: dict = Depends(require_editor)):
     for t in free_defaults:
         existing = await db.templates.find_one({"slug": t["slug"]})
         if not existing:
-            template_data = {**t, "id": str(uuid.uuid4()), "created_at": datetime.now(timezone.utc).isoformat()}
+            template_data = {**thaw(t), "id": str(uuid.uuid4()), "created_at": datetime.now(timezone.utc).isoformat()}
             await db.templates.insert_one(template_data)
             seeded.append(t["slug"])
         else:
             skipped.append(t["slug"])
+    catalog_cache.invalidate("templates")
     return {"seeded": seeded, "skipped": skipped, "message": f"Seeded {len(seeded)} templates, skipped {len(skipped)} (already exist)"}
 
 # Services Management
@@ -653,6 +2996,7 @@ async def create_service(data: ServiceModel, user: dict = Depends(require_editor
     service_data["id"] = str(uuid.uuid4())
     service_data["created_at"] = datetime.now(timezone.utc).isoformat()
     await db.services.insert_one(service_data)
+    catalog_cache.invalidate("services")
     return {"success": True, "id": service_data["id"]}
 
 @api_router.put("/admin/services/{service_id}")
@@ -666,19 +3010,18 @@ async def update_service(service_id: str, data: ServiceModel, user: dict = Depen
         {"$set": update_data},
         upsert=True
     )
+    catalog_cache.invalidate("services")
     return {"success": True}
 
 @api_router.delete("/admin/services/{service_id}")
 async def delete_service(service_id: str, user: dict = Depends(require_editor)):
-    # First ensure services are in database
-    services = await db.services.find({}, {"_id": 0}).to_list(100)
-    if not services:
-        defaults = get_default_services()
-        for s in defaults:
-            s["created_at"] = datetime.now(timezone.utc).isoformat()
-            await db.services.insert_one(s)
-    
     result = await db.services.delete_one({"id": service_id})
+    if result.deleted_count == 0 and not await db.services.count_documents({}, limit=1):
+        # The admin list shows the built-in defaults until the collection is
+        # seeded; seed them (idempotently) so the delete has a row to remove
+        await seed_default_services()
+        result = await db.services.delete_one({"id": service_id})
+    catalog_cache.invalidate("services")
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Service not found")
     return {"success": True}
@@ -690,6 +3033,7 @@ async def create_portfolio(data: PortfolioCreate, user: dict = Depends(require_e
     portfolio_data["id"] = str(uuid.uuid4())
     portfolio_data["created_at"] = datetime.now(timezone.utc).isoformat()
     await db.portfolio.insert_one(portfolio_data)
+    catalog_cache.invalidate("portfolio")
     return {"success": True, "id": portfolio_data["id"]}
 
 @api_router.put("/admin/portfolio/{portfolio_id}")
@@ -697,6 +3041,7 @@ async def update_portfolio(portfolio_id: str, data: PortfolioCreate, user: dict
     update_data = data.model_dump()
     update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
     result = await db.portfolio.update_one({"id": portfolio_id}, {"$set": update_data})
+    catalog_cache.invalidate("portfolio")
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Portfolio not found")
     return {"success": True}
@@ -704,6 +3049,7 @@ async def update_portfolio(portfolio_id: str, data: PortfolioCreate, user: dict
 @api_router.delete("/admin/portfolio/{portfolio_id}")
 async def delete_portfolio(portfolio_id: str, user: dict = Depends(require_editor)):
     result = await db.portfolio.delete_one({"id": portfolio_id})
+    catalog_cache.invalidate("portfolio")
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Portfolio not found")
     return {"success": True}
@@ -716,22 +3062,26 @@ async def create_blog(data: BlogCreate, user: dict = Depends(require_editor)):
     blog_data["published_at"] = datetime.now(timezone.utc).strftime("%Y-%m-%d")
     blog_data["created_at"] = datetime.now(timezone.utc).isoformat()
     await db.blog.insert_one(blog_data)
+    catalog_cache.invalidate("blog", blog_data["slug"])
     return {"success": True, "id": blog_data["id"]}
 
 @api_router.put("/admin/blog/{blog_id}")
 async def update_blog(blog_id: str, data: BlogCreate, user: dict = Depends(require_editor)):
     update_data = data.model_dump()
     update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
-    result = await db.blog.update_one({"id": blog_id}, {"$set": update_data})
-    if result.modified_count == 0:
+    # the pre-update document tells us the old slug, which also needs purging
+    previous = await db.blog.find_one_and_update({"id": blog_id}, {"$set": update_data}, projection={"slug": 1})
+    if previous is None:
         raise HTTPException(status_code=404, detail="Blog post not found")
+    catalog_cache.invalidate("blog", previous.get("slug"), update_data["slug"])
     return {"success": True}
 
 @api_router.delete("/admin/blog/{blog_id}")
 async def delete_blog(blog_id: str, user: dict = Depends(require_editor)):
-    result = await db.blog.delete_one({"id": blog_id})
-    if result.deleted_count == 0:
+    deleted = await db.blog.find_one_and_delete({"id": blog_id}, projection={"slug": 1})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Blog post not found")
+    catalog_cache.invalidate("blog", deleted.get("slug"))
     return {"success": True}
 
 # Testimonials Management
@@ -741,12 +3091,14 @@ async def create_testimonial(data: TestimonialCreate, user: dict = Depends(requi
     testimonial_data["id"] = str(uuid.uuid4())
     testimonial_data["created_at"] = datetime.now(timezone.utc).isoformat()
     await db.testimonials.insert_one(testimonial_data)
+    catalog_cache.invalidate("testimonials")
     return {"success": True, "id": testimonial_data["id"]}
 
 @api_router.put("/admin/testimonials/{testimonial_id}")
 async def update_testimonial(testimonial_id: str, data: TestimonialCreate, user: dict = Depends(require_editor)):
     update_data = data.model_dump()
     result = await db.testimonials.update_one({"id": testimonial_id}, {"$set": update_data})
+    catalog_cache.invalidate("testimonials")
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Testimonial not found")
     return {"success": True}
@@ -754,6 +3106,7 @@ async def update_testimonial(testimonial_id: str, data: TestimonialCreate, user:
 @api_router.delete("/admin/testimonials/{testimonial_id}")
 async def delete_testimonial(testimonial_id: str, user: dict = Depends(require_editor)):
     result = await db.testimonials.delete_one({"id": testimonial_id})
+    catalog_cache.invalidate("testimonials")
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Testimonial not found")
     return {"success": True}
@@ -764,12 +3117,14 @@ async def create_pricing(data: PricingCreate, user: dict = Depends(require_admin
     pricing_data = data.model_dump()
     pricing_data["id"] = str(uuid.uuid4())
     await db.pricing.insert_one(pricing_data)
+    catalog_cache.invalidate("pricing")
     return {"success": True, "id": pricing_data["id"]}
 
 @api_router.put("/admin/pricing/{pricing_id}")
 async def update_pricing(pricing_id: str, data: PricingCreate, user: dict = Depends(require_admin)):
     update_data = data.model_dump()
     result = await db.pricing.update_one({"id": pricing_id}, {"$set": update_data})
+    catalog_cache.invalidate("pricing")
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Pricing package not found")
     return {"success": True}
@@ -777,6 +3132,7 @@ async def update_pricing(pricing_id: str, data: PricingCreate, user: dict = Depe
 @api_router.delete("/admin/pricing/{pricing_id}")
 async def delete_pricing(pricing_id: str, user: dict = Depends(require_admin)):
     result = await db.pricing.delete_one({"id": pricing_id})
+    catalog_cache.invalidate("pricing")
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Pricing package not found")
     return {"success": True}
@@ -814,8 +3170,121 @@ async def get_order(order_id: str, user: dict = Depends(require_editor)):
         raise HTTPException(status_code=404, detail="Order not found")
     return order
 
+# Prometheus metrics
+@api_router.get("/admin/metrics", response_class=PlainTextResponse)
+async def get_metrics(user: dict = Depends(require_admin)):
+    pool = pool_metrics.snapshot()
+    body = metrics.render({
+        "calius_mongo_pool_checkouts_total": ("counter", pool["checkouts"]),
+        "calius_mongo_pool_checkout_failures_total": ("counter", pool["checkout_failures"]),
+        "calius_mongo_pool_wait_seconds_total": ("counter", pool["wait_ms_total"] / 1000),
+        "calius_mongo_pool_wait_seconds_max": ("gauge", pool["wait_ms_max"] / 1000),
+        "calius_mongo_pool_in_use": ("gauge", pool["in_use"]),
+        "calius_mongo_pool_connections_open": ("gauge", pool["connections_open"]),
+        "calius_counter_pending_slugs": ("gauge", len(counters.pending)),
+        "calius_counter_documents_flushed_total": ("counter", counters.flushed_total),
+        "calius_counter_increments_dropped_total": ("counter", counters.dropped),
+        "calius_analytics_events_ingested_total": ("counter", analytics.ingested_total),
+        "calius_analytics_events_dropped_total": ("counter", analytics.dropped),
+        "calius_analytics_rollups_folded_total": ("counter", analytics.folded),
+        "calius_analytics_buffered_events": ("gauge", len(analytics.events)),
+        "calius_license_codes_indexed": ("gauge", license_api.license_codes_index.size),
+        "calius_license_log_buffered": ("gauge", len(license_api.license_logs.entries)),
+        "calius_license_log_dropped_total": ("counter", license_api.license_logs.dropped),
+    })
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Edge cache purges
+class PurgeRequest(BaseModel):
+    keys: List[str]
+
+@api_router.get("/admin/cache/purges")
+async def get_edge_purges(user: dict = Depends(require_admin)):
+    return {
+        "enabled": EDGE_CACHE_ENABLED,
+        "purger": edge_cache.purger.name,
+        "pending": sorted(edge_cache.pending),
+        "history": edge_cache.purger.history,
+    }
+
+@api_router.post("/admin/cache/purge")
+async def purge_edge_cache(data: PurgeRequest, user: dict = Depends(require_admin)):
+    edge_cache.pending.update(data.keys)
+    await edge_cache.flush()
+    return {"success": True, "keys": sorted(data.keys)}
+
+# Write-behind counters
+@api_router.post("/admin/counters/flush")
+async def flush_counters(user: dict = Depends(require_admin)):
+    pending = len(counters.pending)
+    return {"success": True, "pending": pending, "documents_updated": await counters.flush()}
+
+@api_router.post("/admin/analytics/flush")
+async def flush_analytics(user: dict = Depends(require_admin)):
+    return {"success": True, "events_written": await analytics.flush()}
+
+# License code index: reload after importing a generator batch into
+# license_codes (this instance only; the others within LICENSE_CODE_INDEX_TTL)
+@api_router.post("/admin/license/reload-index")
+async def reload_license_index(user: dict = Depends(require_admin)):
+    try:
+        count = await license_api.license_codes_index.reload()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"License code index not loaded: {str(e)}")
+    license_api.license_check_cache.clear()
+    return {"success": True, "codes": count}
+
+# Installer downloads: hash new or changed files in DOWNLOADS_DIR
+@api_router.post("/admin/downloads/publish")
+async def publish_downloads(user: dict = Depends(require_admin)):
+    if not DOWNLOADS_DIR.is_dir():
+        raise HTTPException(status_code=400, detail=f"{DOWNLOADS_DIR} does not exist")
+    return {"success": True, "files": await asyncio.to_thread(download_catalog.publish)}
+
+# Static snapshots
+@api_router.get("/admin/snapshots")
+async def get_snapshot_status(user: dict = Depends(require_admin)):
+    return {
+        "publisher": snapshots.publisher.name,
+        "dirty": sorted(snapshots.dirty),
+        "last": snapshots.last,
+    }
+
+@api_router.post("/admin/snapshots/publish")
+async def publish_snapshots(user: dict = Depends(require_admin)):
+    try:
+        return {"success": True, **await snapshots.publish()}
+    except Exception as e:
+        logger.error(f"Snapshot publish failed: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"Snapshot publish failed: {str(e)}")
+
+# Slow query profiler report
+@api_router.get("/admin/profiler/slow-queries")
+async def get_slow_queries(user: dict = Depends(require_admin)):
+    return slow_query_profiler.report()
+
+@api_router.delete("/admin/profiler/slow-queries")
+async def reset_slow_queries(user: dict = Depends(require_admin)):
+    slow_query_profiler.reset()
+    return {"success": True}
+
+# Database connection pool
+@api_router.get("/admin/db/pool")
+async def get_db_pool_stats(user: dict = Depends(require_admin)):
+    return {
+        "config": {
+            "serverless": IS_SERVERLESS,
+            "reuse_client": MONGO_REUSE_CLIENT,
+            "max_pool_size": MONGO_MAX_POOL_SIZE,
+            "min_pool_size": MONGO_MIN_POOL_SIZE,
+            "max_idle_time_ms": MONGO_MAX_IDLE_TIME_MS,
+            "server_selection_timeout_ms": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        },
+        "pool": pool_metrics.snapshot(),
+    }
+
 # Export Data
-@api_router.get("/admin/export/{data_type}")
+@api_router.get("/admin/export/{data_type}", response_class=FastJSONResponse)
 async def export_data(data_type: str, user: dict = Depends(require_admin)):
     if data_type == "contacts":
         data = await db.contacts.find({}, {"_id": 0}).to_list(1000)
@@ -830,7 +3299,7 @@ async def export_data(data_type: str, user: dict = Depends(require_admin)):
     else:
         raise HTTPException(status_code=400, detail="Invalid data type")
     
-    return {"data": data, "count": len(data), "exported_at": datetime.now(timezone.utc).isoformat()}
+    return FastJSONResponse({"data": data, "count": len(data), "exported_at": datetime.now(timezone.utc).isoformat()})
 
 # ==================== CLOUDINARY ROUTES ====================
 
@@ -853,7 +3322,7 @@ async def get_cloudinary_signature(
         "folder": folder,
     }
     
-    signature = cloudinary.utils.api_sign_request(params, os.environ.get("CLOUDINARY_API_SECRET"))
+    signature = get_cloudinary().utils.api_sign_request(params, os.environ.get("CLOUDINARY_API_SECRET"))
     
     return {
         "signature": signature,
@@ -867,7 +3336,7 @@ async def get_cloudinary_signature(
 @api_router.delete("/cloudinary/{public_id:path}")
 async def delete_cloudinary_image(public_id: str, user: dict = Depends(require_editor)):
     try:
-        result = cloudinary.uploader.destroy(public_id, invalidate=True)
+        result = get_cloudinary().uploader.destroy(public_id, invalidate=True)
         return {"success": True, "result": result}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -908,6 +3377,7 @@ async def upload_file(
         raise HTTPException(status_code=500, detail="Cloudinary not configured")
     
     # Re-configure cloudinary with stripped values
+    cloudinary = get_cloudinary()
     cloudinary.config(
         cloud_name=cloud_name,
         api_key=api_key,
@@ -948,57 +3418,637 @@ async def upload_file(
         logger.error(f"Upload error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
-# ==================== PAYMENT ROUTES ====================
+# ==================== REVENUE ROLLUPS ====================
+# One revenue_daily document per calendar day (STATS_UTC_OFFSET_HOURS, WIB by
+# default) for the orders created that day:
+#   {"_id": "2026-10-19", "orders": n, "revenue": sum of successful orders,
+#    "status": {"pending": n, "success": n, ...},
+#    "payment_type": {"gopay": {"count": n, "revenue": x}, ...}}
+# create_payment_token and every status change ($inc old -1 / new +1) keep it
+# current, so dashboards read one small document per day however long the
+# order history gets. rebuild_revenue_rollups() recomputes it from
+# transactions (first deployment, or after a manual data fix).
+
+STATS_UTC_OFFSET_HOURS = float(os.environ.get("STATS_UTC_OFFSET_HOURS", "7"))
+PAYMENT_STATUS_MAP = {
+    "settlement": "success",
+    "capture": "success",
+    "pending": "pending",
+    "deny": "failed",
+    "cancel": "cancelled",
+    "expire": "expired",
+}
+
+
+def stats_day(created_at: Any) -> Optional[str]:
+    """Rollup day key for a transaction's created_at (ISO string or datetime)."""
+    if isinstance(created_at, str):
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except ValueError:
+            return None
+    if not isinstance(created_at, datetime):
+        return None
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return (created_at.astimezone(timezone.utc) + timedelta(hours=STATS_UTC_OFFSET_HOURS)).strftime("%Y-%m-%d")
+
+
+def _rollup_field(value: Any) -> str:
+    # status / payment_type values become field names
+    return str(value or "unknown").replace(".", "_").replace("$", "_")
 
-@api_router.post("/payments/create-token")
-async def create_payment_token(request: PaymentRequest):
+
+def _status_change_inc(tx: dict, old_status: Optional[str], new_status: str, payment_type: Optional[str]) -> dict:
+    """$inc for revenue_daily when tx moves from old_status (None: new order) to new_status."""
+    inc: Dict[str, float] = {}
+    if old_status is None:
+        inc["orders"] = 1
+    else:
+        inc[f"status.{_rollup_field(old_status)}"] = -1
+    inc[f"status.{_rollup_field(new_status)}"] = inc.get(f"status.{_rollup_field(new_status)}", 0) + 1
+    amount = tx.get("gross_amount") or 0
+    was_paid, is_paid = old_status == "success", new_status == "success"
+    if is_paid != was_paid:
+        sign = 1 if is_paid else -1
+        pt = _rollup_field(payment_type or tx.get("payment_type"))
+        inc["revenue"] = sign * amount
+        inc[f"payment_type.{pt}.count"] = sign
+        inc[f"payment_type.{pt}.revenue"] = sign * amount
+    return {k: v for k, v in inc.items() if v}
+
+
+async def record_revenue_change(tx: dict, old_status: Optional[str], new_status: str,
+                                payment_type: Optional[str] = None) -> None:
+    day = stats_day(tx.get("created_at"))
+    inc = _status_change_inc(tx, old_status, new_status, payment_type)
+    if day is None or not inc:
+        return
     try:
-        import midtransclient
-        
-        if not MIDTRANS_SERVER_KEY:
-            raise HTTPException(status_code=500, detail="Midtrans not configured")
-        
-        snap = midtransclient.Snap(
-            is_production=MIDTRANS_IS_PRODUCTION,
-            server_key=MIDTRANS_SERVER_KEY,
-            client_key=MIDTRANS_CLIENT_KEY
+        await db.revenue_daily.update_one(
+            {"_id": day},
+            {"$inc": inc, "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}},
+            upsert=True,
         )
-        
-        payment_params = {
-            "transaction_details": {
-                "order_id": request.order_id,
-                "gross_amount": request.gross_amount
-            },
-            "customer_details": {
-                "email": request.customer_email,
-                "first_name": request.customer_name,
-                "phone": request.customer_phone or ""
-            },
-            "item_details": request.item_details,
-            "credit_card": {"secure": True}
-        }
-        
-        transaction = snap.create_transaction(payment_params)
-        
-        tx_record = {
-            "order_id": request.order_id,
-            "gross_amount": request.gross_amount,
-            "customer_email": request.customer_email,
-            "customer_name": request.customer_name,
-            "snap_token": transaction.get("token"),
-            "status": "pending",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "item_details": request.item_details
+    except Exception as e:
+        # The transaction write already happened; a rebuild fixes the rollup
+        logger.error(f"Revenue rollup update for {day} failed: {str(e)}")
+
+
+async def apply_payment_status(order_id: str, transaction_status: str, payment_type: Optional[str] = None,
+                               source: str = "webhook") -> tuple:
+    """Move a transaction to the app status for a Midtrans transaction_status.
+
+    Shared by the webhook and the reconciliation worker. Returns
+    (transaction before the update or None, new app status).
+    """
+    app_status = PAYMENT_STATUS_MAP.get(transaction_status, "unknown")
+    update = {
+        "status": app_status,
+        "transaction_status": transaction_status,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+        "status_source": source,
+    }
+    if payment_type:
+        update["payment_type"] = payment_type
+    previous = await db.transactions.find_one_and_update(
+        {"order_id": order_id},
+        {"$set": update},
+        projection={"_id": 0, "status": 1, "created_at": 1, "gross_amount": 1, "payment_type": 1},
+    )
+    if previous is not None and previous.get("status") != app_status:
+        # a "creating" claim was never counted in the rollups
+        old_status = None if previous.get("status") == "creating" else previous.get("status")
+        await record_revenue_change(previous, old_status, app_status, payment_type)
+    return previous, app_status
+
+
+async def rebuild_revenue_rollups() -> dict:
+    """Recompute revenue_daily from transactions in one streaming pass."""
+    days: Dict[str, dict] = {}
+    cursor = db.transactions.find({}, {"_id": 0, "created_at": 1, "status": 1, "gross_amount": 1, "payment_type": 1})
+    scanned = 0
+    async for tx in cursor:
+        scanned += 1
+        day = stats_day(tx.get("created_at"))
+        if day is None or tx.get("status") == "creating":
+            # checkout claims only count once their Snap token exists
+            continue
+        doc = days.setdefault(day, {"orders": 0, "revenue": 0, "status": {}, "payment_type": {}})
+        doc["orders"] += 1
+        status = _rollup_field(tx.get("status"))
+        doc["status"][status] = doc["status"].get(status, 0) + 1
+        if tx.get("status") == "success":
+            amount = tx.get("gross_amount") or 0
+            doc["revenue"] += amount
+            pt = doc["payment_type"].setdefault(_rollup_field(tx.get("payment_type")), {"count": 0, "revenue": 0})
+            pt["count"] += 1
+            pt["revenue"] += amount
+    now = datetime.now(timezone.utc).isoformat()
+    await db.revenue_daily.delete_many({"_id": {"$nin": list(days)}})
+    if days:
+        from pymongo import ReplaceOne
+        await db.revenue_daily.bulk_write(
+            [ReplaceOne({"_id": day}, {**doc, "updated_at": now}, upsert=True) for day, doc in days.items()],
+            ordered=False,
+        )
+    await db.stats_meta.update_one(
+        {"_id": "revenue_daily"}, {"$set": {"rebuilt_at": now, "transactions": scanned}}, upsert=True
+    )
+    return {"days": len(days), "transactions": scanned, "rebuilt_at": now}
+
+# ==================== PAYMENT RECONCILIATION ====================
+# Transactions stay "pending" forever if the Midtrans notification never
+# arrives. The reconciler picks pending orders older than
+# RECONCILE_AFTER_MINUTES (index on status + created_at), asks the Midtrans
+# status API for each with at most RECONCILE_CONCURRENCY requests in flight
+# over one pooled client, and applies the changes in one bulk_write using the
+# webhook's status mapping and revenue rollup rules. It runs from the Vercel
+# cron (GET /api/cron/reconcile-payments), from a background loop on
+# long-running servers (RECONCILE_INTERVAL_SECONDS), or on demand.
+# MIDTRANS_API_BASE_URL points it at a stand-in (benchmarks/midtrans_standin.py).
+# Each pass also deletes checkout claims still "creating" after
+# RECONCILE_AFTER_MINUTES: their request died before a Snap token was stored,
+# so no customer holds a token for them and they were never counted.
+
+RECONCILE_AFTER_MINUTES = int(os.environ.get("RECONCILE_AFTER_MINUTES", "30"))
+RECONCILE_CONCURRENCY = int(os.environ.get("RECONCILE_CONCURRENCY", "8"))
+RECONCILE_BATCH_SIZE = int(os.environ.get("RECONCILE_BATCH_SIZE", "500"))
+RECONCILE_INTERVAL_SECONDS = float(os.environ.get("RECONCILE_INTERVAL_SECONDS", "0"))
+# Snap tokens expire after 24h: an order Midtrans has never heard of by then
+# was abandoned before a payment method was picked
+RECONCILE_ABANDONED_HOURS = int(os.environ.get("RECONCILE_ABANDONED_HOURS", "24"))
+CRON_SECRET = os.environ.get("CRON_SECRET", "")
+MIDTRANS_API_BASE_URL = os.environ.get(
+    "MIDTRANS_API_BASE_URL",
+    "https://api.midtrans.com" if MIDTRANS_IS_PRODUCTION else "https://api.sandbox.midtrans.com",
+).rstrip("/")
+
+
+async def _fetch_midtrans_status(client, semaphore: asyncio.Semaphore, order_id: str) -> Optional[dict]:
+    async with semaphore:
+        try:
+            response = await client.get(f"/v2/{order_id}/status")
+            return response.json()
+        except Exception as e:
+            logger.warning(f"Midtrans status for {order_id} failed: {str(e)}")
+            return None
+
+
+async def notify_payment_success(order_id: str) -> None:
+    """Queue the admin and customer emails for a newly successful order."""
+    order_data = await db.transactions.find_one({"order_id": order_id}, {"_id": 0})
+    if order_data:
+        asyncio.create_task(send_order_notification_email(order_data))
+        asyncio.create_task(send_customer_confirmation_email(order_data))
+        logger.info(f"Email notifications triggered for order {order_id}")
+
+
+async def reconcile_pending_payments(limit: int = RECONCILE_BATCH_SIZE, transport=None) -> dict:
+    """One reconciliation pass; transport is for pointing httpx at an in-process stand-in."""
+    import httpx
+    now = datetime.now(timezone.utc)
+    stale_before = (now - timedelta(minutes=RECONCILE_AFTER_MINUTES)).isoformat()
+    abandoned_before = (now - timedelta(hours=RECONCILE_ABANDONED_HOURS)).isoformat()
+    reaped = await db.transactions.delete_many(
+        {"status": "creating", "snap_token": None, "claimed_at": {"$lt": stale_before}}
+    )
+    pending = await db.transactions.find(
+        {"status": "pending", "created_at": {"$lt": stale_before}},
+        {"_id": 0, "order_id": 1, "created_at": 1},
+    ).sort("created_at", 1).to_list(limit)
+    report = {"checked": len(pending), "updated": 0, "unchanged": 0, "errors": 0, "transitions": {},
+              "reaped": reaped.deleted_count}
+    if not pending:
+        return report
+
+    semaphore = asyncio.Semaphore(RECONCILE_CONCURRENCY)
+    async with httpx.AsyncClient(
+        base_url=MIDTRANS_API_BASE_URL,
+        auth=(MIDTRANS_SERVER_KEY, ""),
+        headers={"Accept": "application/json"},
+        timeout=10.0,
+        limits=httpx.Limits(max_connections=RECONCILE_CONCURRENCY, max_keepalive_connections=RECONCILE_CONCURRENCY),
+        transport=transport,
+    ) as client:
+        statuses = await asyncio.gather(
+            *(_fetch_midtrans_status(client, semaphore, tx["order_id"]) for tx in pending)
+        )
+
+    run_id = str(uuid.uuid4())
+    updated_at = now.isoformat()
+    ops = []
+    for tx, status in zip(pending, statuses):
+        if status is None:
+            report["errors"] += 1
+            continue
+        transaction_status = status.get("transaction_status")
+        if str(status.get("status_code")) == "404" and tx["created_at"] < abandoned_before:
+            transaction_status = "expire"
+        if transaction_status not in PAYMENT_STATUS_MAP or PAYMENT_STATUS_MAP[transaction_status] == "pending":
+            report["unchanged"] += 1
+            continue
+        update = {
+            "status": PAYMENT_STATUS_MAP[transaction_status],
+            "transaction_status": transaction_status,
+            "updated_at": updated_at,
+            "status_source": "reconcile",
+            "reconcile_run": run_id,
         }
-        await db.transactions.insert_one(tx_record)
-        
+        if status.get("payment_type"):
+            update["payment_type"] = status["payment_type"]
+        # Guarded on "pending" so a webhook that got there first wins
+        ops.append(UpdateOne({"order_id": tx["order_id"], "status": "pending"}, {"$set": update}))
+    if not ops:
+        return report
+
+    await db.transactions.bulk_write(ops, ordered=False)
+    # Exactly the orders this run moved (the guard may have skipped some)
+    changed = await db.transactions.find(
+        {"reconcile_run": run_id},
+        {"_id": 0, "order_id": 1, "status": 1, "created_at": 1, "gross_amount": 1, "payment_type": 1},
+    ).to_list(None)
+    day_incs: Dict[str, Dict[str, float]] = {}
+    for tx in changed:
+        day = stats_day(tx.get("created_at"))
+        if day is None:
+            continue
+        inc = day_incs.setdefault(day, {})
+        for field, n in _status_change_inc(tx, "pending", tx["status"], tx.get("payment_type")).items():
+            inc[field] = inc.get(field, 0) + n
+        report["transitions"][tx["status"]] = report["transitions"].get(tx["status"], 0) + 1
+        if tx["status"] == "success":
+            await notify_payment_success(tx["order_id"])
+    if day_incs:
+        await db.revenue_daily.bulk_write(
+            [UpdateOne({"_id": day}, {"$inc": inc, "$set": {"updated_at": updated_at}}, upsert=True)
+             for day, inc in day_incs.items() if inc],
+            ordered=False,
+        )
+    report["updated"] = len(changed)
+    return report
+
+
+async def _reconcile_loop() -> None:
+    while True:
+        await asyncio.sleep(RECONCILE_INTERVAL_SECONDS)
+        try:
+            report = await reconcile_pending_payments()
+            if report["updated"]:
+                logger.info(f"Payment reconciliation: {report}")
+        except Exception as e:
+            logger.warning(f"Payment reconciliation failed: {str(e)}")
+
+# ==================== CART PRICING ====================
+# Checkout is priced from the catalog, not from what the browser posts. The
+# price index holds every template's price fields keyed by id and slug, is
+# loaded with one query (coalesced across concurrent checkouts), and is
+# dropped whenever admin CRUD invalidates "templates" or after
+# PRICE_INDEX_TTL (other instances' writes). Pricing a cart is then a dict
+# lookup per line with no DB round-trips.
+
+PRICE_INDEX_TTL = float(os.environ.get("PRICE_INDEX_TTL", "300"))
+PRICE_FIELDS = {"_id": 0, "id": 1, "slug": 1, "name": 1, "price": 1, "sale_price": 1,
+                "price_usd": 1, "sale_price_usd": 1, "is_free": 1}
+CART_MAX_QUANTITY = 10
+# Midtrans rejects item names longer than 50 characters
+SNAP_ITEM_NAME_MAX = 50
+
+
+class CartPricingError(ValueError):
+    pass
+
+
+class _PriceIndex:
+    """Template id/slug -> (id, name, price IDR, price USD, is_free)."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Optional[Dict[str, tuple]] = None
+        self._expires_at = 0.0
+        self._generation = 0
+
+    @staticmethod
+    def _entry(row: Mapping) -> tuple:
+        price = row.get("sale_price") or row.get("price") or 0
+        price_usd = row.get("sale_price_usd") or row.get("price_usd")
+        return (str(row.get("id") or row["slug"]), row.get("name") or row["slug"],
+                int(price), price_usd, bool(row.get("is_free")))
+
+    async def _load(self) -> Dict[str, tuple]:
+        generation = self._generation
+        rows = await db.templates.find({}, PRICE_FIELDS).to_list(None)
+        entries: Dict[str, tuple] = {}
+        # defaults first so Mongo rows win, like find_template()
+        for row in (*_DEFAULT_TEMPLATES.items, *rows):
+            if not row.get("slug"):
+                continue
+            entry = self._entry(row)
+            entries[entry[0]] = entries[row["slug"]] = entry
+        if generation == self._generation:
+            # not invalidated while loading: safe to keep
+            self._entries = entries
+            self._expires_at = time.monotonic() + self.ttl
+        return entries
+
+    async def entries(self) -> Dict[str, tuple]:
+        if self._entries is not None and time.monotonic() < self._expires_at:
+            return self._entries
+        return await read_flights.do(("price_index", self._generation), self._load)
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._entries = None
+
+    def on_invalidate(self, namespace: str, slugs: tuple) -> None:
+        if namespace == "templates":
+            self.invalidate()
+
+    async def price_cart(self, items: List[Dict[str, Any]], currency: str = "IDR") -> dict:
+        """Canonical Snap item_details and gross_amount for the posted cart lines.
+
+        Lines name a template by "id" (or "slug"); repeated templates are
+        merged. Client prices and names are ignored.
+        """
+        entries = await self.entries()
+        lines: Dict[str, dict] = {}
+        for item in items:
+            key = str(item.get("id") or item.get("slug") or "")
+            entry = entries.get(key)
+            if entry is None:
+                raise CartPricingError(f"Unknown template: {key or '(missing id)'}")
+            template_id, name, price, price_usd, is_free = entry
+            if is_free:
+                raise CartPricingError(f"{name} is free to download")
+            unit = price if currency == "IDR" else price_usd
+            if not unit:
+                raise CartPricingError(f"{name} has no {currency} price")
+            try:
+                quantity = int(1 if item.get("quantity") is None else item["quantity"])
+            except (TypeError, ValueError):
+                raise CartPricingError(f"Invalid quantity for {name}")
+            line = lines.setdefault(template_id, {
+                "id": template_id, "price": int(unit), "quantity": 0, "name": name[:SNAP_ITEM_NAME_MAX],
+            })
+            line["quantity"] += quantity
+            # per line too, so a negative line can't offset another
+            if not 1 <= quantity <= CART_MAX_QUANTITY or line["quantity"] > CART_MAX_QUANTITY:
+                raise CartPricingError(f"Quantity for {name} must be between 1 and {CART_MAX_QUANTITY}")
+        if not lines:
+            raise CartPricingError("Cart is empty")
+        item_details = list(lines.values())
         return {
-            "token": transaction.get("token"),
-            "redirect_url": transaction.get("redirect_url"),
-            "order_id": request.order_id
+            "item_details": item_details,
+            "gross_amount": sum(line["price"] * line["quantity"] for line in item_details),
+            "currency": currency,
         }
+
+
+price_index = _PriceIndex(PRICE_INDEX_TTL)
+catalog_cache.add_listener(price_index.on_invalidate)
+
+# ==================== CHECKOUT IDEMPOTENCY ====================
+# A double-click or refresh on checkout resends create-token for the same
+# order_id. The first request claims the order with an atomic upsert on the
+# unique transactions.order_id index (status "creating") and is the only one
+# that calls Snap; concurrent duplicates wait for its token, later retries
+# get the stored snap_token back from memory or Mongo without a gateway
+# call. The same order_id with a different payload is a 409, and so is a
+# replay once the order has been paid or closed (the in-memory copy is only
+# served after a status read, since the webhook may land on another instance).
+#
+# A claim older than CHECKOUT_CLAIM_TIMEOUT without a token is taken over. If
+# the dead request had already reached Snap, Snap rejects the order_id as
+# taken and will never issue its token again: the row is closed as expired
+# (kept, not deleted) and the customer is asked to start a new checkout.
+
+SNAP_TOKEN_TTL_HOURS = float(os.environ.get("SNAP_TOKEN_TTL_HOURS", "24"))
+CHECKOUT_CLAIM_TIMEOUT = 30.0
+CHECKOUT_WAIT_SECONDS = 10.0
+
+
+def checkout_payload_hash(request: "PaymentRequest") -> str:
+    canonical = json.dumps(request.model_dump(), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+
+class _CheckoutCache:
+    """(order_id, payload hash) -> token response, until the Snap token expires."""
+
+    def __init__(self, max_entries: int = 2000):
+        self.max_entries = max_entries
+        self._entries: Dict[tuple, tuple] = {}
+
+    def get(self, key: tuple) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= datetime.now(timezone.utc):
+            self._entries.pop(key, None)
+            return None
+        return entry[1]
+
+    def put(self, key: tuple, expires_at: datetime, response: dict) -> None:
+        if len(self._entries) >= self.max_entries:
+            # insertion order: the oldest checkouts go first
+            for old in list(self._entries)[: self.max_entries // 4]:
+                del self._entries[old]
+        self._entries[key] = (expires_at, response)
+
+    def discard(self, order_id: str) -> None:
+        for key in [k for k in self._entries if k[0] == order_id]:
+            del self._entries[key]
+
+
+checkout_cache = _CheckoutCache()
+
+
+def _snap_order_id_taken(error: Exception) -> bool:
+    # Snap answers a reused order_id with 400 "... order_id has already been taken"
+    return "already been taken" in str(error)
+
+
+def _token_response(tx: dict) -> dict:
+    return {"token": tx.get("snap_token"), "redirect_url": tx.get("redirect_url"),
+            "order_id": tx["order_id"], "gross_amount": tx.get("gross_amount")}
+
+
+def _token_expiry(tx: dict) -> datetime:
+    # rows from before token_expires_at was stored: created_at + the Snap TTL
+    if tx.get("token_expires_at"):
+        return datetime.fromisoformat(tx["token_expires_at"])
+    created_at = datetime.fromisoformat(tx["created_at"])
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at + timedelta(hours=SNAP_TOKEN_TTL_HOURS)
+
+
+def _replay_from(tx: dict, payload_hash: str) -> Optional[dict]:
+    """Stored token response for tx, None if it has no usable token yet; raises on conflicts."""
+    if tx.get("payload_hash") not in (None, payload_hash):
+        raise HTTPException(status_code=409, detail="order_id already used for a different checkout")
+    if tx.get("status") not in ("creating", "pending"):
+        raise HTTPException(status_code=409, detail=f"Order is already {tx.get('status')}")
+    if not tx.get("snap_token"):
+        return None
+    if _token_expiry(tx) <= datetime.now(timezone.utc):
+        # Snap won't issue a second token for the same order_id
+        raise HTTPException(status_code=409, detail="Payment link expired, please start a new checkout")
+    return _token_response(tx)
+
+# ==================== PAYMENT ROUTES ====================
+
+@api_router.post("/payments/create-token", dependencies=[Depends(rate_limit("create-token"))])
+async def create_payment_token(request: PaymentRequest, response: Response):
+    if not MIDTRANS_SERVER_KEY:
+        raise HTTPException(status_code=500, detail="Midtrans not configured")
+
+    payload_hash = checkout_payload_hash(request)
+    cache_key = (request.order_id, payload_hash)
+    cached = checkout_cache.get(cache_key)
+    if cached is not None:
+        current = await db.transactions.find_one({"order_id": request.order_id}, {"_id": 0, "status": 1})
+        if current is not None and current.get("status") == "pending":
+            response.headers["Idempotent-Replay"] = "true"
+            return cached
+        # paid, closed or gone since it was cached: answer from Mongo below
+        checkout_cache.discard(request.order_id)
+
+    try:
+        cart = await price_index.price_cart(request.item_details)
+    except CartPricingError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if request.gross_amount is not None and request.gross_amount != cart["gross_amount"]:
+        logger.info(f"Order {request.order_id}: client total {request.gross_amount}, charged {cart['gross_amount']}")
+
+    now = datetime.now(timezone.utc)
+    claim_id = str(uuid.uuid4())
+    tx_record = {
+        "order_id": request.order_id,
+        "gross_amount": cart["gross_amount"],
+        "customer_email": request.customer_email,
+        "customer_name": request.customer_name,
+        "snap_token": None,
+        "status": "creating",
+        "created_at": now.isoformat(),
+        "item_details": cart["item_details"],
+        "payload_hash": payload_hash,
+        "claim_id": claim_id,
+        "claimed_at": now.isoformat(),
+    }
+    for _ in range(3):
+        try:
+            existing = await db.transactions.find_one_and_update(
+                {"order_id": request.order_id},
+                {"$setOnInsert": tx_record},
+                upsert=True,
+                projection={"_id": 0},
+            )
+            break
+        except DuplicateKeyError:
+            # lost the upsert race to a concurrent duplicate
+            existing = await db.transactions.find_one({"order_id": request.order_id}, {"_id": 0})
+            if existing is not None:
+                break
+            # ...which released its claim before we could read it: claim again
+    else:
+        raise HTTPException(status_code=409, detail="Checkout for this order failed, please retry")
+
+    if existing is not None:
+        deadline = asyncio.get_running_loop().time() + CHECKOUT_WAIT_SECONDS
+        while True:
+            replay = _replay_from(existing, payload_hash)
+            if replay is not None:
+                checkout_cache.put(cache_key, _token_expiry(existing), replay)
+                response.headers["Idempotent-Replay"] = "true"
+                return replay
+            claimed_at = datetime.fromisoformat(existing.get("claimed_at") or existing["created_at"])
+            if (datetime.now(timezone.utc) - claimed_at).total_seconds() > CHECKOUT_CLAIM_TIMEOUT:
+                # the claiming request died before storing a token: take over
+                taken = await db.transactions.update_one(
+                    {"order_id": request.order_id, "snap_token": None, "claim_id": existing.get("claim_id")},
+                    {"$set": {"claim_id": claim_id, "claimed_at": datetime.now(timezone.utc).isoformat()}},
+                )
+                if taken.modified_count:
+                    tx_record = {**existing, "claim_id": claim_id}
+                    break
+            if asyncio.get_running_loop().time() >= deadline:
+                raise HTTPException(status_code=409, detail="Checkout for this order is still being created")
+            await asyncio.sleep(0.2)
+            existing = await db.transactions.find_one({"order_id": request.order_id}, {"_id": 0})
+            if existing is None:
+                # the claiming request failed at the gateway and released it
+                raise HTTPException(status_code=409, detail="Checkout for this order failed, please retry")
+
+    payment_params = {
+        "transaction_details": {
+            "order_id": request.order_id,
+            "gross_amount": cart["gross_amount"]
+        },
+        "customer_details": {
+            "email": request.customer_email,
+            "first_name": request.customer_name,
+            "phone": request.customer_phone or ""
+        },
+        "item_details": cart["item_details"],
+        "credit_card": {"secure": True}
+    }
+    try:
+        snap = get_midtrans_snap()
+        # midtransclient is synchronous; keep the event loop free meanwhile
+        transaction = await asyncio.to_thread(snap.create_transaction, payment_params)
     except Exception as e:
         logger.error(f"Payment error: {str(e)}")
+        if _snap_order_id_taken(e):
+            # an earlier claim reached Snap but died before storing the token
+            closed = await db.transactions.update_one(
+                {"order_id": request.order_id, "claim_id": claim_id, "snap_token": None},
+                {"$set": {
+                    "status": "expired",
+                    "transaction_status": "expire",
+                    "status_source": "checkout",
+                    "updated_at": datetime.now(timezone.utc).isoformat(),
+                }},
+            )
+            if closed.modified_count:
+                await record_revenue_change(tx_record, None, "expired")
+            raise HTTPException(status_code=409, detail="Payment link expired, please start a new checkout")
+        # release the claim so the customer can retry the same order_id
+        await db.transactions.delete_one({"order_id": request.order_id, "claim_id": claim_id, "snap_token": None})
+        raise HTTPException(status_code=400, detail=str(e))
+
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=SNAP_TOKEN_TTL_HOURS)
+    stored = await db.transactions.update_one(
+        {"order_id": request.order_id, "claim_id": claim_id},
+        {"$set": {
+            "snap_token": transaction.get("token"),
+            "redirect_url": transaction.get("redirect_url"),
+            "token_expires_at": expires_at.isoformat(),
+            "status": "pending",
+        }},
+    )
+    tx_record["status"] = "pending"
+    if stored.modified_count:
+        # counted once per order, when it becomes a real checkout
+        await record_revenue_change(tx_record, None, "pending")
+
+    result = {
+        "token": transaction.get("token"),
+        "redirect_url": transaction.get("redirect_url"),
+        "order_id": request.order_id,
+        "gross_amount": cart["gross_amount"],
+    }
+    checkout_cache.put(cache_key, expires_at, result)
+    return result
+
+@api_router.post("/cart/price")
+async def price_cart(request: CartPriceRequest):
+    """What checkout would charge for these lines (IDR, or USD for display)."""
+    if request.currency not in ("IDR", "USD"):
+        raise HTTPException(status_code=400, detail="currency must be IDR or USD")
+    try:
+        return await price_index.price_cart(request.item_details, request.currency)
+    except CartPricingError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @api_router.get("/payments/status/{order_id}")
@@ -1024,43 +4074,29 @@ async def handle_midtrans_webhook(request: Request):
             return {"status": "unauthorized"}
         
         transaction_status = body.get("transaction_status")
-        status_map = {
-            "settlement": "success",
-            "capture": "success",
-            "pending": "pending",
-            "deny": "failed",
-            "cancel": "cancelled",
-            "expire": "expired"
-        }
-        
-        app_status = status_map.get(transaction_status, "unknown")
-        
-        await db.transactions.update_one(
-            {"order_id": order_id},
-            {"$set": {
-                "status": app_status,
-                "transaction_status": transaction_status,
-                "payment_type": body.get("payment_type"),
-                "updated_at": datetime.now(timezone.utc).isoformat()
-            }}
-        )
+        previous, app_status = await apply_payment_status(order_id, transaction_status, body.get("payment_type"))
         
-        # Send email notifications for successful payments
-        if app_status == "success":
-            # Get full order data from DB
-            order_data = await db.transactions.find_one({"order_id": order_id}, {"_id": 0})
-            if order_data:
-                # Send email to admin
-                asyncio.create_task(send_order_notification_email(order_data))
-                # Send confirmation email to customer
-                asyncio.create_task(send_customer_confirmation_email(order_data))
-                logger.info(f"Email notifications triggered for order {order_id}")
+        # Send email notifications when a payment first succeeds (Midtrans
+        # retries notifications, so repeats must not mail again)
+        if app_status == "success" and previous is not None and previous.get("status") != "success":
+            await notify_payment_success(order_id)
         
         return {"status": "ok"}
     except Exception as e:
         logger.error(f"Webhook error: {str(e)}")
         return {"status": "error", "message": str(e)}
 
+# Vercel cron entry point (vercel.json "crons"); Vercel sends CRON_SECRET as a bearer token
+@api_router.get("/cron/reconcile-payments")
+async def cron_reconcile_payments(request: Request):
+    if not CRON_SECRET or not hmac.compare_digest(request.headers.get("authorization", ""), f"Bearer {CRON_SECRET}"):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return await reconcile_pending_payments()
+
+@api_router.post("/admin/payments/reconcile")
+async def admin_reconcile_payments(limit: int = Query(RECONCILE_BATCH_SIZE, ge=1, le=5000), user: dict = Depends(require_admin)):
+    return await reconcile_pending_payments(limit)
+
 @api_router.get("/config/midtrans")
 async def get_midtrans_config():
     return {
@@ -1069,51 +4105,95 @@ async def get_midtrans_config():
     }
 
 # ==================== DEFAULT DATA ====================
+# Fallback datasets are built once at import and frozen: handlers get shared
+# read-only views (tuples of MappingProxyType) and slug/category lookups are
+# dict hits instead of list scans. Use thaw() before handing rows to Mongo.
+
+def _freeze(value: Any):
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any):
+    """Deep-copy a frozen default row back into plain dicts and lists."""
+    if isinstance(value, Mapping):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(v) for v in value]
+    return value
+
+
+class _DefaultDataset:
+    """Frozen rows plus prebuilt slug and category indexes."""
+
+    def __init__(self, rows: List[dict]):
+        self.items = tuple(_freeze(row) for row in rows)
+        self.by_slug = MappingProxyType({row["slug"]: row for row in self.items if "slug" in row})
+        by_category: Dict[str, list] = {}
+        for row in self.items:
+            by_category.setdefault(row.get("category"), []).append(row)
+        self.by_category = MappingProxyType({k: tuple(v) for k, v in by_category.items()})
+
+
+_DEFAULT_SERVICES = _DefaultDataset([
+    {"id": "1", "slug": "company-profile", "name_id": "Website Company Profile", "name_en": "Company Profile Website", "description_id": "Website profesional untuk menampilkan profil perusahaan, layanan, dan portofolio bisnis Anda.", "description_en": "Professional website to showcase your company profile, services, and business portfolio.", "icon": "Building2", "features": ["Responsive Design", "SEO Optimized", "Contact Form", "Google Maps", "Social Media Integration"], "price_start": 3500000, "order": 1},
+    {"id": "2", "slug": "e-commerce", "name_id": "Website E-Commerce", "name_en": "E-Commerce Website", "description_id": "Toko online lengkap dengan keranjang belanja, payment gateway, dan manajemen produk.", "description_en": "Complete online store with shopping cart, payment gateway, and product management.", "icon": "ShoppingCart", "features": ["Product Catalog", "Shopping Cart", "Payment Gateway", "Order Management", "Inventory System"], "price_start": 8500000, "order": 2},
+    {"id": "3", "slug": "landing-page", "name_id": "Landing Page", "name_en": "Landing Page", "description_id": "Halaman landing yang dioptimalkan untuk konversi tinggi dan kampanye marketing.", "description_en": "High-converting landing page optimized for marketing campaigns.", "icon": "Rocket", "features": ["High Conversion Design", "A/B Testing Ready", "Lead Capture Form", "Analytics Integration", "Fast Loading"], "price_start": 2500000, "order": 3},
+    {"id": "4", "slug": "custom-web-app", "name_id": "Custom Web Application", "name_en": "Custom Web Application", "description_id": "Aplikasi web custom sesuai kebutuhan bisnis Anda dengan fitur-fitur khusus.", "description_en": "Custom web application tailored to your business needs with special features.", "icon": "Code2", "features": ["Custom Features", "API Integration", "Admin Dashboard", "User Management", "Scalable Architecture"], "price_start": 15000000, "order": 4}
+])
+
+_DEFAULT_TEMPLATES = _DefaultDataset([
+    {"id": "free-1", "slug": "portfolio-template-free", "name": "Portfolio Template", "category": "free", "price": 0, "sale_price": None, "price_usd": None, "sale_price_usd": None, "is_free": True, "description_id": "Template portfolio modern dengan Next.js 14 dan TypeScript. Siap pakai dalam 10 menit, tinggal edit satu file konfigurasi!", "description_en": "Modern portfolio template with Next.js 14 and TypeScript. Ready to use in 10 minutes, just edit one config file!", "features": ["Next.js 14 + TypeScript + Tailwind CSS", "6 section siap pakai", "Single config file untuk kustomisasi", "Fully responsive & SEO optimized", "Integrasi WhatsApp", "Dokumentasi lengkap"], "technologies": ["Next.js 14", "TypeScript", "Tailwind CSS", "Framer Motion"], "demo_url": "https://portfolio-template-free-plum.vercel.app/", "download_url": "https://github.com/kebo-sukses/portfolio-template-free/archive/refs/heads/main.zip", "github_url": "https://github.com/kebo-sukses/portfolio-template-free", "admin_url": None, "image": "https://images.unsplash.com/photo-1460925895917-afdab827c52f?w=800", "images": [], "downloads": 0, "rating": 5.0, "is_featured": True, "is_bestseller": False, "is_new": True},
+    {"id": "free-2", "slug": "company-profil-free-page", "name": "Company Profile Template", "category": "free", "price": 0, "sale_price": None, "price_usd": None, "sale_price_usd": None, "is_free": True, "description_id": "Landing page company profile profesional dengan 9 section, SEO lengkap, JSON-LD schema, breadcrumb. Edit satu file konfigurasi untuk kustomisasi penuh.", "description_en": "Professional company profile landing page with 9 sections, SEO-optimized, JSON-LD schema, breadcrumb. Edit one config file to customize everything.", "features": ["Next.js 14 + TypeScript + Tailwind CSS", "9 section: Hero, Layanan, Portfolio, Tim, FAQ, CTA", "SEO lengkap: JSON-LD, sitemap, robots.txt", "Breadcrumb schema sesuai standar Google", "Single config file untuk kustomisasi", "Animasi Framer Motion + dark theme"], "technologies": ["Next.js 14", "TypeScript", "Tailwind CSS", "Framer Motion"], "demo_url": "https://company-profil-free-page.vercel.app/", "download_url": "https://github.com/kebo-sukses/company-profil-free-page/archive/refs/heads/main.zip", "github_url": "https://github.com/kebo-sukses/company-profil-free-page", "admin_url": None, "image": "https://images.unsplash.com/photo-1522071820081-009f0129c71c?w=800", "images": [], "downloads": 0, "rating": 5.0, "is_featured": True, "is_bestseller": False, "is_new": True},
+    {"id": "free-3", "slug": "fashion-template-free", "name": "Fashion Template", "category": "free", "price": 0, "sale_price": None, "price_usd": None, "sale_price_usd": None, "is_free": True, "description_id": "Template fashion marketplace premium dengan Next.js 16, TypeScript, Tailwind CSS v4, dan Framer Motion. Terasa seperti template senilai $150 — gratis untuk semua!", "description_en": "Premium fashion marketplace template built with Next.js 16, TypeScript, Tailwind CSS v4, and Framer Motion. Feels like a $150 template — completely free!", "features": ["Next.js 16 (App Router) + TypeScript + Tailwind CSS v4", "Flash Sale section dengan countdown timer & stock progress bar", "Announcement bar sliding marquee + sticky glassmorphism navbar", "Hero split layout, Category showcase, Testimonial masonry grid", "FAQ accordion + Footer dengan payment badges (GoPay, OVO, DANA, QRIS)", "Framer Motion animations + Playfair Display typography"], "technologies": ["Next.js 16", "TypeScript", "Tailwind CSS v4", "Framer Motion", "Lucide React"], "demo_url": "https://fashion-template-free.vercel.app/", "download_url": "https://github.com/kebo-sukses/fashion-template-free/archive/refs/heads/main.zip", "github_url": "https://github.com/kebo-sukses/fashion-template-free", "admin_url": None, "image": "https://images.unsplash.com/photo-1441984904996-e0b6ba687e04?w=800", "images": [], "downloads": 0, "rating": 5.0, "is_featured": True, "is_bestseller": False, "is_new": True},
+    {"id": "1", "slug": "corporate-pro", "name": "Corporate Pro Business", "category": "business", "price": 750000, "sale_price": None, "description_id": "Template bisnis korporat profesional dengan desain modern.", "description_en": "Professional corporate business template with modern design.", "features": ["Responsive Design", "SEO Optimized", "Contact Form", "12 Pages"], "technologies": ["HTML5", "CSS3", "JavaScript", "Bootstrap 5"], "demo_url": "https://demo.calius.digital/corporate-pro", "image": "https://images.unsplash.com/photo-1460925895917-afdab827c52f?w=800", "images": [], "downloads": 150, "rating": 4.9, "is_featured": True, "is_bestseller": False, "is_new": True},
+    {"id": "2", "slug": "shopmax-ecommerce", "name": "ShopMax E-Commerce", "category": "ecommerce", "price": 1200000, "sale_price": 950000, "description_id": "Solusi e-commerce lengkap dengan keranjang belanja dan checkout.", "description_en": "Complete e-commerce solution with shopping cart and checkout.", "features": ["Product Catalog", "Shopping Cart", "Checkout System", "18 Pages"], "technologies": ["HTML5", "CSS3", "JavaScript", "Vue.js"], "demo_url": "https://demo.calius.digital/shopmax", "image": "https://images.unsplash.com/photo-1556742049-0cfed4f6a45d?w=800", "images": [], "downloads": 280, "rating": 4.8, "is_featured": True, "is_bestseller": True, "is_new": False},
+    {"id": "3", "slug": "creative-portfolio", "name": "Creative Portfolio Pro", "category": "portfolio", "price": 600000, "sale_price": None, "description_id": "Template portfolio kreatif untuk desainer dan fotografer.", "description_en": "Creative portfolio template for designers and photographers.", "features": ["Gallery Layouts", "Project Showcase", "Smooth Animations", "8 Pages"], "technologies": ["HTML5", "CSS3", "JavaScript", "GSAP"], "demo_url": "https://demo.calius.digital/portfolio", "image": "https://images.unsplash.com/photo-1507238691740-187a5b1d37b8?w=800", "images": [], "downloads": 95, "rating": 5.0, "is_featured": True, "is_bestseller": False, "is_new": True},
+    {"id": "4", "slug": "launchpad-landing", "name": "LaunchPad Landing Page", "category": "landing-page", "price": 450000, "sale_price": 350000, "description_id": "Landing page konversi tinggi untuk peluncuran produk.", "description_en": "High-converting landing page for product launches.", "features": ["Lead Capture", "Countdown Timer", "Pricing Tables", "1 Page"], "technologies": ["HTML5", "CSS3", "JavaScript", "Tailwind CSS"], "demo_url": "https://demo.calius.digital/launchpad", "image": "https://images.unsplash.com/photo-1551288049-bebda4e38f71?w=800", "images": [], "downloads": 320, "rating": 4.7, "is_featured": False, "is_bestseller": True, "is_new": False},
+    {"id": "5", "slug": "delicious-restaurant", "name": "Delicious Restaurant", "category": "restaurant", "price": 700000, "sale_price": None, "description_id": "Template restoran dengan menu online dan sistem reservasi.", "description_en": "Restaurant template with online menu and reservation system.", "features": ["Menu System", "Reservation Form", "Gallery", "10 Pages"], "technologies": ["HTML5", "CSS3", "JavaScript", "Bootstrap 5"], "demo_url": "https://demo.calius.digital/restaurant", "image": "https://images.unsplash.com/photo-1517248135467-4c7edcad34c4?w=800", "images": [], "downloads": 75, "rating": 4.9, "is_featured": True, "is_bestseller": False, "is_new": True}
+])
+
+_DEFAULT_PORTFOLIO = _DefaultDataset([
+    {"id": "1", "title": "TechCorp Website", "client": "TechCorp Indonesia", "category": "company-profile", "description_id": "Website company profile modern untuk perusahaan teknologi.", "description_en": "Modern company profile website for technology company.", "image": "https://images.unsplash.com/photo-1497366216548-37526070297c?w=800", "images": [], "url": "https://techcorp.id", "technologies": ["React", "Node.js", "MongoDB"], "year": 2024, "is_featured": True},
+    {"id": "2", "title": "FashionHub Store", "client": "FashionHub", "category": "e-commerce", "description_id": "Platform e-commerce fashion dengan 500+ produk.", "description_en": "Fashion e-commerce platform with 500+ products.", "image": "https://images.unsplash.com/photo-1441986300917-64674bd600d8?w=800", "images": [], "url": "https://fashionhub.co.id", "technologies": ["Next.js", "Stripe", "PostgreSQL"], "year": 2024, "is_featured": True},
+    {"id": "3", "title": "StartupX Landing", "client": "StartupX", "category": "landing-page", "description_id": "Landing page untuk peluncuran aplikasi startup.", "description_en": "Landing page for startup app launch.", "image": "https://images.unsplash.com/photo-1559136555-9303baea8ebd?w=800", "images": [], "url": "https://startupx.io", "technologies": ["React", "Tailwind CSS", "Framer Motion"], "year": 2024, "is_featured": True},
+    {"id": "4", "title": "Resto Nusantara", "client": "Resto Nusantara", "category": "restaurant", "description_id": "Website restoran dengan sistem reservasi online.", "description_en": "Restaurant website with online reservation system.", "image": "https://images.unsplash.com/photo-1552566626-52f8b828add9?w=800", "images": [], "url": "https://restonusantara.com", "technologies": ["Vue.js", "Laravel", "MySQL"], "year": 2023, "is_featured": False}
+])
+
+_DEFAULT_TESTIMONIALS = _DefaultDataset([
+    {"id": "1", "name": "Ahmad Rizki", "role": "CEO", "company": "TechCorp Indonesia", "content_id": "Calius Digital membantu kami membangun website yang profesional dan cepat. Hasilnya luar biasa!", "content_en": "Calius Digital helped us build a professional and fast website. The result is amazing!", "avatar": None, "rating": 5},
+    {"id": "2", "name": "Sarah Wijaya", "role": "Marketing Director", "company": "FashionHub", "content_id": "Tim yang sangat responsif dan hasil kerjanya melampaui ekspektasi kami.", "content_en": "Very responsive team and their work exceeded our expectations.", "avatar": None, "rating": 5},
+    {"id": "3", "name": "Budi Santoso", "role": "Founder", "company": "StartupX", "content_id": "Landing page yang dibuat sangat membantu meningkatkan konversi campaign kami hingga 40%.", "content_en": "The landing page they created helped increase our campaign conversion by 40%.", "avatar": None, "rating": 5}
+])
+
+_DEFAULT_BLOG_POSTS = _DefaultDataset([])
+
+_DEFAULT_PRICING = _DefaultDataset([
+    {"id": "1", "name_id": "Starter", "name_en": "Starter", "description_id": "Cocok untuk bisnis kecil yang baru mulai", "description_en": "Perfect for small businesses just starting out", "price": 3500000, "price_note_id": "Pembayaran sekali", "price_note_en": "One-time payment", "features": [{"text_id": "5 Halaman Website", "text_en": "5 Website Pages", "included": True}, {"text_id": "Responsive Design", "text_en": "Responsive Design", "included": True}, {"text_id": "Contact Form", "text_en": "Contact Form", "included": True}, {"text_id": "SEO Basic", "text_en": "Basic SEO", "included": True}, {"text_id": "1 Bulan Support", "text_en": "1 Month Support", "included": True}, {"text_id": "Custom Features", "text_en": "Custom Features", "included": False}, {"text_id": "E-commerce", "text_en": "E-commerce", "included": False}], "is_popular": False, "order": 1},
+    {"id": "2", "name_id": "Professional", "name_en": "Professional", "description_id": "Untuk bisnis yang ingin berkembang", "description_en": "For businesses looking to grow", "price": 7500000, "price_note_id": "Pembayaran sekali", "price_note_en": "One-time payment", "features": [{"text_id": "10 Halaman Website", "text_en": "10 Website Pages", "included": True}, {"text_id": "Responsive Design", "text_en": "Responsive Design", "included": True}, {"text_id": "Contact Form", "text_en": "Contact Form", "included": True}, {"text_id": "SEO Advanced", "text_en": "Advanced SEO", "included": True}, {"text_id": "3 Bulan Support", "text_en": "3 Months Support", "included": True}, {"text_id": "Custom Features", "text_en": "Custom Features", "included": True}, {"text_id": "E-commerce", "text_en": "E-commerce", "included": False}], "is_popular": True, "order": 2},
+    {"id": "3", "name_id": "Enterprise", "name_en": "Enterprise", "description_id": "Solusi lengkap untuk bisnis besar", "description_en": "Complete solution for large businesses", "price": 15000000, "price_note_id": "Pembayaran sekali", "price_note_en": "One-time payment", "features": [{"text_id": "Unlimited Halaman", "text_en": "Unlimited Pages", "included": True}, {"text_id": "Responsive Design", "text_en": "Responsive Design", "included": True}, {"text_id": "Contact Form", "text_en": "Contact Form", "included": True}, {"text_id": "SEO Premium", "text_en": "Premium SEO", "included": True}, {"text_id": "6 Bulan Support", "text_en": "6 Months Support", "included": True}, {"text_id": "Custom Features", "text_en": "Custom Features", "included": True}, {"text_id": "E-commerce", "text_en": "E-commerce", "included": True}], "is_popular": False, "order": 3}
+])
 
 def get_default_services():
-    return [
-        {"id": "1", "slug": "company-profile", "name_id": "Website Company Profile", "name_en": "Company Profile Website", "description_id": "Website profesional untuk menampilkan profil perusahaan, layanan, dan portofolio bisnis Anda.", "description_en": "Professional website to showcase your company profile, services, and business portfolio.", "icon": "Building2", "features": ["Responsive Design", "SEO Optimized", "Contact Form", "Google Maps", "Social Media Integration"], "price_start": 3500000, "order": 1},
-        {"id": "2", "slug": "e-commerce", "name_id": "Website E-Commerce", "name_en": "E-Commerce Website", "description_id": "Toko online lengkap dengan keranjang belanja, payment gateway, dan manajemen produk.", "description_en": "Complete online store with shopping cart, payment gateway, and product management.", "icon": "ShoppingCart", "features": ["Product Catalog", "Shopping Cart", "Payment Gateway", "Order Management", "Inventory System"], "price_start": 8500000, "order": 2},
-        {"id": "3", "slug": "landing-page", "name_id": "Landing Page", "name_en": "Landing Page", "description_id": "Halaman landing yang dioptimalkan untuk konversi tinggi dan kampanye marketing.", "description_en": "High-converting landing page optimized for marketing campaigns.", "icon": "Rocket", "features": ["High Conversion Design", "A/B Testing Ready", "Lead Capture Form", "Analytics Integration", "Fast Loading"], "price_start": 2500000, "order": 3},
-        {"id": "4", "slug": "custom-web-app", "name_id": "Custom Web Application", "name_en": "Custom Web Application", "description_id": "Aplikasi web custom sesuai kebutuhan bisnis Anda dengan fitur-fitur khusus.", "description_en": "Custom web application tailored to your business needs with special features.", "icon": "Code2", "features": ["Custom Features", "API Integration", "Admin Dashboard", "User Management", "Scalable Architecture"], "price_start": 15000000, "order": 4}
-    ]
+    return _DEFAULT_SERVICES.items
 
 def get_default_templates():
-    return [
-        {"id": "free-1", "slug": "portfolio-template-free", "name": "Portfolio Template", "category": "free", "price": 0, "sale_price": None, "price_usd": None, "sale_price_usd": None, "is_free": True, "description_id": "Template portfolio modern dengan Next.js 14 dan TypeScript. Siap pakai dalam 10 menit, tinggal edit satu file konfigurasi!", "description_en": "Modern portfolio template with Next.js 14 and TypeScript. Ready to use in 10 minutes, just edit one config file!", "features": ["Next.js 14 + TypeScript + Tailwind CSS", "6 section siap pakai", "Single config file untuk kustomisasi", "Fully responsive & SEO optimized", "Integrasi WhatsApp", "Dokumentasi lengkap"], "technologies": ["Next.js 14", "TypeScript", "Tailwind CSS", "Framer Motion"], "demo_url": "https://portfolio-template-free-plum.vercel.app/", "download_url": "https://github.com/kebo-sukses/portfolio-template-free/archive/refs/heads/main.zip", "github_url": "https://github.com/kebo-sukses/portfolio-template-free", "admin_url": None, "image": "https://images.unsplash.com/photo-1460925895917-afdab827c52f?w=800", "images": [], "downloads": 0, "rating": 5.0, "is_featured": True, "is_bestseller": False, "is_new": True},
-        {"id": "free-2", "slug": "company-profil-free-page", "name": "Company Profile Template", "category": "free", "price": 0, "sale_price": None, "price_usd": None, "sale_price_usd": None, "is_free": True, "description_id": "Landing page company profile profesional dengan 9 section, SEO lengkap, JSON-LD schema, breadcrumb. Edit satu file konfigurasi untuk kustomisasi penuh.", "description_en": "Professional company profile landing page with 9 sections, SEO-optimized, JSON-LD schema, breadcrumb. Edit one config file to customize everything.", "features": ["Next.js 14 + TypeScript + Tailwind CSS", "9 section: Hero, Layanan, Portfolio, Tim, FAQ, CTA", "SEO lengkap: JSON-LD, sitemap, robots.txt", "Breadcrumb schema sesuai standar Google", "Single config file untuk kustomisasi", "Animasi Framer Motion + dark theme"], "technologies": ["Next.js 14", "TypeScript", "Tailwind CSS", "Framer Motion"], "demo_url": "https://company-profil-free-page.vercel.app/", "download_url": "https://github.com/kebo-sukses/company-profil-free-page/archive/refs/heads/main.zip", "github_url": "https://github.com/kebo-sukses/company-profil-free-page", "admin_url": None, "image": "https://images.unsplash.com/photo-1522071820081-009f0129c71c?w=800", "images": [], "downloads": 0, "rating": 5.0, "is_featured": True, "is_bestseller": False, "is_new": True},
-        {"id": "free-3", "slug": "fashion-template-free", "name": "Fashion Template", "category": "free", "price": 0, "sale_price": None, "price_usd": None, "sale_price_usd": None, "is_free": True, "description_id": "Template fashion marketplace premium dengan Next.js 16, TypeScript, Tailwind CSS v4, dan Framer Motion. Terasa seperti template senilai $150 — gratis untuk semua!", "description_en": "Premium fashion marketplace template built with Next.js 16, TypeScript, Tailwind CSS v4, and Framer Motion. Feels like a $150 template — completely free!", "features": ["Next.js 16 (App Router) + TypeScript + Tailwind CSS v4", "Flash Sale section dengan countdown timer & stock progress bar", "Announcement bar sliding marquee + sticky glassmorphism navbar", "Hero split layout, Category showcase, Testimonial masonry grid", "FAQ accordion + Footer dengan payment badges (GoPay, OVO, DANA, QRIS)", "Framer Motion animations + Playfair Display typography"], "technologies": ["Next.js 16", "TypeScript", "Tailwind CSS v4", "Framer Motion", "Lucide React"], "demo_url": "https://fashion-template-free.vercel.app/", "download_url": "https://github.com/kebo-sukses/fashion-template-free/archive/refs/heads/main.zip", "github_url": "https://github.com/kebo-sukses/fashion-template-free", "admin_url": None, "image": "https://images.unsplash.com/photo-1441984904996-e0b6ba687e04?w=800", "images": [], "downloads": 0, "rating": 5.0, "is_featured": True, "is_bestseller": False, "is_new": True},
-        {"id": "1", "slug": "corporate-pro", "name": "Corporate Pro Business", "category": "business", "price": 750000, "sale_price": None, "description_id": "Template bisnis korporat profesional dengan desain modern.", "description_en": "Professional corporate business template with modern design.", "features": ["Responsive Design", "SEO Optimized", "Contact Form", "12 Pages"], "technologies": ["HTML5", "CSS3", "JavaScript", "Bootstrap 5"], "demo_url": "https://demo.calius.digital/corporate-pro", "image": "https://images.unsplash.com/photo-1460925895917-afdab827c52f?w=800", "images": [], "downloads": 150, "rating": 4.9, "is_featured": True, "is_bestseller": False, "is_new": True},
-        {"id": "2", "slug": "shopmax-ecommerce", "name": "ShopMax E-Commerce", "category": "ecommerce", "price": 1200000, "sale_price": 950000, "description_id": "Solusi e-commerce lengkap dengan keranjang belanja dan checkout.", "description_en": "Complete e-commerce solution with shopping cart and checkout.", "features": ["Product Catalog", "Shopping Cart", "Checkout System", "18 Pages"], "technologies": ["HTML5", "CSS3", "JavaScript", "Vue.js"], "demo_url": "https://demo.calius.digital/shopmax", "image": "https://images.unsplash.com/photo-1556742049-0cfed4f6a45d?w=800", "images": [], "downloads": 280, "rating": 4.8, "is_featured": True, "is_bestseller": True, "is_new": False},
-        {"id": "3", "slug": "creative-portfolio", "name": "Creative Portfolio Pro", "category": "portfolio", "price": 600000, "sale_price": None, "description_id": "Template portfolio kreatif untuk desainer dan fotografer.", "description_en": "Creative portfolio template for designers and photographers.", "features": ["Gallery Layouts", "Project Showcase", "Smooth Animations", "8 Pages"], "technologies": ["HTML5", "CSS3", "JavaScript", "GSAP"], "demo_url": "https://demo.calius.digital/portfolio", "image": "https://images.unsplash.com/photo-1507238691740-187a5b1d37b8?w=800", "images": [], "downloads": 95, "rating": 5.0, "is_featured": True, "is_bestseller": False, "is_new": True},
-        {"id": "4", "slug": "launchpad-landing", "name": "LaunchPad Landing Page", "category": "landing-page", "price": 450000, "sale_price": 350000, "description_id": "Landing page konversi tinggi untuk peluncuran produk.", "description_en": "High-converting landing page for product launches.", "features": ["Lead Capture", "Countdown Timer", "Pricing Tables", "1 Page"], "technologies": ["HTML5", "CSS3", "JavaScript", "Tailwind CSS"], "demo_url": "https://demo.calius.digital/launchpad", "image": "https://images.unsplash.com/photo-1551288049-bebda4e38f71?w=800", "images": [], "downloads": 320, "rating": 4.7, "is_featured": False, "is_bestseller": True, "is_new": False},
-        {"id": "5", "slug": "delicious-restaurant", "name": "Delicious Restaurant", "category": "restaurant", "price": 700000, "sale_price": None, "description_id": "Template restoran dengan menu online dan sistem reservasi.", "description_en": "Restaurant template with online menu and reservation system.", "features": ["Menu System", "Reservation Form", "Gallery", "10 Pages"], "technologies": ["HTML5", "CSS3", "JavaScript", "Bootstrap 5"], "demo_url": "https://demo.calius.digital/restaurant", "image": "https://images.unsplash.com/photo-1517248135467-4c7edcad34c4?w=800", "images": [], "downloads": 75, "rating": 4.9, "is_featured": True, "is_bestseller": False, "is_new": True}
-    ]
+    return _DEFAULT_TEMPLATES.items
 
 def get_default_portfolio():
-    return [
-        {"id": "1", "title": "TechCorp Website", "client": "TechCorp Indonesia", "category": "company-profile", "description_id": "Website company profile modern untuk perusahaan teknologi.", "description_en": "Modern company profile website for technology company.", "image": "https://images.unsplash.com/photo-1497366216548-37526070297c?w=800", "images": [], "url": "https://techcorp.id", "technologies": ["React", "Node.js", "MongoDB"], "year": 2024, "is_featured": True},
-        {"id": "2", "title": "FashionHub Store", "client": "FashionHub", "category": "e-commerce", "description_id": "Platform e-commerce fashion dengan 500+ produk.", "description_en": "Fashion e-commerce platform with 500+ products.", "image": "https://images.unsplash.com/photo-1441986300917-64674bd600d8?w=800", "images": [], "url": "https://fashionhub.co.id", "technologies": ["Next.js", "Stripe", "PostgreSQL"], "year": 2024, "is_featured": True},
-        {"id": "3", "title": "StartupX Landing", "client": "StartupX", "category": "landing-page", "description_id": "Landing page untuk peluncuran aplikasi startup.", "description_en": "Landing page for startup app launch.", "image": "https://images.unsplash.com/photo-1559136555-9303baea8ebd?w=800", "images": [], "url": "https://startupx.io", "technologies": ["React", "Tailwind CSS", "Framer Motion"], "year": 2024, "is_featured": True},
-        {"id": "4", "title": "Resto Nusantara", "client": "Resto Nusantara", "category": "restaurant", "description_id": "Website restoran dengan sistem reservasi online.", "description_en": "Restaurant website with online reservation system.", "image": "https://images.unsplash.com/photo-1552566626-52f8b828add9?w=800", "images": [], "url": "https://restonusantara.com", "technologies": ["Vue.js", "Laravel", "MySQL"], "year": 2023, "is_featured": False}
-    ]
+    return _DEFAULT_PORTFOLIO.items
 
 def get_default_testimonials():
-    return [
-        {"id": "1", "name": "Ahmad Rizki", "role": "CEO", "company": "TechCorp Indonesia", "content_id": "Calius Digital membantu kami membangun website yang profesional dan cepat. Hasilnya luar biasa!", "content_en": "Calius Digital helped us build a professional and fast website. The result is amazing!", "avatar": None, "rating": 5},
-        {"id": "2", "name": "Sarah Wijaya", "role": "Marketing Director", "company": "FashionHub", "content_id": "Tim yang sangat responsif dan hasil kerjanya melampaui ekspektasi kami.", "content_en": "Very responsive team and their work exceeded our expectations.", "avatar": None, "rating": 5},
-        {"id": "3", "name": "Budi Santoso", "role": "Founder", "company": "StartupX", "content_id": "Landing page yang dibuat sangat membantu meningkatkan konversi campaign kami hingga 40%.", "content_en": "The landing page they created helped increase our campaign conversion by 40%.", "avatar": None, "rating": 5}
-    ]
+    return _DEFAULT_TESTIMONIALS.items
 
 def get_default_blog_posts():
-    return []
+    return _DEFAULT_BLOG_POSTS.items
 
 def get_default_pricing():
-    return [
-        {"id": "1", "name_id": "Starter", "name_en": "Starter", "description_id": "Cocok untuk bisnis kecil yang baru mulai", "description_en": "Perfect for small businesses just starting out", "price": 3500000, "price_note_id": "Pembayaran sekali", "price_note_en": "One-time payment", "features": [{"text_id": "5 Halaman Website", "text_en": "5 Website Pages", "included": True}, {"text_id": "Responsive Design", "text_en": "Responsive Design", "included": True}, {"text_id": "Contact Form", "text_en": "Contact Form", "included": True}, {"text_id": "SEO Basic", "text_en": "Basic SEO", "included": True}, {"text_id": "1 Bulan Support", "text_en": "1 Month Support", "included": True}, {"text_id": "Custom Features", "text_en": "Custom Features", "included": False}, {"text_id": "E-commerce", "text_en": "E-commerce", "included": False}], "is_popular": False, "order": 1},
-        {"id": "2", "name_id": "Professional", "name_en": "Professional", "description_id": "Untuk bisnis yang ingin berkembang", "description_en": "For businesses looking to grow", "price": 7500000, "price_note_id": "Pembayaran sekali", "price_note_en": "One-time payment", "features": [{"text_id": "10 Halaman Website", "text_en": "10 Website Pages", "included": True}, {"text_id": "Responsive Design", "text_en": "Responsive Design", "included": True}, {"text_id": "Contact Form", "text_en": "Contact Form", "included": True}, {"text_id": "SEO Advanced", "text_en": "Advanced SEO", "included": True}, {"text_id": "3 Bulan Support", "text_en": "3 Months Support", "included": True}, {"text_id": "Custom Features", "text_en": "Custom Features", "included": True}, {"text_id": "E-commerce", "text_en": "E-commerce", "included": False}], "is_popular": True, "order": 2},
-        {"id": "3", "name_id": "Enterprise", "name_en": "Enterprise", "description_id": "Solusi lengkap untuk bisnis besar", "description_en": "Complete solution for large businesses", "price": 15000000, "price_note_id": "Pembayaran sekali", "price_note_en": "One-time payment", "features": [{"text_id": "Unlimited Halaman", "text_en": "Unlimited Pages", "included": True}, {"text_id": "Responsive Design", "text_en": "Responsive Design", "included": True}, {"text_id": "Contact Form", "text_en": "Contact Form", "included": True}, {"text_id": "SEO Premium", "text_en": "Premium SEO", "included": True}, {"text_id": "6 Bulan Support", "text_en": "6 Months Support", "included": True}, {"text_id": "Custom Features", "text_en": "Custom Features", "included": True}, {"text_id": "E-commerce", "text_en": "E-commerce", "included": True}], "is_popular": False, "order": 3}
-    ]
+    return _DEFAULT_PRICING.items
 
 # ==================== SITE SETTINGS MODEL ====================
 class SiteSettings(BaseModel):
@@ -1140,15 +4220,93 @@ class SiteSettings(BaseModel):
 
 
 # ==================== SITE SETTINGS ENDPOINTS ====================
-@api_router.get("/settings")
-async def get_site_settings():
-    settings = await db.site_settings.find_one({"_id": "site_settings"})
-    if settings:
-        settings.pop("_id", None)
-        return settings
-    # Return default settings
-    default = SiteSettings()
-    return default.model_dump()
+# Every SPA boot asks for /api/settings, so the serialized settings are kept
+# in-process and served without touching Mongo. After SETTINGS_CACHE_TTL the
+# stale copy is still served while one background task re-reads it; past
+# SETTINGS_CACHE_MAX_STALE the request waits for a fresh read instead. A
+# PUT replaces the cached copy before returning, so the instance that took
+# the write never serves the old settings; other instances catch up within
+# one TTL.
+#
+# The version is a short hash of the serialized body. It is sent as the
+# ETag and X-Settings-Version, and /api/settings?v=<version> is served with
+# an immutable Cache-Control so a client holding the current version can
+# skip the request entirely.
+
+SETTINGS_CACHE_TTL = float(os.environ.get("SETTINGS_CACHE_TTL", "60"))
+SETTINGS_CACHE_MAX_STALE = float(os.environ.get("SETTINGS_CACHE_MAX_STALE", "3600"))
+
+
+class _SettingsCache:
+    def __init__(self):
+        self.body: Optional[bytes] = None
+        self.version: Optional[str] = None
+        self.loaded_at = 0.0
+        self._refresh: Optional[asyncio.Task] = None
+        # Reads are numbered so a refresh that started before a PUT can't
+        # overwrite the copy the PUT stored
+        self._reads = 0
+        self._stored_read = 0
+
+    async def reload(self) -> None:
+        self._reads += 1
+        read = self._reads
+        settings = await db.site_settings.find_one({"_id": "site_settings"})
+        if settings:
+            settings.pop("_id", None)
+        else:
+            settings = SiteSettings().model_dump()
+        if read < self._stored_read:
+            return
+        self._stored_read = read
+        self.body = dumps_json(settings)
+        self.version = hashlib.sha256(self.body).hexdigest()[:16]
+        self.loaded_at = time.monotonic()
+
+    async def _background_refresh(self) -> None:
+        try:
+            await read_flights.do(("site_settings",), self.reload)
+        except Exception as e:
+            # Keep serving the stale copy; the next request past the TTL retries
+            logger.warning(f"Site settings refresh failed: {e}")
+
+    async def get(self) -> tuple:
+        age = time.monotonic() - self.loaded_at
+        if self.body is None or age >= SETTINGS_CACHE_MAX_STALE:
+            try:
+                await read_flights.do(("site_settings",), self.reload)
+            except Exception as e:
+                if self.body is None:
+                    raise
+                # Mongo is unreachable: an old copy beats an error page
+                logger.warning(f"Site settings reload failed, serving a copy {age:.0f}s old: {e}")
+        elif age >= SETTINGS_CACHE_TTL and (self._refresh is None or self._refresh.done()):
+            self._refresh = asyncio.get_running_loop().create_task(self._background_refresh())
+        return self.body, self.version
+
+
+settings_cache = _SettingsCache()
+
+
+@api_router.get("/settings", response_class=FastJSONResponse)
+async def get_site_settings(request: Request, v: Optional[str] = None):
+    body, version = await settings_cache.get()
+    etag = f'"{version}"'
+    headers = {"ETag": etag, "X-Settings-Version": version}
+    if v == version:
+        headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    elif v is not None:
+        # another instance has already seen newer settings; caching this
+        # body under their ?v= URL would pin the old settings there
+        headers["Cache-Control"] = "no-store"
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(body, headers=headers)
+
+@api_router.get("/settings/version")
+async def get_site_settings_version():
+    _, version = await settings_cache.get()
+    return {"version": version}
 
 @api_router.put("/settings")
 async def update_site_settings(settings: SiteSettings, current_user: dict = Depends(require_admin)):
@@ -1158,7 +4316,11 @@ async def update_site_settings(settings: SiteSettings, current_user: dict = Depe
         {"$set": settings_dict},
         upsert=True
     )
-    return {"message": "Settings updated successfully", "settings": settings_dict}
+    # $set keeps fields outside the model (e.g. google_site_verification), so
+    # re-read the stored document rather than caching settings_dict
+    await settings_cache.reload()
+    catalog_cache.invalidate("settings")
+    return {"message": "Settings updated successfully", "settings": settings_dict, "version": settings_cache.version}
 
 # ==================== DYNAMIC SITEMAP ====================
 @app.get("/sitemap.xml")
@@ -1409,19 +4571,13 @@ def _render_og_html(
     return Response(
         content=out,
         media_type="text/html; charset=utf-8",
-        headers={"Cache-Control": "public, max-age=0, must-revalidate"},
     )
 
 
 @app.get("/blog/{slug}")
 async def ssr_blog_detail(slug: str):
     """Serve the SPA with proper OG meta for blog post URLs."""
-    post = await db.blog.find_one({"slug": slug}, {"_id": 0})
-    if not post:
-        for p in get_default_blog_posts():
-            if p.get("slug") == slug:
-                post = p
-                break
+    post = await find_blog_post(slug)
 
     if not post:
         return _render_og_html(
@@ -1445,12 +4601,7 @@ async def ssr_blog_detail(slug: str):
 
 
 async def _template_ssr(slug: str, path_prefix: str):
-    template = await db.templates.find_one({"slug": slug}, {"_id": 0})
-    if not template:
-        for t in get_default_templates():
-            if t.get("slug") == slug:
-                template = t
-                break
+    template = await find_template(slug)
 
     if not template:
         return _render_og_html(
@@ -1502,9 +4653,5 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Settings-Version"],
 )
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
-
@@ -2,6 +2,12 @@
 import requests
 import sys
 import json
+import argparse
+import asyncio
+import hashlib
+import random
+import time
+from urllib.parse import urlparse
 from datetime import datetime
 
 class CallusDigitalAPITester:
@@ -326,11 +332,232 @@ class CallusDigitalAPITester:
         self.passed_tests.append("Resend Integration Setup Check")
         return True
 
+class CallusDigitalLoadTester:
+    """Async load mode: replays a weighted mix of user scenarios at a target
+    request rate (open loop, linear ramp-up) and reports per-endpoint
+    latency percentiles and error rates.
+
+    Scenarios are chains of requests a real visitor makes, so one "browse"
+    arrival costs two requests (list + detail).
+
+    429s from the API's per-IP rate limits are reported as "rate_limited",
+    not as errors: from a single host the checkout scenario exceeds the
+    create-token limit (10/min) almost at once. To measure checkout itself,
+    run against a test deployment started with RATE_LIMIT_ENABLED=false.
+    """
+
+    LOCAL_HOSTS = {"localhost", "127.0.0.1", "0.0.0.0", "::1"}
+
+    def __init__(self, base_url="http://localhost:8000", midtrans_server_key="", timeout=10.0):
+        self.base_url = base_url.rstrip("/")
+        self.midtrans_server_key = midtrans_server_key
+        self.timeout = timeout
+        self.samples = {}
+        self.template_slugs = []
+        self.blog_slugs = []
+        self.order_ids = []
+
+    async def request(self, client, endpoint, method, path, payload=None, params=None):
+        """Send one request and record its latency under `endpoint`."""
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, json=payload, params=params)
+            outcome = "ok" if response.status_code < 400 else "rate_limited" if response.status_code == 429 else "error"
+        except Exception:
+            response, outcome = None, "error"
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.samples.setdefault(endpoint, []).append((elapsed_ms, outcome))
+        return response if outcome == "ok" else None
+
+    async def discover(self, client):
+        """Fetch real slugs once so detail requests hit existing documents."""
+        templates = await client.get("/api/templates")
+        blog = await client.get("/api/blog", params={"limit": 50})
+        if templates.status_code == 200:
+            self.template_slugs = [t["slug"] for t in templates.json() if t.get("slug")]
+        if blog.status_code == 200:
+            self.blog_slugs = [p["slug"] for p in blog.json() if p.get("slug")]
+
+    async def scenario_browse(self, client):
+        await self.request(client, "GET /api/templates", "GET", "/api/templates")
+        if self.template_slugs:
+            slug = random.choice(self.template_slugs)
+            await self.request(client, "GET /api/templates/{slug}", "GET", f"/api/templates/{slug}")
+
+    async def scenario_blog(self, client):
+        await self.request(client, "GET /api/blog", "GET", "/api/blog", params={"limit": 10})
+        if self.blog_slugs:
+            slug = random.choice(self.blog_slugs)
+            await self.request(client, "GET /api/blog/{slug}", "GET", f"/api/blog/{slug}")
+
+    async def scenario_checkout(self, client):
+        order_id = f"LOAD-{int(time.time() * 1000)}-{random.randrange(10**6)}"
+        self.order_ids.append(order_id)
+        payload = {
+            "order_id": order_id,
+            "gross_amount": 750000,
+            "customer_email": "load@example.com",
+            "customer_name": "Load Test",
+            "item_details": [{"id": "corporate-pro", "price": 750000, "quantity": 1, "name": "Corporate Pro Business"}],
+        }
+        await self.request(client, "POST /api/payments/create-token", "POST", "/api/payments/create-token", payload)
+
+    async def scenario_webhook(self, client):
+        order_id = random.choice(self.order_ids) if self.order_ids else f"LOAD-{random.randrange(10**9)}"
+        gross_amount = "750000"
+        signature = hashlib.sha512(f"{order_id}200{gross_amount}{self.midtrans_server_key}".encode()).hexdigest()
+        payload = {
+            "order_id": order_id,
+            "status_code": "200",
+            "gross_amount": f"{gross_amount}.00",
+            "signature_key": signature,
+            "transaction_status": random.choice(["settlement", "pending", "expire"]),
+            "payment_type": "bank_transfer",
+        }
+        await self.request(client, "POST /api/webhooks/midtrans", "POST", "/api/webhooks/midtrans", payload)
+
+    SCENARIOS = {
+        "browse": "scenario_browse",
+        "blog": "scenario_blog",
+        "checkout": "scenario_checkout",
+        "webhook": "scenario_webhook",
+    }
+
+    async def run(self, mix, target_rps, duration, ramp_up=0.0, max_in_flight=500):
+        import httpx
+
+        names = list(mix)
+        weights = [mix[n] for n in names]
+        limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+        in_flight = asyncio.Semaphore(max_in_flight)
+        tasks = set()
+        dropped = 0
+
+        async def arrival(name):
+            async with in_flight:
+                await getattr(self, self.SCENARIOS[name])(client)
+
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=limits) as client:
+            await self.discover(client)
+            start = time.perf_counter()
+            next_at = start
+            while True:
+                now = time.perf_counter()
+                elapsed = now - start
+                if elapsed >= duration:
+                    break
+                # Linear ramp from ~0 to target_rps over ramp_up seconds
+                rate = target_rps * min(1.0, elapsed / ramp_up) if ramp_up > 0 else target_rps
+                rate = max(rate, 0.5)
+                if now < next_at:
+                    await asyncio.sleep(min(next_at - now, 0.05))
+                    continue
+                next_at += 1.0 / rate
+                if in_flight.locked():
+                    # The server can't keep up; count instead of queueing
+                    dropped += 1
+                    continue
+                task = asyncio.create_task(arrival(random.choices(names, weights)[0]))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            wall = time.perf_counter() - start
+        return self.report(wall, dropped)
+
+    @staticmethod
+    def _percentile(sorted_values, pct):
+        if not sorted_values:
+            return 0.0
+        index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+        return sorted_values[index]
+
+    def report(self, wall_seconds, dropped=0):
+        endpoints = {}
+        total = 0
+        for endpoint, samples in sorted(self.samples.items()):
+            latencies = sorted(ms for ms, _ in samples)
+            errors = sum(1 for _, outcome in samples if outcome == "error")
+            rate_limited = sum(1 for _, outcome in samples if outcome == "rate_limited")
+            total += len(samples)
+            endpoints[endpoint] = {
+                "requests": len(samples),
+                "errors": errors,
+                "error_rate": round(errors / len(samples), 4),
+                "rate_limited": rate_limited,
+                "p50_ms": round(self._percentile(latencies, 50), 1),
+                "p95_ms": round(self._percentile(latencies, 95), 1),
+                "p99_ms": round(self._percentile(latencies, 99), 1),
+                "max_ms": round(latencies[-1], 1),
+            }
+        return {
+            "base_url": self.base_url,
+            "duration_s": round(wall_seconds, 1),
+            "requests": total,
+            "achieved_rps": round(total / wall_seconds, 1) if wall_seconds else 0.0,
+            "dropped_arrivals": dropped,
+            "endpoints": endpoints,
+        }
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in CallusDigitalLoadTester.SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def run_load(args):
+    host = urlparse(args.base_url).hostname or ""
+    if host not in CallusDigitalLoadTester.LOCAL_HOSTS and not args.allow_remote:
+        print(f"❌ Refusing to load test {args.base_url}; point --base-url at a local server or pass --allow-remote")
+        return 2
+
+    print(f"🚀 Load testing {args.base_url} at {args.rps} rps for {args.duration}s (ramp-up {args.ramp_up}s)")
+    tester = CallusDigitalLoadTester(args.base_url, midtrans_server_key=args.midtrans_server_key)
+    report = asyncio.run(tester.run(args.mix, args.rps, args.duration, args.ramp_up, args.max_in_flight))
+
+    print(f"\n📊 {report['requests']} requests, {report['achieved_rps']} rps achieved, {report['dropped_arrivals']} arrivals dropped")
+    print(f"   {'endpoint':34} {'reqs':>6} {'err%':>6} {'429s':>6} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for endpoint, row in report["endpoints"].items():
+        print(f"   {endpoint:34} {row['requests']:>6} {row['error_rate'] * 100:>5.1f}% {row['rate_limited']:>6} "
+              f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f}")
+    if any(row["rate_limited"] for row in report["endpoints"].values()):
+        print("   429s are the API's per-IP rate limits; start the server with RATE_LIMIT_ENABLED=false to load test past them")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n   Report written to {args.output}")
+    return 0
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Calius Digital API tester")
+    parser.add_argument("--load", action="store_true", help="Run the async load generator instead of functional tests")
+    parser.add_argument("--base-url", default=None)
+    parser.add_argument("--rps", type=float, default=20.0, help="Target scenario arrivals per second")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds to run, including ramp-up")
+    parser.add_argument("--ramp-up", type=float, default=10.0)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("browse=5,blog=4,checkout=1,webhook=1"),
+                        help="Weighted scenarios, e.g. browse=5,blog=4,checkout=1,webhook=1")
+    parser.add_argument("--max-in-flight", type=int, default=500)
+    parser.add_argument("--midtrans-server-key", default="", help="Server key of the target, to sign webhook payloads")
+    parser.add_argument("--allow-remote", action="store_true")
+    parser.add_argument("--output", help="Write the load report as JSON")
+    args = parser.parse_args()
+
+    if args.load:
+        args.base_url = args.base_url or "http://localhost:8000"
+        return run_load(args)
+
     print("🚀 Starting Calius Digital API Testing...")
     print("=" * 60)
     
-    tester = CallusDigitalAPITester()
+    tester = CallusDigitalAPITester(args.base_url) if args.base_url else CallusDigitalAPITester()
     
     # Run all tests
     test_methods = [
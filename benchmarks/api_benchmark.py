@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""In-process API benchmark against a local Mongo stand-in.
+
+Boots the FastAPI app from api/index.py with its lifespan, points it at
+either a local mongod (--mongo-url) or an in-memory mongomock-motor client
+(default), seeds realistic volumes and drives the public, SSR, admin and
+webhook routes through httpx's ASGI transport. Per-endpoint throughput and
+p50/p95/p99 latency are written to JSON so runs can be diffed between
+commits with --compare.
+
+Usage:
+    python benchmarks/api_benchmark.py                       # mongomock, full volumes
+    python benchmarks/api_benchmark.py --mongo-url mongodb://localhost:27017
+    python benchmarks/api_benchmark.py --blog-posts 1000 --transactions 5000 --requests 50
+    python benchmarks/api_benchmark.py --compare benchmarks/results/api_benchmark.json
+
+mongomock is pure Python and copies every document it scans, so absolute
+numbers are only comparable with other mongomock runs and the full default
+volumes take minutes on the admin routes; use a real mongod for capacity
+numbers. The checked-in results/api_benchmark.json was produced with
+--blog-posts 2000 --transactions 10000 --requests 20 --concurrency 5.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "api"))
+
+SERVER_KEY = "benchmark-server-key"
+CATEGORIES = ["tips", "seo", "bisnis", "tutorial", "umkm"]
+PAYMENT_TYPES = ["bank_transfer", "gopay", "qris", "credit_card", "shopeepay"]
+STATUSES = ["success"] * 6 + ["pending"] * 2 + ["expired", "failed"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-url", help="Use a real mongod instead of mongomock-motor")
+    parser.add_argument("--blog-posts", type=int, default=10_000)
+    parser.add_argument("--transactions", type=int, default=100_000)
+    parser.add_argument("--templates", type=int, default=60)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--groups", default="public,ssr,admin,webhook")
+    parser.add_argument("--output", default=str(ROOT / "benchmarks" / "results" / "api_benchmark.json"))
+    parser.add_argument("--compare", help="Previous result JSON to diff against")
+    return parser.parse_args()
+
+
+def configure_env(args, db_name):
+    os.environ["MONGO_URL"] = args.mongo_url or "mongodb://localhost:27017"
+    os.environ["DB_NAME"] = db_name
+    os.environ["MIDTRANS_SERVER_KEY"] = SERVER_KEY
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+
+
+def blog_doc(i, now):
+    created = now - timedelta(minutes=i * 7)
+    body = "<p>Website profesional membantu bisnis Anda tampil meyakinkan di mesin pencari.</p>" * 30
+    return {
+        "id": str(uuid.uuid4()),
+        "slug": f"artikel-{i}",
+        "title_id": f"Artikel Panduan #{i}",
+        "title_en": f"Guide Article #{i}",
+        "excerpt_id": body[:160],
+        "excerpt_en": body[:160],
+        "content_id": body,
+        "content_en": body,
+        "image": f"https://res.cloudinary.com/calius/image/upload/blog/{i}.webp",
+        "author": "Calius Digital",
+        "category": CATEGORIES[i % len(CATEGORIES)],
+        "tags": ["website", "seo"],
+        "read_time": 6,
+        "status": "published",
+        "published_at": created.strftime("%Y-%m-%d"),
+        "created_at": created.isoformat(),
+        "createdAt": created.isoformat(),
+    }
+
+
+def template_doc(i, base):
+    return {**base, "id": str(uuid.uuid4()), "slug": f"{base['slug']}-{i}", "created_at": datetime.now(timezone.utc).isoformat()}
+
+
+def transaction_doc(i, now):
+    status = random.choice(STATUSES)
+    return {
+        "order_id": f"BENCH-{i:07d}",
+        "gross_amount": random.choice([350000, 450000, 600000, 750000, 950000]),
+        "customer_email": f"customer{i}@example.com",
+        "customer_name": f"Customer {i}",
+        "snap_token": uuid.uuid4().hex,
+        "status": status,
+        "payment_type": random.choice(PAYMENT_TYPES) if status != "pending" else None,
+        "created_at": (now - timedelta(minutes=i)).isoformat(),
+        "item_details": [{"id": "corporate-pro", "name": "Corporate Pro Business", "price": 750000, "quantity": 1}],
+    }
+
+
+async def insert_chunked(collection, docs_iter, total, chunk=2000):
+    batch = []
+    for doc in docs_iter:
+        batch.append(doc)
+        if len(batch) >= chunk:
+            await collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+    return total
+
+
+async def seed(index, args):
+    now = datetime.now(timezone.utc)
+    db = index.db
+    start = time.perf_counter()
+    await insert_chunked(db.blog, (blog_doc(i, now) for i in range(args.blog_posts)), args.blog_posts)
+    bases = [index.thaw(t) for t in index.get_default_templates()]
+    await insert_chunked(db.templates, (template_doc(i, bases[i % len(bases)]) for i in range(args.templates)), args.templates)
+    await insert_chunked(db.transactions, (transaction_doc(i, now) for i in range(args.transactions)), args.transactions)
+    await index.bootstrap_database()
+    admin_id = str(uuid.uuid4())
+    await db.users.insert_one({
+        "id": admin_id, "username": "bench-admin", "email": "bench@calius.digital",
+        "password": "x", "role": "admin", "is_active": True,
+    })
+    return admin_id, time.perf_counter() - start
+
+
+def webhook_body(order_id, gross_amount):
+    status_code = "200"
+    signature = hashlib.sha512(f"{order_id}{status_code}{gross_amount}{SERVER_KEY}".encode()).hexdigest()
+    return {
+        "order_id": order_id,
+        "status_code": status_code,
+        "gross_amount": f"{gross_amount}.00",
+        "signature_key": signature,
+        "transaction_status": random.choice(["settlement", "pending", "expire"]),
+        "payment_type": random.choice(PAYMENT_TYPES),
+    }
+
+
+def build_scenarios(args):
+    slug = lambda: f"artikel-{random.randrange(args.blog_posts)}"  # noqa: E731
+    tpl = lambda: f"corporate-pro-{random.randrange(args.templates)}"  # noqa: E731
+
+    def order():
+        i = random.randrange(args.transactions)
+        return f"BENCH-{i:07d}"
+
+    return {
+        "public": [
+            ("GET /api/", lambda: ("GET", "/api/", None)),
+            ("GET /api/settings", lambda: ("GET", "/api/settings", None)),
+            ("GET /api/services", lambda: ("GET", "/api/services", None)),
+            ("GET /api/templates", lambda: ("GET", "/api/templates", None)),
+            ("GET /api/templates?category", lambda: ("GET", "/api/templates?category=business", None)),
+            ("GET /api/blog", lambda: ("GET", "/api/blog?limit=10", None)),
+            ("GET /api/blog/{slug}", lambda: ("GET", f"/api/blog/{slug()}", None)),
+            ("GET /api/pricing", lambda: ("GET", "/api/pricing", None)),
+        ],
+        "ssr": [
+            ("GET /blog/{slug}", lambda: ("GET", f"/blog/{slug()}", None)),
+            ("GET /template/{slug}", lambda: ("GET", f"/template/{tpl()}", None)),
+            ("GET /sitemap.xml", lambda: ("GET", "/sitemap.xml", None)),
+        ],
+        "admin": [
+            ("GET /api/admin/stats", lambda: ("GET", "/api/admin/stats", None)),
+            ("GET /api/admin/orders", lambda: ("GET", "/api/admin/orders", None)),
+            ("GET /api/admin/orders/{id}", lambda: ("GET", f"/api/admin/orders/{order()}", None)),
+            ("GET /api/admin/export/orders", lambda: ("GET", "/api/admin/export/orders", None)),
+        ],
+        "webhook": [
+            ("POST /api/webhooks/midtrans", lambda: ("POST", "/api/webhooks/midtrans", webhook_body(order(), 750000))),
+        ],
+    }
+
+
+def percentile(sorted_samples, pct):
+    if not sorted_samples:
+        return 0.0
+    k = max(0, min(len(sorted_samples) - 1, int(round(pct / 100 * len(sorted_samples) + 0.5)) - 1))
+    return sorted_samples[k]
+
+
+async def run_endpoint(client, make_request, headers, total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one():
+        nonlocal errors
+        method, path, body = make_request()
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(method, path, json=body, headers=headers)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    wall = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / wall, 1),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def print_comparison(current, previous_path):
+    previous = json.loads(Path(previous_path).read_text())["results"]
+    print(f"\n{'endpoint':34} {'p95 before':>11} {'p95 after':>10} {'change':>8}")
+    for name, row in current.items():
+        old = previous.get(name)
+        if not old:
+            continue
+        change = (row["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 if old["p95_ms"] else 0.0
+        print(f"{name:34} {old['p95_ms']:>11.2f} {row['p95_ms']:>10.2f} {change:>+7.1f}%")
+
+
+async def main():
+    args = parse_args()
+    db_name = f"calius_bench_{int(time.time())}"
+    configure_env(args, db_name)
+    logging.disable(logging.WARNING)
+
+    import httpx
+    import index
+
+    if not args.mongo_url:
+        from mongomock_motor import AsyncMongoMockClient
+        index._mongo_client = AsyncMongoMockClient()
+
+    random.seed(42)
+    admin_id, seed_seconds = await seed(index, args)
+    headers = {"Authorization": f"Bearer {index.create_access_token({'sub': admin_id, 'role': 'admin'})}"}
+    scenarios = build_scenarios(args)
+
+    results = {}
+    transport = httpx.ASGITransport(app=index.app)
+    async with index.app.router.lifespan_context(index.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            for group in args.groups.split(","):
+                for name, make_request in scenarios[group]:
+                    # one untimed request so lazy imports / caches don't skew p99
+                    method, path, body = make_request()
+                    await client.request(method, path, json=body, headers=headers)
+                    row = await run_endpoint(client, make_request, headers, args.requests, args.concurrency)
+                    results[name] = {"group": group, **row}
+                    print(f"{name:34} {row['throughput_rps']:>8.1f} rps  p50 {row['p50_ms']:>8.2f}  "
+                          f"p95 {row['p95_ms']:>8.2f}  p99 {row['p99_ms']:>8.2f} ms  errors {row['errors']}")
+
+    if args.mongo_url:
+        await index.get_mongo_client().drop_database(db_name)
+
+    report = {
+        "benchmark": "api",
+        "git_revision": git_revision(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "backend": "mongod" if args.mongo_url else "mongomock-motor",
+        "volumes": {"blog_posts": args.blog_posts, "transactions": args.transactions, "templates": args.templates},
+        "seed_seconds": round(seed_seconds, 1),
+        "requests_per_endpoint": args.requests,
+        "concurrency": args.concurrency,
+        "results": results,
+    }
+    if args.compare:
+        print_comparison(results, args.compare)
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Cold-start import profile for the serverless entrypoint (api/index.py).
+
+Runs ``python -X importtime -c "import index"`` in a fresh interpreter a few
+times, folds the per-module cumulative times into top-level packages and
+reports where cold-start import time goes.
+
+Usage:
+    python benchmarks/import_profile.py [--runs 5] [--top 15] [--output FILE]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+API_DIR = ROOT / "api"
+
+
+def profile_once():
+    env = dict(os.environ)
+    env.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    env.setdefault("DB_NAME", "calius_benchmark")
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import index"],
+        cwd=API_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    # Lines look like "import time: self [us] | cumulative | <indent>module",
+    # with two spaces of indent per nesting level. Children are printed
+    # before their parent, so depth-1 entries seen since the previous
+    # depth-0 entry belong to "index".
+    packages = defaultdict(float)
+    index_total = 0.0
+    index_self = 0.0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        head, cumulative_us, field = line.split("|", 2)
+        self_us = head.replace("import time:", "")
+        name = field.strip()
+        depth = (len(field) - len(field.lstrip(" ")) - 1) // 2
+        if depth == 0:
+            if name == "index":
+                index_total = float(cumulative_us) / 1000
+                index_self = float(self_us) / 1000
+                break
+            packages.clear()
+        elif depth == 1:
+            packages[name.split(".")[0]] += float(cumulative_us) / 1000
+    packages["index (module body)"] = index_self
+    return wall_ms, index_total, packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", default=str(ROOT / "benchmarks" / "results" / "import_profile.json"))
+    args = parser.parse_args()
+
+    walls, totals = [], []
+    per_package = defaultdict(list)
+    for _ in range(args.runs):
+        wall_ms, index_total, packages = profile_once()
+        walls.append(wall_ms)
+        totals.append(index_total)
+        for pkg, ms in packages.items():
+            per_package[pkg].append(ms)
+
+    breakdown = sorted(
+        ({"package": pkg, "median_ms": round(statistics.median(v), 1)} for pkg, v in per_package.items()),
+        key=lambda r: r["median_ms"], reverse=True,
+    )
+    report = {
+        "benchmark": "import_profile",
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "process_wall_ms": round(statistics.median(walls), 1),
+        "import_index_ms": round(statistics.median(totals), 1),
+        "top_level_imports": breakdown[: args.top],
+    }
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+
+    print(f"process wall: {report['process_wall_ms']} ms, import index: {report['import_index_ms']} ms")
+    for row in report["top_level_imports"]:
+        print(f"  {row['package']:30} {row['median_ms']:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Midtrans APIs the backend calls.
+
+Implements just enough of Snap (POST /snap/v1/transactions) and the Core
+status API (GET /v2/{order_id}/status) to exercise checkout and the payment
+reconciler without sandbox credentials or network access. Orders live in
+memory; tests and load runs set their outcome through /_standin/orders.
+
+Usage:
+    python benchmarks/midtrans_standin.py --port 8899 --server-key test-key
+    MIDTRANS_API_BASE_URL=http://127.0.0.1:8899 MIDTRANS_SERVER_KEY=test-key ...
+
+In-process (no socket), as the reconciler accepts an httpx transport:
+    from midtrans_standin import create_app
+    transport = httpx.ASGITransport(app=create_app("test-key"))
+    await index.reconcile_pending_payments(transport=transport)
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class OrderOutcome(BaseModel):
+    transaction_status: str = "settlement"
+    payment_type: Optional[str] = "bank_transfer"
+    gross_amount: Optional[int] = None
+
+
+def create_app(server_key: str, latency_ms: float = 0) -> FastAPI:
+    app = FastAPI(title="Midtrans stand-in")
+    orders: Dict[str, dict] = {}
+    app.state.orders = orders
+
+    def check_auth(request: Request) -> None:
+        expected = "Basic " + base64.b64encode(f"{server_key}:".encode()).decode()
+        if request.headers.get("authorization") != expected:
+            raise HTTPException(status_code=401, detail="Unauthorized")
+
+    async def delay() -> None:
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+
+    def signature(order_id: str, status_code: str, gross_amount: str) -> str:
+        return hashlib.sha512(f"{order_id}{status_code}{gross_amount}{server_key}".encode()).hexdigest()
+
+    @app.post("/snap/v1/transactions", status_code=201)
+    async def create_transaction(request: Request):
+        check_auth(request)
+        await delay()
+        body = await request.json()
+        details = body.get("transaction_details") or {}
+        order_id = details.get("order_id")
+        if not order_id:
+            raise HTTPException(status_code=400, detail="transaction_details.order_id is required")
+        if order_id in orders:
+            # Snap rejects a reused order_id
+            return JSONResponse(status_code=400, content={"error_messages": ["transaction_details.order_id has already been taken"]})
+        token = str(uuid.uuid4())
+        orders[order_id] = {
+            "order_id": order_id,
+            "gross_amount": int(details.get("gross_amount") or 0),
+            "transaction_status": "pending",
+            "payment_type": None,
+            "token": token,
+            "transaction_time": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        return {"token": token, "redirect_url": f"http://midtrans.standin/snap/v2/vtweb/{token}"}
+
+    @app.get("/v2/{order_id}/status")
+    async def transaction_status(order_id: str, request: Request):
+        check_auth(request)
+        await delay()
+        order = orders.get(order_id)
+        if order is None:
+            return JSONResponse(status_code=404, content={"status_code": "404", "status_message": "Transaction doesn't exist."})
+        status_code = "201" if order["transaction_status"] == "pending" else "200"
+        gross_amount = f"{order['gross_amount']}.00"
+        return {
+            "status_code": status_code,
+            "transaction_id": str(uuid.uuid5(uuid.NAMESPACE_URL, order_id)),
+            "order_id": order_id,
+            "gross_amount": gross_amount,
+            "currency": "IDR",
+            "payment_type": order["payment_type"],
+            "transaction_time": order["transaction_time"],
+            "transaction_status": order["transaction_status"],
+            "fraud_status": "accept",
+            "signature_key": signature(order_id, status_code, gross_amount),
+        }
+
+    @app.post("/_standin/orders/{order_id}")
+    async def set_outcome(order_id: str, outcome: OrderOutcome):
+        order = orders.setdefault(order_id, {
+            "order_id": order_id,
+            "gross_amount": outcome.gross_amount or 0,
+            "token": None,
+            "transaction_time": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        })
+        order["transaction_status"] = outcome.transaction_status
+        order["payment_type"] = outcome.payment_type
+        if outcome.gross_amount is not None:
+            order["gross_amount"] = outcome.gross_amount
+        return order
+
+    @app.delete("/_standin/orders")
+    async def reset_orders():
+        orders.clear()
+        return {"success": True}
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--server-key", default="standin-server-key")
+    parser.add_argument("--latency-ms", type=float, default=0, help="added to every gateway call")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.server_key, args.latency_ms), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Serialization benchmark for the hot JSON read endpoints.
+
+Compares FastAPI's default response path (jsonable_encoder + stdlib json via
+JSONResponse) with FastJSONResponse (orjson, no jsonable_encoder) and with
+serving cached pre-serialized bytes, for payloads shaped like
+/api/blog, /api/templates and /api/admin/export/*.
+
+Usage:
+    python benchmarks/serialization_benchmark.py [--rounds 200] [--output FILE]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "api"))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "calius_benchmark")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+import index  # noqa: E402
+
+PARAGRAPH = (
+    "<p>Website profesional adalah investasi penting untuk bisnis di era digital. "
+    "Dengan desain responsif, SEO yang baik dan kecepatan loading tinggi, "
+    "calon pelanggan akan lebih mudah menemukan dan mempercayai brand Anda.</p>"
+)
+
+
+def make_blog_posts(n):
+    return [
+        {
+            "id": f"post-{i}",
+            "slug": f"artikel-panduan-{i}",
+            "title_id": f"Panduan Lengkap Website Bisnis #{i}",
+            "title_en": f"Complete Business Website Guide #{i}",
+            "excerpt_id": PARAGRAPH[:160],
+            "excerpt_en": PARAGRAPH[:160],
+            "content_id": PARAGRAPH * 40,
+            "content_en": PARAGRAPH * 40,
+            "image": f"https://res.cloudinary.com/calius/image/upload/blog/{i}.webp",
+            "featured_image_alt": "Ilustrasi artikel",
+            "author": "Calius Digital",
+            "category": "tips",
+            "tags": ["website", "seo", "bisnis", "umkm"],
+            "read_time": 8,
+            "seo_title": f"Panduan Website #{i}",
+            "seo_description": PARAGRAPH[:150],
+            "faq_items": [{"question": f"Pertanyaan {j}?", "answer": PARAGRAPH} for j in range(5)],
+            "published_at": "2026-01-15",
+            "created_at": "2026-01-15T08:00:00+00:00",
+        }
+        for i in range(n)
+    ]
+
+
+def make_templates(n):
+    base = list(index.get_default_templates())
+    return [dict(base[i % len(base)], id=f"tpl-{i}", slug=f"template-{i}") for i in range(n)]
+
+
+def make_orders(n):
+    return [
+        {
+            "order_id": f"CALIUS-{1700000000 + i}",
+            "gross_amount": 750000 + i,
+            "customer_email": f"customer{i}@example.com",
+            "customer_name": f"Customer {i}",
+            "snap_token": f"{i:032x}",
+            "status": "success" if i % 3 else "pending",
+            "created_at": "2026-02-01T10:00:00+00:00",
+            "item_details": [{"id": "corporate-pro", "name": "Corporate Pro Business", "price": 750000, "quantity": 1}],
+        }
+        for i in range(n)
+    ]
+
+
+def time_it(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "p50_ms": round(samples[len(samples) // 2], 4),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 4),
+    }
+
+
+def bench_payload(name, payload, rounds):
+    body = index.dumps_json(payload)
+    baseline = time_it(lambda: JSONResponse(jsonable_encoder(payload)), rounds)
+    fast = time_it(lambda: index.FastJSONResponse(payload), rounds)
+    cached = time_it(lambda: index.FastJSONResponse(body), rounds)
+    return {
+        "endpoint": name,
+        "payload_bytes": len(body),
+        "jsonable_encoder+json": baseline,
+        "fast_json": fast,
+        "cached_bytes": cached,
+        "speedup_fast": round(baseline["mean_ms"] / fast["mean_ms"], 1),
+        "speedup_cached": round(baseline["mean_ms"] / cached["mean_ms"], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--output", default=str(ROOT / "benchmarks" / "results" / "serialization.json"))
+    args = parser.parse_args()
+
+    cases = [
+        ("/api/blog?limit=50", make_blog_posts(50)),
+        ("/api/templates", make_templates(100)),
+        ("/api/admin/export/blog", {"data": make_blog_posts(1000), "count": 1000, "exported_at": "2026-02-01T10:00:00+00:00"}),
+        ("/api/admin/export/orders", {"data": make_orders(1000), "count": 1000, "exported_at": "2026-02-01T10:00:00+00:00"}),
+    ]
+    results = [bench_payload(name, payload, args.rounds) for name, payload in cases]
+
+    report = {
+        "benchmark": "serialization",
+        "encoder": "orjson" if index.orjson is not None else "json",
+        "python": sys.version.split()[0],
+        "rounds": args.rounds,
+        "results": results,
+    }
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+
+    print(f"{'endpoint':32} {'bytes':>10} {'default ms':>11} {'fast ms':>9} {'cached ms':>10}")
+    for r in results:
+        print(
+            f"{r['endpoint']:32} {r['payload_bytes']:>10} {r['jsonable_encoder+json']['mean_ms']:>11.3f}"
+            f" {r['fast_json']['mean_ms']:>9.3f} {r['cached_bytes']['mean_ms']:>10.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,85 +1,284 @@
 """
 ClipPremium License Code Generator
-Simple CSV generator for manual import to database
+Batch generator for license codes with an embedded keyed checksum
+
+Code format: CLIPPREM-PERS-2026-0000Z-ABCDE-FGHJK
+    PERS/AGNC/TEST  license type
+    2026            year
+    0000Z           serial number (5 Crockford base32 chars, up to 33,554,431)
+    ABCDE-FGHJK     first 50 bits of HMAC-SHA256(secret, "CLIPPREM-PERS-2026-0000Z")
+
+Anyone holding the secret (api/license/config.php LICENSE_CODE_SECRET, or the
+Python license router) can reject a mistyped or forged code without a
+database lookup. Codes are still unique per (type, year, serial), so keep
+start numbers from overlapping between batches, exactly as before.
+
+Usage:
+    python generate_license_codes.py                      # interactive
+    python generate_license_codes.py --type PERS --start 1 --quantity 1000000 \\
+        --secret "$CLIPPREM_LICENSE_SECRET" --formats csv,sql,json --workers 8
 """
 
-def generate_license_codes(start_num=1, license_type='PERS', year=2026, quantity=50):
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+CROCKFORD = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+SERIAL_CHARS = 5
+CHECK_CHARS = 10
+MAX_SERIAL = 32 ** SERIAL_CHARS - 1
+LICENSE_TYPES = {'PERS': 'personal', 'AGNC': 'agency', 'TEST': 'agency'}  # TEST as before: not PERS
+CODE_PATTERN = re.compile(r'^CLIPPREM-(PERS|AGNC|TEST)-\d{4}-[0-9A-HJKMNP-TV-Z]{5}-[0-9A-HJKMNP-TV-Z]{5}-[0-9A-HJKMNP-TV-Z]{5}$')
+
+BATCH_SIZE = 50_000         # codes per worker task
+SQL_ROWS_PER_INSERT = 1000  # rows per multi-value INSERT statement
+
+
+def encode_serial(serial):
+    chars = []
+    for _ in range(SERIAL_CHARS):
+        chars.append(CROCKFORD[serial & 31])
+        serial >>= 5
+    return ''.join(reversed(chars))
+
+
+def license_checksum(body, secret):
+    """10 Crockford chars from the first 50 bits of HMAC-SHA256(secret, body)"""
+    digest = hmac.new(secret, body.encode('ascii'), hashlib.sha256).digest()
+    value = int.from_bytes(digest[:7], 'big') >> 6
+    return ''.join(CROCKFORD[(value >> (5 * i)) & 31] for i in range(CHECK_CHARS - 1, -1, -1))
+
+
+def make_code(license_type, year, serial, secret):
+    body = f'CLIPPREM-{license_type}-{year}-{encode_serial(serial)}'
+    check = license_checksum(body, secret)
+    return f'{body}-{check[:5]}-{check[5:]}'
+
+
+def verify_code(code, secret):
+    """True if code is well-formed and its checksum matches; no database needed"""
+    if not CODE_PATTERN.match(code):
+        return False
+    body, check = code[:-12], code[-11:].replace('-', '')
+    return hmac.compare_digest(license_checksum(body, secret), check)
+
+
+def _generate_batch(args):
+    license_type, year, first, count, secret = args
+    body_prefix = f'CLIPPREM-{license_type}-{year}-'
+    # keyed once; copy() skips re-deriving the HMAC pads per code
+    keyed = hmac.new(secret, body_prefix.encode('ascii'), hashlib.sha256)
+    pairs = [a + b for a in CROCKFORD for b in CROCKFORD]  # 10 bits -> 2 chars
+    codes = []
+    append = codes.append
+    for serial in range(first, first + count):
+        serial_chars = CROCKFORD[serial >> 20 & 31] + pairs[serial >> 10 & 1023] + pairs[serial & 1023]
+        mac = keyed.copy()
+        mac.update(serial_chars.encode('ascii'))
+        v = int.from_bytes(mac.digest()[:7], 'big') >> 6
+        middle = pairs[v >> 20 & 1023]
+        append(f'{body_prefix}{serial_chars}-{pairs[v >> 40]}{pairs[v >> 30 & 1023]}{middle[0]}-'
+               f'{middle[1]}{pairs[v >> 10 & 1023]}{pairs[v & 1023]}')
+    return codes
+
+
+def iter_batches(start_num, license_type, year, quantity, secret, workers=None, batch_size=BATCH_SIZE):
     """
-    Generate license codes in CSV format
-    
+    Yield lists of codes in serial order, generated in parallel
+
     Args:
-        start_num: Starting number (e.g., 1, 11, 101)
-        license_type: 'PERS' (Personal) or 'AGNC' (Agency)
-        year: Year of generation (default: 2026)
+        start_num: First serial number (e.g., 1, 10001)
+        license_type: 'PERS', 'AGNC' or 'TEST'
+        year: Year of generation
         quantity: How many codes to generate
-    
+        secret: Checksum key (bytes)
+        workers: Worker processes (default: CPU count; 1 = in-process)
+        batch_size: Codes per worker task
+    """
+    if license_type not in LICENSE_TYPES:
+        raise ValueError(f'Unknown license type: {license_type}')
+    if start_num < 0 or start_num + quantity - 1 > MAX_SERIAL:
+        raise ValueError(f'Serial numbers must stay within 0..{MAX_SERIAL}')
+    tasks = [
+        (license_type, year, first, min(batch_size, start_num + quantity - first), secret)
+        for first in range(start_num, start_num + quantity, batch_size)
+    ]
+    if workers == 1 or len(tasks) == 1:
+        for task in tasks:
+            yield _generate_batch(task)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() keeps batch order, so output files stay sorted by serial
+        yield from pool.map(_generate_batch, tasks)
+
+
+def generate_license_codes(start_num=1, license_type='PERS', year=2026, quantity=50, secret=None):
+    """
+    Generate license codes in memory (small batches)
+
     Returns:
-        List of tuples (code, type_full, status, notes, sql_statement)
+        List of dicts (code, type, status, notes)
     """
-    type_full = 'personal' if license_type == 'PERS' else 'agency'
-    codes = []
-    
-    for i in range(quantity):
-        num = str(start_num + i).zfill(4)
-        code = f'CLIPPREM-{license_type}-{year}-{num}'
-        
-        sql = f"('{code}', '{type_full}', 'unused', 'Batch {year}-01-09'),"
-        
-        codes.append({
-            'code': code,
-            'type': type_full,
-            'status': 'unused',
-            'notes': f'Generated {year}-01-09',
-            'sql': sql
-        })
-    
-    return codes
+    secret = secret or load_secret()
+    notes = f'Batch {date.today().isoformat()}'
+    type_full = LICENSE_TYPES[license_type]
+    return [
+        {'code': code, 'type': type_full, 'status': 'unused', 'notes': notes}
+        for batch in iter_batches(start_num, license_type, year, quantity, secret, workers=1)
+        for code in batch
+    ]
 
-def save_to_files(codes, prefix='license_codes'):
-    """Save codes to CSV and SQL files"""
-    
-    # CSV file
-    csv_filename = f'{prefix}.csv'
-    with open(csv_filename, 'w', encoding='utf-8') as f:
-        f.write('license_code,license_type,status,notes\\n')
-        for code_data in codes:
-            f.write(f'{code_data["code"]},{code_data["type"]},{code_data["status"]},{code_data["notes"]}\\n')
-    
-    # SQL file
-    sql_filename = f'{prefix}.sql'
-    with open(sql_filename, 'w', encoding='utf-8') as f:
-        f.write('-- ClipPremium License Codes\\n')
-        f.write('-- Generated: 2026-01-09\\n\\n')
-        f.write('INSERT INTO license_codes (license_code, license_type, status, notes) VALUES\\n')
-        for i, code_data in enumerate(codes):
-            sql_line = code_data['sql']
-            if i == len(codes) - 1:
-                sql_line = sql_line.rstrip(',') + ';'
-            f.write(sql_line + '\\n')
-    
-    return csv_filename, sql_filename
 
-if __name__ == '__main__':
-    print('ClipPremium License Code Generator')
-    print('=' * 50)
-    
-    # Configuration
+class CsvWriter:
+    extension = 'csv'
+
+    def __init__(self, f, type_full, notes):
+        self.f = f
+        self.suffix = f',{type_full},unused,{notes}\n'
+        f.write('license_code,license_type,status,notes\n')
+
+    def write(self, codes):
+        self.f.write(self.suffix.join(codes) + self.suffix)
+
+    def close(self):
+        pass
+
+
+class SqlWriter:
+    extension = 'sql'
+
+    def __init__(self, f, type_full, notes, rows_per_insert=SQL_ROWS_PER_INSERT):
+        self.f = f
+        self.rows_per_insert = rows_per_insert
+        self.suffix = f"', '{type_full}', 'unused', '{notes}')"
+        self.pending = []
+        f.write('-- ClipPremium License Codes\n')
+        f.write(f'-- Generated: {date.today().isoformat()}\n\n')
+
+    def _flush(self, rows):
+        self.f.write('INSERT INTO license_codes (license_code, license_type, status, notes) VALUES\n')
+        self.f.write(',\n'.join(rows))
+        self.f.write(';\n')
+
+    def write(self, codes):
+        self.pending.extend(f"('{code}{self.suffix}" for code in codes)
+        while len(self.pending) >= self.rows_per_insert:
+            self._flush(self.pending[:self.rows_per_insert])
+            del self.pending[:self.rows_per_insert]
+
+    def close(self):
+        if self.pending:
+            self._flush(self.pending)
+            self.pending = []
+
+
+class JsonWriter:
+    extension = 'json'
+
+    def __init__(self, f, type_full, notes):
+        self.f = f
+        # codes are plain ASCII, so only the constant tail needs json.dumps
+        self.row = '{"license_code":"%s",' + json.dumps(
+            {'license_type': type_full, 'status': 'unused', 'notes': notes}, separators=(',', ':'))[1:]
+        self.first = True
+        f.write('[\n')
+
+    def write(self, codes):
+        rows = ',\n'.join(self.row % code for code in codes)
+        self.f.write(rows if self.first else ',\n' + rows)
+        self.first = False
+
+    def close(self):
+        self.f.write('\n]\n')
+
+
+WRITERS = {'csv': CsvWriter, 'sql': SqlWriter, 'json': JsonWriter}
+
+
+def save_to_files(batches, license_type, prefix='license_codes', formats=('csv', 'sql'), notes=None):
+    """Stream code batches to one file per format; returns (filenames, count)"""
+    type_full = LICENSE_TYPES[license_type]
+    notes = notes or f'Batch {date.today().isoformat()}'
+    files, writers = [], []
+    try:
+        for fmt in formats:
+            filename = f'{prefix}.{WRITERS[fmt].extension}'
+            f = open(filename, 'w', encoding='utf-8', newline='\n')
+            files.append(f)
+            writers.append(WRITERS[fmt](f, type_full, notes))
+        count = 0
+        for codes in batches:
+            for writer in writers:
+                writer.write(codes)
+            count += len(codes)
+        for writer in writers:
+            writer.close()
+    finally:
+        for f in files:
+            f.close()
+    return [f.name for f in files], count
+
+
+def load_secret(value=None):
+    secret = value or os.environ.get('CLIPPREM_LICENSE_SECRET', '')
+    if not secret:
+        raise SystemExit('Set CLIPPREM_LICENSE_SECRET or pass --secret (same value as LICENSE_CODE_SECRET in config.php)')
+    return secret.encode('utf-8')
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--start', type=int, default=1, help='first serial number')
+    parser.add_argument('--type', default='PERS', choices=sorted(LICENSE_TYPES))
+    parser.add_argument('--year', type=int, default=date.today().year)
+    parser.add_argument('--quantity', type=int, default=50)
+    parser.add_argument('--secret', help='checksum key (default: $CLIPPREM_LICENSE_SECRET)')
+    parser.add_argument('--formats', default='csv,sql', help='comma-separated: csv,sql,json')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--prefix', help='output file prefix (default: clippremium_<type>_<year>)')
+    return parser.parse_args(argv)
+
+
+def prompt_args():
     start_num = int(input('Starting Number (e.g., 1, 11, 101): ') or '1')
     license_type = input('License Type (PERS/AGNC): ').upper() or 'PERS'
     year = int(input('Year (e.g., 2026): ') or '2026')
     quantity = int(input('Quantity (e.g., 50): ') or '50')
-    
-    print(f'\\nGenerating {quantity} codes...')
-    codes = generate_license_codes(start_num, license_type, year, quantity)
-    
-    csv_file, sql_file = save_to_files(codes, f'clippremium_{license_type.lower()}_{year}')
-    
-    print(f'\\n✅ Generated {len(codes)} codes:')
-    print(f'   📄 CSV: {csv_file}')
-    print(f'   📄 SQL: {sql_file}')
-    print(f'\\nFirst 5 codes:')
-    for code in codes[:5]:
-        print(f'   - {code["code"]}')
-    
-    print(f'\\n🚀 Upload SQL file to phpMyAdmin or run:')
-    print(f'   mysql -u username -p database_name < {sql_file}')
+    return parse_args(['--start', str(start_num), '--type', license_type, '--year', str(year), '--quantity', str(quantity)])
+
+
+if __name__ == '__main__':
+    print('ClipPremium License Code Generator')
+    print('=' * 50)
+
+    args = parse_args(sys.argv[1:]) if len(sys.argv) > 1 else prompt_args()
+    secret = load_secret(args.secret)
+    formats = [fmt.strip() for fmt in args.formats.split(',') if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in WRITERS]
+    if unknown:
+        raise SystemExit(f'Unknown format(s): {", ".join(unknown)}')
+    if args.quantity < 1:
+        raise SystemExit('--quantity must be at least 1')
+    prefix = args.prefix or f'clippremium_{args.type.lower()}_{args.year}'
+
+    print(f'\nGenerating {args.quantity} codes...')
+    batches = iter_batches(args.start, args.type, args.year, args.quantity, secret, workers=args.workers)
+    filenames, count = save_to_files(batches, args.type, prefix, formats)
+
+    print(f'\n✅ Generated {count} codes:')
+    for filename in filenames:
+        print(f'   📄 {filename}')
+    print(f'\nFirst 5 codes:')
+    for code in next(iter_batches(args.start, args.type, args.year, min(5, args.quantity), secret, workers=1), []):
+        print(f'   - {code}')
+
+    sql_file = f'{prefix}.sql'
+    if 'sql' in formats:
+        print(f'\n🚀 Upload SQL file to phpMyAdmin or run:')
+        print(f'   mysql -u username -p database_name < {sql_file}')
@@ -0,0 +1,152 @@
+"""
+ClipPremium License Import (MySQL / generator batches -> MongoDB)
+Copies the PHP license database into the collections the Python license API
+reads (api/_license.py), so existing customers keep their paid licenses and
+used codes stay used, and loads new generator batches as unused codes. The
+API only accepts codes that are in license_codes; codes are never committed
+or bundled with the deployment.
+
+Run it before setting LICENSE_API_ENABLED=true on an existing install; until
+then /api/license/check would hand every known HWID a fresh trial. Re-running
+is safe: licenses and used codes are replaced by HWID / license_code, so run
+it once more right before switching the clients over.
+
+Export both tables from phpMyAdmin as CSV with the column names in the first
+row (Export -> CSV -> "Put columns names in the first row"), then:
+    python import_licenses_to_mongo.py --licenses licenses.csv --codes license_codes.csv \\
+        --mongo-url "$MONGO_URL" --db "$DB_NAME"
+
+New batches from generate_license_codes.py (its CSV or JSON output) are
+added as unused codes; a code that is already in Mongo is left as it is:
+    python import_licenses_to_mongo.py --generated clippremium_pers_2026.csv
+
+Unused MySQL codes are inserted the same way, so re-running the MySQL import
+never resets a code that was activated through the API. Running instances
+pick up new codes within LICENSE_CODE_INDEX_TTL (POST
+/api/admin/license/reload-index reloads the one that answers it).
+
+Timestamps are copied as the Asia/Jakarta wall-clock values MySQL stores
+(no offset); the API reads them that way.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from pathlib import Path
+
+NULLS = {'', 'NULL', '\\N'}
+BATCH_SIZE = 1000
+
+
+def value(row, column):
+    raw = row.get(column)
+    return None if raw is None or raw in NULLS else raw
+
+
+def timestamp(row, column):
+    raw = value(row, column)
+    return raw.replace(' ', 'T') if raw else None
+
+
+def number(row, column, default=0):
+    raw = value(row, column)
+    return int(float(raw)) if raw is not None else default
+
+
+def license_doc(row):
+    """licenses row -> {_id: hwid, ...} as get_or_create_license() and activate write it"""
+    return {
+        '_id': row['hwid'].strip(),
+        'license_type': value(row, 'license_type') or 'trial',
+        'email': value(row, 'email'),
+        'license_code': value(row, 'license_code'),
+        'activated_at': timestamp(row, 'activated_at'),
+        'videos_used': number(row, 'videos_used'),
+        'videos_remaining': number(row, 'videos_remaining'),
+        'payment_status': value(row, 'payment_status'),
+        'payment_amount': number(row, 'payment_amount', None),
+        'expires_at': timestamp(row, 'expires_at'),
+        'created_at': timestamp(row, 'created_at'),
+        'updated_at': timestamp(row, 'updated_at'),
+        'source': 'mysql',
+    }
+
+
+def code_doc(row, source='mysql'):
+    """license_codes row (MySQL export or generator output) -> license_codes doc"""
+    return {
+        '_id': row['license_code'].strip().upper(),
+        'license_type': value(row, 'license_type'),
+        'status': value(row, 'status') or 'unused',
+        'activated_by_hwid': value(row, 'activated_by_hwid'),
+        'activated_by_email': value(row, 'buyer_email'),
+        'activated_at': timestamp(row, 'activated_at'),
+        'order_id': value(row, 'order_id'),
+        'source': source,
+    }
+
+
+def read_rows(path):
+    """Rows of a CSV export, or of the generator's JSON output"""
+    if Path(path).suffix == '.json':
+        with open(path, encoding='utf-8') as f:
+            yield from json.load(f)
+        return
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        yield from csv.DictReader(f)
+
+
+def import_docs(collection, docs):
+    """Upsert by _id. Used and revoked docs replace what is there; unused
+    ones are only inserted, so an activation made through the API stays."""
+    from pymongo import ReplaceOne, UpdateOne
+    count, ops = 0, []
+    for doc in docs:
+        if doc.get('status') == 'unused':
+            ops.append(UpdateOne({'_id': doc['_id']}, {'$setOnInsert': doc}, upsert=True))
+        else:
+            ops.append(ReplaceOne({'_id': doc['_id']}, doc, upsert=True))
+        if len(ops) >= BATCH_SIZE:
+            collection.bulk_write(ops, ordered=False)
+            count += len(ops)
+            ops = []
+    if ops:
+        collection.bulk_write(ops, ordered=False)
+        count += len(ops)
+    return count
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--licenses', help='CSV export of the MySQL licenses table')
+    parser.add_argument('--codes', help='CSV export of the MySQL license_codes table')
+    parser.add_argument('--generated', nargs='+', default=[], help='generate_license_codes.py CSV/JSON batches')
+    parser.add_argument('--mongo-url', default=os.environ.get('MONGO_URL'))
+    parser.add_argument('--db', default=os.environ.get('DB_NAME'))
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args(sys.argv[1:])
+    if not args.mongo_url or not args.db:
+        raise SystemExit('Set MONGO_URL and DB_NAME or pass --mongo-url and --db')
+    if not (args.licenses or args.codes or args.generated):
+        raise SystemExit('Nothing to import: pass --licenses/--codes and/or --generated')
+    from pymongo import MongoClient
+    db = MongoClient(args.mongo_url)[args.db]
+
+    print('ClipPremium License Import')
+    print('=' * 50)
+    if args.licenses:
+        licenses = import_docs(db.licenses, (license_doc(row) for row in read_rows(args.licenses)))
+        print(f'✅ {licenses} licenses')
+    if args.codes:
+        codes = import_docs(db.license_codes, (code_doc(row) for row in read_rows(args.codes)))
+        print(f'✅ {codes} codes from MySQL')
+    for path in args.generated:
+        codes = import_docs(db.license_codes, (code_doc(row, 'generator') for row in read_rows(path)))
+        print(f'✅ {codes} codes from {path}')
+    if args.licenses:
+        print('\nNow set LICENSE_API_ENABLED=true for the API.')
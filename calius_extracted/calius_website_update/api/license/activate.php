@@ -96,7 +96,7 @@ if (empty($license_code) || !validate_license_code($license_code)) {
         'ok' => false,
         'status' => 'error',
         'code' => 'INVALID_FORMAT',
-        'message' => 'Format kode lisensi tidak valid. Expected: CLIPPREM-XXXX-2026-0000'
+        'message' => 'Kode lisensi tidak valid. Periksa kembali kode Anda (CLIPPREM-XXXX-2026-XXXXX-XXXXX-XXXXX).'
     ], 400);
 }
 
@@ -16,6 +16,7 @@ define('DB_CHARSET', 'utf8mb4');
 
 // Security Settings
 define('API_SECRET_KEY', 'clip_premium_2026_secret_key_change_this');  // ← GANTI dengan random string
+define('LICENSE_CODE_SECRET', 'YOUR_LICENSE_CODE_SECRET_HERE');  // ← sama dengan CLIPPREM_LICENSE_SECRET di generate_license_codes.py
 define('MAX_REQUESTS_PER_HOUR', 100);   // Per HWID
 define('MAX_REQUESTS_PER_IP', 500);     // Per IP address
 define('ENABLE_REQUEST_LOGGING', true); // Log all API requests
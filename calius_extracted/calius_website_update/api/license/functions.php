@@ -115,15 +115,50 @@ function validate_hwid($hwid) {
  * @return bool
  */
 function validate_license_code($code) {
-    // Format: CLIPPREM-XXXX-2026-0000
+    // Current format: CLIPPREM-XXXX-2026-SSSSS-CCCCC-CCCCC
     // XXXX = PERS (Personal) or AGNC (Agency) or TEST (Test)
-    // 2026 = Year
-    // 0000 = Sequential number (0001-9999)
+    // SSSSS = Serial number (Crockford base32)
+    // CCCCC-CCCCC = Keyed checksum, see verify_license_checksum()
+    if (preg_match('/^CLIPPREM-(PERS|AGNC|TEST)-\d{4}-[0-9A-HJKMNP-TV-Z]{5}-[0-9A-HJKMNP-TV-Z]{5}-[0-9A-HJKMNP-TV-Z]{5}$/', $code)) {
+        return verify_license_checksum($code);
+    }
     
+    // Legacy format: CLIPPREM-XXXX-2026-0000 (sequential, no checksum;
+    // only the database can tell whether it was issued)
     $pattern = '/^CLIPPREM-(PERS|AGNC|TEST)-\d{4}-\d{4}$/';
     return preg_match($pattern, $code);
 }
 
+/**
+ * Verify the checksum embedded by _tools/generate_license_codes.py
+ * Rejects mistyped or forged codes without a database query
+ * 
+ * @param string $code CLIPPREM-XXXX-2026-SSSSS-CCCCC-CCCCC
+ * @return bool
+ */
+function verify_license_checksum($code) {
+    // Without the real secret every checksum would be computed with a
+    // published key, so refuse instead of accepting forged codes
+    if (LICENSE_CODE_SECRET === '' || LICENSE_CODE_SECRET === 'YOUR_LICENSE_CODE_SECRET_HERE') {
+        error_log('LICENSE_CODE_SECRET is not set in config.php; rejecting license codes');
+        return false;
+    }
+    
+    $alphabet = '0123456789ABCDEFGHJKMNPQRSTVWXYZ';
+    $body = substr($code, 0, -12);
+    $check = str_replace('-', '', substr($code, -11));
+    
+    // First 50 bits of HMAC-SHA256(secret, body) as 10 base32 characters
+    $digest = hash_hmac('sha256', $body, LICENSE_CODE_SECRET, true);
+    $value = hexdec(bin2hex(substr($digest, 0, 7))) >> 6;
+    $expected = '';
+    for ($i = 9; $i >= 0; $i--) {
+        $expected .= $alphabet[($value >> (5 * $i)) & 31];
+    }
+    
+    return hash_equals($expected, $check);
+}
+
 /**
  * Get or Create License
  * @param string $hwid
@@ -1,8 +1,30 @@
-import React, { createContext, useContext, useState, useEffect } from 'react';
+import React, { createContext, useCallback, useContext, useState, useEffect } from 'react';
 import { apiService } from '@/services/api';
 
 const SiteSettingsContext = createContext(null);
 
+const SETTINGS_STORAGE_KEY = 'site_settings';
+
+const readCachedSettings = () => {
+  try {
+    const cached = JSON.parse(localStorage.getItem(SETTINGS_STORAGE_KEY));
+    return cached && cached.settings ? cached : null;
+  } catch (error) {
+    return null;
+  }
+};
+
+const writeCachedSettings = (settings, version) => {
+  try {
+    localStorage.setItem(
+      SETTINGS_STORAGE_KEY,
+      JSON.stringify({ settings, version, savedAt: Date.now() })
+    );
+  } catch (error) {
+    // Storage full or disabled; the next visit simply fetches again
+  }
+};
+
 export const SiteSettingsProvider = ({ children }) => {
   const [settings, setSettings] = useState({
     logo_url: '',
@@ -18,32 +40,51 @@ export const SiteSettingsProvider = ({ children }) => {
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
+    const applySettings = (next) => {
+      setSettings(prev => ({ ...prev, ...next }));
+
+      // Update favicon dynamically
+      if (next.favicon_url) {
+        updateFavicon(next.favicon_url);
+      }
+
+      // Update document title
+      if (next.site_name) {
+        document.title = next.site_name;
+      }
+
+      // Update google-site-verification meta tag
+      if (next.google_site_verification) {
+        let metaTag = document.querySelector('meta[name="google-site-verification"]');
+        if (!metaTag) {
+          metaTag = document.createElement('meta');
+          metaTag.name = 'google-site-verification';
+          document.head.appendChild(metaTag);
+        }
+        metaTag.content = next.google_site_verification;
+      }
+    };
+
+    // Render from the last known settings straight away, then ask for the
+    // current version (a tiny response the CDN purges on every settings
+    // write). The body is only fetched when the version changed, from the
+    // immutable /settings?v=<version> URL.
+    const cached = readCachedSettings();
+    if (cached) {
+      applySettings(cached.settings);
+      setLoading(false);
+    }
+
     const fetchSettings = async () => {
       try {
-        const response = await apiService.getSettings();
+        const current = await apiService.getSettingsVersion();
+        if (cached && current && current === cached.version) {
+          return;
+        }
+        const { settings: response, version } = await apiService.getSettings(current);
         if (response) {
-          setSettings(prev => ({ ...prev, ...response }));
-          
-          // Update favicon dynamically
-          if (response.favicon_url) {
-            updateFavicon(response.favicon_url);
-          }
-          
-          // Update document title
-          if (response.site_name) {
-            document.title = response.site_name;
-          }
-
-          // Update google-site-verification meta tag
-          if (response.google_site_verification) {
-            let metaTag = document.querySelector('meta[name="google-site-verification"]');
-            if (!metaTag) {
-              metaTag = document.createElement('meta');
-              metaTag.name = 'google-site-verification';
-              document.head.appendChild(metaTag);
-            }
-            metaTag.content = response.google_site_verification;
-          }
+          applySettings(response);
+          writeCachedSettings(response, version || current);
         }
       } catch (error) {
         console.error('Failed to fetch site settings:', error);
@@ -74,8 +115,19 @@ export const SiteSettingsProvider = ({ children }) => {
     document.head.appendChild(appleLink);
   };
 
+  // Lets pages that already fetched the settings (the homepage bootstrap)
+  // refresh the stored copy without another request
+  const primeSettings = useCallback((next, version) => {
+    if (!next) return;
+    const cached = readCachedSettings();
+    if (!cached || !version || version !== cached.version) {
+      setSettings(prev => ({ ...prev, ...next }));
+    }
+    writeCachedSettings(next, version);
+  }, []);
+
   return (
-    <SiteSettingsContext.Provider value={{ settings, loading }}>
+    <SiteSettingsContext.Provider value={{ settings, loading, primeSettings }}>
       {children}
     </SiteSettingsContext.Provider>
   );
@@ -94,6 +94,7 @@ const BlogDetailPage = () => {
         const data = await apiService.getBlogPost(slug);
         if (cancelled) return;
         setPost(data);
+        apiService.trackEvent('view', slug);
         // fetch related posts in same category
         try {
           const related = await apiService.getBlogPosts(data.category, 4);
@@ -4,6 +4,7 @@ import { motion } from 'framer-motion';
 import { ArrowRight, Star, Building2, ShoppingCart, Rocket, Code2, ChevronRight, Download, ExternalLink } from 'lucide-react';
 import { Helmet } from 'react-helmet-async';
 import { useLanguage } from '@/context/LanguageContext';
+import { useSiteSettings } from '@/context/SiteSettingsContext';
 import { apiService } from '@/services/api';
 import { Button } from '@/components/ui/button';
 
@@ -25,6 +26,7 @@ const formatPrice = (price) => {
 
 const HomePage = () => {
   const { t, language } = useLanguage();
+  const { primeSettings } = useSiteSettings();
   const [services, setServices] = useState([]);
   const [templates, setTemplates] = useState([]);
   const [testimonials, setTestimonials] = useState([]);
@@ -33,12 +35,20 @@ const HomePage = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [servicesData, templatesData, testimonialsData, portfolioData] = await Promise.all([
-          apiService.getServices(),
-          apiService.getTemplates(),
-          apiService.getTestimonials(),
-          apiService.getPortfolio(),
-        ]);
+        let servicesData, templatesData, testimonialsData, portfolioData;
+        try {
+          const bootstrap = await apiService.getBootstrap();
+          primeSettings(bootstrap.settings, bootstrap.settings_version);
+          ({ services: servicesData, templates: templatesData, testimonials: testimonialsData, portfolio: portfolioData } = bootstrap);
+        } catch (error) {
+          // Older API without /bootstrap: fall back to the per-collection calls
+          [servicesData, templatesData, testimonialsData, portfolioData] = await Promise.all([
+            apiService.getServices(),
+            apiService.getTemplates(),
+            apiService.getTestimonials(),
+            apiService.getPortfolio(),
+          ]);
+        }
         setServices((servicesData || []).slice(0, 4));
         setTemplates((templatesData || []).filter(t => t.is_featured).slice(0, 3));
         setTestimonials((testimonialsData || []).slice(0, 3));
@@ -48,7 +58,7 @@ const HomePage = () => {
       }
     };
     fetchData();
-  }, []);
+  }, [primeSettings]);
 
   return (
     <div className="bg-[#050505]">
@@ -4,6 +4,7 @@ import { motion } from 'framer-motion';
 import { Star, Download, ExternalLink, ShoppingCart, ChevronRight, ArrowLeft } from 'lucide-react';
 import { useLanguage } from '@/context/LanguageContext';
 import { apiService } from '@/services/api';
+import { checkoutOrderId, endCheckout } from '@/services/checkoutSession';
 import { Button } from '@/components/ui/button';
 import {
   Dialog,
@@ -255,6 +256,11 @@ const TemplateCategoryPage = () => {
     setCheckoutOpen(true);
   };
 
+  const handleCheckoutOpenChange = (open) => {
+    if (!open) endCheckout();
+    setCheckoutOpen(open);
+  };
+
   const handleCheckout = async () => {
     if (!checkoutForm.name || !checkoutForm.email) {
       toast({
@@ -267,11 +273,8 @@ const TemplateCategoryPage = () => {
 
     setProcessing(true);
     try {
-      const orderId = `TPL-${Date.now()}`;
       const amount = selectedTemplate.sale_price || selectedTemplate.price;
-
-      const response = await apiService.createPaymentToken({
-        order_id: orderId,
+      const payload = {
         gross_amount: amount,
         customer_email: checkoutForm.email,
         customer_name: checkoutForm.name,
@@ -282,7 +285,9 @@ const TemplateCategoryPage = () => {
           quantity: 1,
           name: selectedTemplate.name,
         }],
-      });
+      };
+
+      const response = await apiService.createPaymentToken({ order_id: checkoutOrderId(payload), ...payload });
 
       if (response.token && window.snap) {
         window.snap.pay(response.token, {
@@ -291,6 +296,7 @@ const TemplateCategoryPage = () => {
               title: language === 'id' ? 'Pembayaran Berhasil!' : 'Payment Successful!',
               description: language === 'id' ? 'Link download akan dikirim ke email Anda' : 'Download link will be sent to your email',
             });
+            endCheckout();
             setCheckoutOpen(false);
           },
           onPending: () => {
@@ -315,6 +321,11 @@ const TemplateCategoryPage = () => {
       }
     } catch (error) {
       console.error('Checkout error:', error);
+      const detail = error.response?.data?.detail || '';
+      if (error.response?.status === 409 && !detail.includes('still being created')) {
+        // paid, expired or otherwise closed: the next submit starts a new order
+        endCheckout();
+      }
       toast({
         title: 'Error',
         description: error.message || 'Checkout failed',
@@ -663,7 +674,7 @@ const TemplateCategoryPage = () => {
       </section>
 
       {/* Checkout Dialog */}
-      <Dialog open={checkoutOpen} onOpenChange={setCheckoutOpen}>
+      <Dialog open={checkoutOpen} onOpenChange={handleCheckoutOpenChange}>
         <DialogContent className="bg-neutral-900 border-white/10 text-white max-w-md">
           <DialogHeader>
             <DialogTitle>Checkout - {selectedTemplate?.name}</DialogTitle>
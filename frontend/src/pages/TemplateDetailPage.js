@@ -504,6 +504,7 @@ const TemplateDetailPage = () => {
                           href={template.download_url}
                           download
                           className="block"
+                          onClick={() => apiService.trackEvent('download', template.slug)}
                         >
                           <Button className="w-full bg-gradient-to-r from-purple-500 to-blue-500 hover:from-purple-600 hover:to-blue-600 text-white h-12 font-semibold rounded-xl">
                             <Download size={18} className="mr-2" />
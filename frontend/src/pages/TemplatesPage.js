@@ -5,6 +5,7 @@ import { Star, Download, ExternalLink, ShoppingCart } from 'lucide-react';
 import { Helmet } from 'react-helmet-async';
 import { useLanguage } from '@/context/LanguageContext';
 import { apiService } from '@/services/api';
+import { checkoutOrderId, endCheckout } from '@/services/checkoutSession';
 import { Button } from '@/components/ui/button';
 import {
   Dialog,
@@ -173,6 +174,11 @@ const TemplatesPage = () => {
     setCheckoutOpen(true);
   };
 
+  const handleCheckoutOpenChange = (open) => {
+    if (!open) endCheckout();
+    setCheckoutOpen(open);
+  };
+
   const handleCheckout = async () => {
     if (!checkoutForm.name || !checkoutForm.email) {
       toast({
@@ -185,11 +191,8 @@ const TemplatesPage = () => {
 
     setProcessing(true);
     try {
-      const orderId = `TPL-${Date.now()}`;
       const amount = selectedTemplate.sale_price || selectedTemplate.price;
-
-      const response = await apiService.createPaymentToken({
-        order_id: orderId,
+      const payload = {
         gross_amount: amount,
         customer_email: checkoutForm.email,
         customer_name: checkoutForm.name,
@@ -200,7 +203,9 @@ const TemplatesPage = () => {
           quantity: 1,
           name: selectedTemplate.name,
         }],
-      });
+      };
+
+      const response = await apiService.createPaymentToken({ order_id: checkoutOrderId(payload), ...payload });
 
       if (response.token && window.snap) {
         window.snap.pay(response.token, {
@@ -209,6 +214,7 @@ const TemplatesPage = () => {
               title: language === 'id' ? 'Pembayaran Berhasil!' : 'Payment Successful!',
               description: language === 'id' ? 'Link download akan dikirim ke email Anda' : 'Download link will be sent to your email',
             });
+            endCheckout();
             setCheckoutOpen(false);
           },
           onPending: () => {
@@ -236,6 +242,11 @@ const TemplatesPage = () => {
       }
     } catch (error) {
       console.error('Checkout error:', error);
+      const detail = error.response?.data?.detail || '';
+      if (error.response?.status === 409 && !detail.includes('still being created')) {
+        // paid, expired or otherwise closed: the next submit starts a new order
+        endCheckout();
+      }
       toast({
         title: 'Error',
         description: error.message || 'Checkout failed',
@@ -429,6 +440,7 @@ const TemplatesPage = () => {
                           href={template.download_url}
                           download
                           onClick={(e) => {
+                            apiService.trackEvent('download', template.slug);
                             if (typeof window.gtag !== 'undefined') {
                               window.gtag('event', 'download', {
                                 event_category: 'template',
@@ -511,6 +523,7 @@ const TemplatesPage = () => {
                             href={template.download_url}
                             download
                             onClick={(e) => {
+                              apiService.trackEvent('download', template.slug);
                               if (typeof window.gtag !== 'undefined') {
                                 window.gtag('event', 'download', {
                                   event_category: 'template',
@@ -683,7 +696,7 @@ const TemplatesPage = () => {
       </section>
 
       {/* Checkout Dialog */}
-      <Dialog open={checkoutOpen} onOpenChange={setCheckoutOpen}>
+      <Dialog open={checkoutOpen} onOpenChange={handleCheckoutOpenChange}>
         <DialogContent className="bg-neutral-900 border-white/10 text-white max-w-md">
           <DialogHeader>
             <DialogTitle>Checkout - {selectedTemplate?.name}</DialogTitle>
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { adminApi } from '@/services/adminApi';
-import { Package, Image, FileText, MessageSquare, Mail, CreditCard, Users, TrendingUp } from 'lucide-react';
+import { Package, Image, FileText, MessageSquare, Mail, CreditCard, Users, TrendingUp, Eye } from 'lucide-react';
 
 const formatPrice = (price) => {
   return new Intl.NumberFormat('id-ID', { style: 'currency', currency: 'IDR', minimumFractionDigits: 0 }).format(price);
@@ -33,6 +33,7 @@ const AdminDashboard = () => {
     { label: 'Messages', value: stats.contacts, badge: stats.unread_contacts, icon: Mail, color: 'from-yellow-500 to-yellow-600', link: '/admin/contacts' },
     { label: 'Orders', value: stats.orders, icon: CreditCard, color: 'from-pink-500 to-pink-600', link: '/admin/orders' },
     { label: 'Revenue', value: formatPrice(stats.total_revenue), icon: TrendingUp, color: 'from-[#FF4500] to-[#FF6B35]', link: '/admin/orders' },
+    { label: 'Page Views (7 days)', value: (stats.page_views_7d || 0).toLocaleString('id-ID'), icon: Eye, color: 'from-cyan-500 to-cyan-600', link: '/admin' },
   ] : [];
 
   if (loading) {
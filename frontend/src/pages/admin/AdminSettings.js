@@ -125,6 +125,8 @@ const AdminSettings = () => {
       });
 
       if (response.ok) {
+        // Drop the copy SiteSettingsContext keeps so the change shows on next load
+        localStorage.removeItem('site_settings');
         toast({
           title: "Berhasil",
           description: "Pengaturan berhasil disimpan",
@@ -0,0 +1,43 @@
+// First-party page-view beacon. Views are queued and sent in one request
+// every few seconds (or when the tab is hidden), as text/plain so
+// sendBeacon works cross-origin without a preflight.
+const API_URL = process.env.REACT_APP_BACKEND_URL || '';
+const ENDPOINT = `${API_URL}/api/analytics/events`;
+const FLUSH_MS = 5000;
+const MAX_QUEUE = 20;
+
+let queue = [];
+let timer = null;
+
+const flush = () => {
+  if (timer) {
+    clearTimeout(timer);
+    timer = null;
+  }
+  if (!queue.length) return;
+  const body = JSON.stringify({ events: queue });
+  queue = [];
+  if (navigator.sendBeacon && navigator.sendBeacon(ENDPOINT, new Blob([body], { type: 'text/plain' }))) {
+    return;
+  }
+  fetch(ENDPOINT, { method: 'POST', body, keepalive: true, headers: { 'Content-Type': 'text/plain' } }).catch(() => {});
+};
+
+if (typeof document !== 'undefined') {
+  document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'hidden') flush();
+  });
+}
+
+let lastReferrer = typeof document !== 'undefined' ? document.referrer : '';
+
+export const trackPageView = (path) => {
+  queue.push({ path, referrer: lastReferrer });
+  // later SPA navigations are internal
+  lastReferrer = window.location.href;
+  if (queue.length >= MAX_QUEUE) {
+    flush();
+  } else if (!timer) {
+    timer = setTimeout(flush, FLUSH_MS);
+  }
+};
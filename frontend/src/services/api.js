@@ -1,4 +1,5 @@
 import axios from 'axios';
+import { loadSnapshot } from '@/services/snapshotService';
 
 const API_URL = process.env.REACT_APP_BACKEND_URL || '';
 const api = axios.create({
@@ -6,12 +7,26 @@ const api = axios.create({
   headers: { 'Content-Type': 'application/json' }
 });
 
+// Newest posts fetched when the blog index comes from the API instead of a
+// snapshot (the API's BLOG_MAX_LIMIT)
+const BLOG_INDEX_LIMIT = 100;
+
 export const apiService = {
-  // Site Settings (public)
-  getSettings: () => api.get('/settings').then(res => res.data),
+  // Site Settings (public). With a version the URL is immutable, so the
+  // browser and CDN can keep the response for good.
+  getSettings: (version) => api.get('/settings', { params: version ? { v: version } : {} }).then(res => ({
+    settings: res.data,
+    version: res.headers['x-settings-version'] || null,
+  })),
+  getSettingsVersion: () => api.get('/settings/version').then(res => res.data.version),
   
-  // Services
-  getServices: () => api.get('/services').then(res => res.data),
+  // Homepage payload: settings, services, featured templates/portfolio,
+  // testimonials, latest posts and pricing in one request
+  getBootstrap: () => api.get('/bootstrap').then(res => res.data),
+
+  // Services, testimonials, pricing and the blog index read the static
+  // snapshot first (see snapshotService) and the API when none is published
+  getServices: () => loadSnapshot('services', () => api.get('/services').then(res => res.data)),
   getService: (slug) => api.get(`/services/${slug}`).then(res => res.data),
   
   // Templates
@@ -28,18 +43,30 @@ export const apiService = {
   },
   
   // Testimonials
-  getTestimonials: () => api.get('/testimonials').then(res => res.data),
+  getTestimonials: () => loadSnapshot('testimonials', () => api.get('/testimonials').then(res => res.data)),
   
   // Blog
-  getBlogPosts: (category, limit = 10) => {
-    const params = { limit };
-    if (category && category !== 'all') params.category = category;
-    return api.get('/blog', { params }).then(res => res.data);
-  },
+  getBlogPosts: (category, limit = 10) => loadSnapshot('blog', () => (
+    api.get('/blog', { params: { limit: BLOG_INDEX_LIMIT } }).then(res => res.data)
+  )).then((posts) => {
+    const matching = category && category !== 'all' ? posts.filter(p => p.category === category) : posts;
+    return matching.slice(0, limit);
+  }),
   getBlogPost: (slug) => api.get(`/blog/${slug}`).then(res => res.data),
   
+  // View / download counters: fire-and-forget. sendBeacon survives the page
+  // unloading (download links) and text/plain avoids a CORS preflight.
+  trackEvent: (kind, slug) => {
+    const body = JSON.stringify({ events: [{ kind, slug }] });
+    const url = `${API_URL}/api/track`;
+    if (navigator.sendBeacon && navigator.sendBeacon(url, new Blob([body], { type: 'text/plain' }))) {
+      return;
+    }
+    api.post('/track', body, { headers: { 'Content-Type': 'text/plain' } }).catch(() => {});
+  },
+
   // Pricing
-  getPricing: () => api.get('/pricing').then(res => res.data),
+  getPricing: () => loadSnapshot('pricing', () => api.get('/pricing').then(res => res.data)),
   
   // Contact
   submitContact: (data) => api.post('/contact', data).then(res => res.data),
@@ -0,0 +1,36 @@
+// One order_id per checkout attempt. It is kept in sessionStorage, so a
+// double-click, a retry or a page refresh resends the same order_id and
+// create-token replays the first Snap token instead of opening a second
+// order. Different buyer details or another template start a new attempt
+// (the API answers a changed payload under the same order_id with a 409).
+const STORAGE_KEY = 'calius-checkout';
+
+function read() {
+  try {
+    return JSON.parse(sessionStorage.getItem(STORAGE_KEY) || 'null');
+  } catch (error) {
+    return null;
+  }
+}
+
+export function checkoutOrderId(payload) {
+  const fingerprint = JSON.stringify(payload);
+  const saved = read();
+  if (saved && saved.fingerprint === fingerprint) return saved.orderId;
+  const orderId = `TPL-${Date.now()}`;
+  try {
+    sessionStorage.setItem(STORAGE_KEY, JSON.stringify({ orderId, fingerprint }));
+  } catch (error) {
+    // storage disabled: the id still holds for this click
+  }
+  return orderId;
+}
+
+// Called once the attempt is over (paid, rejected, or the checkout closed)
+export function endCheckout() {
+  try {
+    sessionStorage.removeItem(STORAGE_KEY);
+  } catch (error) {
+    // nothing stored
+  }
+}
@@ -0,0 +1,48 @@
+// Static catalog snapshots (public/data, written by publish_snapshots.py or
+// the local publisher). Served from the CDN, so reading one costs no
+// function invocation. The manifest points at the current immutable file;
+// the stable <name>.json is the fallback when that fetch fails. Snapshots
+// are only used when the manifest's publisher republishes them on every
+// admin write; otherwise (publisher "none", or no manifest) the API is read.
+let manifestPromise = null;
+const snapshots = {};
+
+function loadManifest() {
+  if (!manifestPromise) {
+    manifestPromise = fetch('/data/manifest.json')
+      .then((res) => (res.ok ? res.json() : null))
+      .catch(() => null);
+  }
+  return manifestPromise;
+}
+
+async function fetchSnapshot(name) {
+  const manifest = await loadManifest();
+  if (!manifest || !manifest.publisher || manifest.publisher === 'none') {
+    throw new Error('Snapshots are not republished on writes');
+  }
+  const file = manifest.files && manifest.files[name];
+  if (file) {
+    try {
+      const res = await fetch(`/data/${file}`);
+      if (res.ok) return res.json();
+    } catch (error) {
+      // fall through to the stable file
+    }
+  }
+  const res = await fetch(`/data/${name}.json`);
+  if (!res.ok) throw new Error(`Snapshot ${name} unavailable`);
+  return res.json();
+}
+
+// Rows of one snapshot, falling back to the API when no snapshot is
+// published. The result is kept for the page's lifetime either way.
+export function loadSnapshot(name, fallback) {
+  if (!snapshots[name]) {
+    snapshots[name] = fetchSnapshot(name).catch(() => fallback());
+    snapshots[name].catch(() => {
+      delete snapshots[name];
+    });
+  }
+  return snapshots[name];
+}
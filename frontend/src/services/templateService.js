@@ -1,11 +1,9 @@
-let cachedTemplates = null;
+import { apiService } from '@/services/api';
+import { loadSnapshot } from '@/services/snapshotService';
 
-async function loadTemplates() {
-  if (cachedTemplates) return cachedTemplates;
-  const res = await fetch('/data/templates.json');
-  cachedTemplates = await res.json();
-  return cachedTemplates;
-}
+// Static snapshot first (CDN, no function invocation); the API is the
+// fallback when no snapshot is published.
+const loadTemplates = () => loadSnapshot('templates', () => apiService.getTemplates());
 
 export const templateService = {
   getTemplates: async (category) => {
@@ -0,0 +1,77 @@
+"""
+Write the static catalog snapshots (frontend/public/data/*.json) from the API.
+
+Runs before the frontend build so the CDN serves templates, services,
+pricing, testimonials and the blog index without invoking the API. The
+bundle comes from GET /api/snapshots on the live deployment (same database),
+so only the standard library is needed in the build image.
+
+The manifest carries the API's SNAPSHOT_PUBLISHER. The SPA only reads
+snapshots from an API that republishes them on every admin write
+(deploy-hook on Vercel, or local); with "none" it keeps reading the API, so
+set SNAPSHOT_PUBLISHER=deploy-hook and SNAPSHOT_DEPLOY_HOOK_URL on the
+deployment for the snapshots to be used.
+
+Usage:
+  python publish_snapshots.py
+  python publish_snapshots.py --url http://127.0.0.1:8001 --output frontend/public/data
+  python publish_snapshots.py --optional   # never fail the build
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+BASE_URL = os.environ.get("CALIUS_URL", "https://www.calius.digital").rstrip("/")
+OUTPUT_DIR = Path(__file__).parent / "frontend" / "public" / "data"
+
+
+def write(directory: Path, filename: str, content) -> None:
+    tmp = directory / f".{filename}.tmp"
+    tmp.write_text(json.dumps(content, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, directory / filename)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=BASE_URL, help="API base URL (default: $CALIUS_URL or production)")
+    parser.add_argument("--output", type=Path, default=OUTPUT_DIR)
+    parser.add_argument("--optional", action="store_true", help="warn instead of failing when the API is unreachable")
+    args = parser.parse_args()
+
+    try:
+        # the query string and no-cache keep any cache in between from
+        # answering with a bundle from before the write that triggered this build
+        request = urllib.request.Request(
+            f"{args.url.rstrip('/')}/api/snapshots?t={int(time.time())}",
+            headers={"Cache-Control": "no-cache"},
+        )
+        with urllib.request.urlopen(request, timeout=30) as response:
+            bundle = json.load(response)
+    except Exception as e:
+        print(f"Snapshot fetch failed: {e}")
+        return 0 if args.optional else 1
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    version = bundle["version"]
+    publisher = bundle.get("publisher", "none")
+    manifest = {"version": version, "generated_at": bundle["generated_at"], "publisher": publisher, "files": {}}
+    for name, rows in bundle["files"].items():
+        write(args.output, f"{name}.{version}.json", rows)
+        write(args.output, f"{name}.json", rows)
+        manifest["files"][name] = f"{name}.{version}.json"
+        print(f"  {name}: {len(rows)} rows")
+    write(args.output, "manifest.json", manifest)
+    print(f"Snapshot {version} written to {args.output}")
+    if publisher == "none":
+        print("Warning: the API has no SNAPSHOT_PUBLISHER, so admin edits would not reach these files;"
+              " the site keeps reading the API until SNAPSHOT_PUBLISHER=deploy-hook is set.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+"""Shared fixtures: the API module on an in-memory Mongo (mongomock-motor).
+
+api/ is a Vercel function directory, not a package, so it is imported the
+same way the benchmarks do (api/ on sys.path, then ``import index``).
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "calius_test")
+sys.path.insert(0, str(ROOT / "api"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import index  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """A fresh in-memory database behind index.db for one test."""
+    from mongomock_motor import AsyncMongoMockClient
+
+    client = AsyncMongoMockClient()
+    monkeypatch.setattr(index, "get_mongo_client", lambda: client)
+    return index.db
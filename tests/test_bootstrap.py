@@ -0,0 +1,17 @@
+"""bootstrap_database() seeding."""
+import pytest
+
+import index
+
+
+@pytest.mark.anyio
+async def test_bootstrap_does_not_restore_deleted_defaults(db):
+    seeded = (await index.bootstrap_database())["services_seeded"]
+    assert seeded == len(index.get_default_services())
+
+    deleted = index.get_default_services()[0]["id"]
+    await db.services.delete_one({"id": deleted})
+    report = await index.bootstrap_database()
+    assert report["services_seeded"] == 0
+    assert await db.services.find_one({"id": deleted}) is None
+    assert await db.services.count_documents({}) == seeded - 1
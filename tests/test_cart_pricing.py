@@ -0,0 +1,79 @@
+"""price_index.price_cart: checkout totals come from the catalog."""
+import pytest
+
+import index
+
+
+@pytest.fixture
+def prices(db):
+    index.price_index.invalidate()
+    yield index.price_index
+    index.price_index.invalidate()
+
+
+@pytest.mark.anyio
+async def test_unknown_template_is_rejected(prices):
+    with pytest.raises(index.CartPricingError, match="Unknown template: nope"):
+        await prices.price_cart([{"id": "nope"}])
+    with pytest.raises(index.CartPricingError, match="missing id"):
+        await prices.price_cart([{"quantity": 1}])
+
+
+@pytest.mark.anyio
+async def test_free_template_is_rejected(prices):
+    with pytest.raises(index.CartPricingError, match="free to download"):
+        await prices.price_cart([{"id": "free-1"}])
+
+
+@pytest.mark.anyio
+async def test_empty_cart_is_rejected(prices):
+    with pytest.raises(index.CartPricingError, match="empty"):
+        await prices.price_cart([])
+
+
+@pytest.mark.anyio
+async def test_lines_for_the_same_template_are_merged(prices):
+    cart = await prices.price_cart([{"id": "1", "quantity": 2}, {"slug": "corporate-pro"}])
+
+    assert cart["item_details"] == [{"id": "1", "price": 750000, "quantity": 3, "name": "Corporate Pro Business"}]
+    assert cart["gross_amount"] == 2250000
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("lines", [
+    [{"id": "1", "quantity": 0}],
+    [{"id": "1", "quantity": index.CART_MAX_QUANTITY + 1}],
+    [{"id": "1", "quantity": index.CART_MAX_QUANTITY}, {"slug": "corporate-pro"}],
+    [{"id": "1", "quantity": "two"}],
+    [{"id": "1", "quantity": 5}, {"id": "1", "quantity": -3}],
+])
+async def test_quantity_limits(prices, lines):
+    with pytest.raises(index.CartPricingError, match="[Qq]uantity"):
+        await prices.price_cart(lines)
+
+
+@pytest.mark.anyio
+async def test_client_prices_and_names_are_ignored(prices):
+    cart = await prices.price_cart([{"id": "1", "price": 1, "name": "Discounted!", "quantity": 1}])
+
+    assert cart["item_details"][0]["price"] == 750000
+    assert cart["item_details"][0]["name"] == "Corporate Pro Business"
+    assert cart["gross_amount"] == 750000
+
+
+@pytest.mark.anyio
+async def test_mongo_rows_override_defaults_after_invalidation(prices):
+    await prices.price_cart([{"id": "1"}])
+    await index.db.templates.insert_one({"id": "1", "slug": "corporate-pro", "name": "Corporate Pro",
+                                         "price": 750000, "sale_price": 500000})
+    index.catalog_cache.invalidate("templates", "corporate-pro")
+
+    cart = await prices.price_cart([{"id": "1"}])
+
+    assert cart["gross_amount"] == 500000
+
+
+@pytest.mark.anyio
+async def test_usd_needs_a_usd_price(prices):
+    with pytest.raises(index.CartPricingError, match="no USD price"):
+        await prices.price_cart([{"id": "1"}], currency="USD")
@@ -0,0 +1,235 @@
+"""create-token idempotency, claim takeover and revenue rollup increments."""
+import json
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+import index
+
+
+class FakeSnap:
+    """midtransclient.Snap double: one token per order_id, like Snap."""
+
+    def __init__(self):
+        self.orders = {}
+        self.calls = 0
+
+    def create_transaction(self, params):
+        self.calls += 1
+        order_id = params["transaction_details"]["order_id"]
+        if order_id in self.orders:
+            # the message midtransclient's MidtransAPIError carries
+            raise Exception(
+                "Midtrans API is returning API error. HTTP status code: `400`. API response: "
+                + json.dumps({"error_messages": ["transaction_details.order_id has already been taken"]})
+            )
+        token = f"token-{order_id}-{self.calls}"
+        self.orders[order_id] = params
+        return {"token": token, "redirect_url": f"https://app.midtrans.test/snap/v2/vtweb/{token}"}
+
+
+@pytest.fixture
+def snap(db, monkeypatch):
+    fake = FakeSnap()
+    monkeypatch.setattr(index, "MIDTRANS_SERVER_KEY", "test-key")
+    monkeypatch.setattr(index, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(index, "get_midtrans_snap", lambda: fake)
+    monkeypatch.setattr(index, "checkout_cache", index._CheckoutCache())
+    index.price_index.invalidate()
+    return fake
+
+
+@pytest.fixture
+async def client(snap):
+    transport = httpx.ASGITransport(app=index.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+def checkout(order_id, **overrides):
+    body = {
+        "order_id": order_id,
+        "gross_amount": 750000,
+        "customer_email": "buyer@example.com",
+        "customer_name": "Buyer",
+        "item_details": [{"id": "1", "quantity": 1}],
+    }
+    return {**body, **overrides}
+
+
+async def create_token(client, body):
+    return await client.post("/api/payments/create-token", json=body)
+
+
+@pytest.mark.anyio
+async def test_retry_replays_the_stored_token(client, snap):
+    first = await create_token(client, checkout("TPL-1"))
+    again = await create_token(client, checkout("TPL-1"))
+
+    assert first.status_code == 200
+    assert "idempotent-replay" not in first.headers
+    assert again.status_code == 200
+    assert again.headers["idempotent-replay"] == "true"
+    assert again.json() == first.json()
+    assert snap.calls == 1
+    tx = await index.db.transactions.find_one({"order_id": "TPL-1"})
+    assert tx["status"] == "pending" and tx["snap_token"] == first.json()["token"]
+
+
+@pytest.mark.anyio
+async def test_replay_from_mongo_after_the_instance_cache_is_gone(client, snap, monkeypatch):
+    first = await create_token(client, checkout("TPL-1"))
+    monkeypatch.setattr(index, "checkout_cache", index._CheckoutCache())
+
+    again = await create_token(client, checkout("TPL-1"))
+
+    assert again.status_code == 200
+    assert again.json()["token"] == first.json()["token"]
+    assert snap.calls == 1
+
+
+@pytest.mark.anyio
+async def test_same_order_id_with_a_different_payload_is_a_conflict(client, snap):
+    await create_token(client, checkout("TPL-1"))
+
+    other = await create_token(client, checkout("TPL-1", customer_email="someone@example.com"))
+
+    assert other.status_code == 409
+    assert snap.calls == 1
+
+
+@pytest.mark.anyio
+async def test_paid_order_is_not_replayed(client, snap):
+    await create_token(client, checkout("TPL-1"))
+    # the webhook may land on another instance, so the local cache still has the token
+    await index.apply_payment_status("TPL-1", "settlement", "gopay")
+
+    again = await create_token(client, checkout("TPL-1"))
+
+    assert again.status_code == 409
+    assert "success" in again.json()["detail"]
+    assert snap.calls == 1
+
+
+async def insert_stale_claim(order_id, age=timedelta(minutes=5)):
+    request = index.PaymentRequest(**checkout(order_id))
+    claimed_at = (datetime.now(timezone.utc) - age).isoformat()
+    await index.db.transactions.insert_one({
+        "order_id": order_id,
+        "gross_amount": 750000,
+        "snap_token": None,
+        "status": "creating",
+        "created_at": claimed_at,
+        "payload_hash": index.checkout_payload_hash(request),
+        "claim_id": "dead-request",
+        "claimed_at": claimed_at,
+    })
+
+
+@pytest.mark.anyio
+async def test_stale_claim_is_taken_over(client, snap):
+    await insert_stale_claim("TPL-1")
+
+    res = await create_token(client, checkout("TPL-1"))
+
+    assert res.status_code == 200
+    assert snap.calls == 1
+    tx = await index.db.transactions.find_one({"order_id": "TPL-1"})
+    assert tx["status"] == "pending"
+    assert tx["claim_id"] != "dead-request"
+    assert tx["snap_token"] == res.json()["token"]
+
+
+@pytest.mark.anyio
+async def test_takeover_after_the_dead_claim_reached_snap_closes_the_order(client, snap):
+    await insert_stale_claim("TPL-1")
+    snap.orders["TPL-1"] = {}  # the dead request got as far as Snap
+
+    res = await create_token(client, checkout("TPL-1"))
+    retry = await create_token(client, checkout("TPL-1"))
+
+    assert res.status_code == 409
+    assert "new checkout" in res.json()["detail"]
+    tx = await index.db.transactions.find_one({"order_id": "TPL-1"})
+    assert tx is not None and tx["status"] == "expired"
+    assert retry.status_code == 409
+    assert snap.calls == 1
+
+
+class ReleasedClaimRace:
+    """db whose first claim upsert hits a duplicate that is gone by the re-read."""
+
+    def __init__(self, real):
+        self._real = real
+        self.races = 1
+
+    def __getattr__(self, name):
+        collection = getattr(self._real, name)
+        if name != "transactions":
+            return collection
+        race = self
+
+        class Transactions:
+            def __getattr__(self, attr):
+                return getattr(collection, attr)
+
+            async def find_one_and_update(self, *args, **kwargs):
+                if race.races:
+                    race.races -= 1
+                    raise index.DuplicateKeyError("E11000 duplicate key error")
+                return await collection.find_one_and_update(*args, **kwargs)
+
+        return Transactions()
+
+
+@pytest.mark.anyio
+async def test_claim_released_during_the_race_is_claimed_again(client, snap, monkeypatch):
+    monkeypatch.setattr(index, "db", ReleasedClaimRace(index.db))
+
+    res = await create_token(client, checkout("TPL-1"))
+
+    assert res.status_code == 200
+    assert snap.calls == 1
+    tx = await index.db.transactions.find_one({"order_id": "TPL-1"})
+    assert tx["status"] == "pending" and tx["snap_token"] == res.json()["token"]
+
+
+@pytest.mark.anyio
+async def test_charged_amount_comes_from_the_catalog(client, snap):
+    body = checkout("TPL-1", gross_amount=1, item_details=[{"id": "1", "quantity": 2, "price": 1, "name": "x"}])
+
+    res = await create_token(client, body)
+
+    assert res.status_code == 200
+    assert res.json()["gross_amount"] == 1500000
+    sent = snap.orders["TPL-1"]
+    assert sent["transaction_details"]["gross_amount"] == 1500000
+    assert sent["item_details"] == [{"id": "1", "price": 750000, "quantity": 2, "name": "Corporate Pro Business"}]
+
+
+def test_status_change_inc_new_order():
+    assert index._status_change_inc({"gross_amount": 100}, None, "pending", None) == {
+        "orders": 1, "status.pending": 1,
+    }
+
+
+def test_status_change_inc_payment_adds_revenue():
+    inc = index._status_change_inc({"gross_amount": 100}, "pending", "success", "gopay")
+    assert inc == {
+        "status.pending": -1, "status.success": 1, "revenue": 100,
+        "payment_type.gopay.count": 1, "payment_type.gopay.revenue": 100,
+    }
+
+
+def test_status_change_inc_refund_removes_revenue():
+    tx = {"gross_amount": 100, "payment_type": "bank_transfer"}
+    inc = index._status_change_inc(tx, "success", "cancelled", None)
+    assert inc == {
+        "status.success": -1, "status.cancelled": 1, "revenue": -100,
+        "payment_type.bank_transfer.count": -1, "payment_type.bank_transfer.revenue": -100,
+    }
+
+
+def test_status_change_inc_same_status_is_a_no_op():
+    assert index._status_change_inc({"gross_amount": 100}, "pending", "pending", None) == {}
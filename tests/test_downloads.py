@@ -0,0 +1,106 @@
+"""Update-check download payloads and installer downloads."""
+import json
+import time
+
+import httpx
+import pytest
+
+import index
+
+INSTALLER = b"MZ" + bytes(range(256)) * 16
+
+
+@pytest.fixture
+def downloads(tmp_path, monkeypatch):
+    directory = tmp_path / "downloads"
+    directory.mkdir()
+    (directory / "ClipPremium-Setup.exe").write_bytes(INSTALLER)
+    manifest = tmp_path / "version.json"
+    manifest.write_text(json.dumps({
+        "version": "3.4.0",
+        "files": {"installer": {"filename": "ClipPremium-Setup.exe", "url": "https://calius.test/setup.exe", "size_mb": 0.1}},
+    }), encoding="utf-8")
+    monkeypatch.setattr(index, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(index, "download_catalog", index._DownloadCatalog(directory))
+    monkeypatch.setattr(index, "update_manifest", index._UpdateManifest(manifest))
+    return index.download_catalog
+
+
+@pytest.fixture
+async def client(downloads):
+    transport = httpx.ASGITransport(app=index.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+@pytest.mark.anyio
+async def test_download_etag_changes_when_the_hash_becomes_known(client, downloads):
+    first = await client.get("/api/update-check", params={"action": "download"})
+    assert first.status_code == 200
+    assert first.json()["sha256"] == ""
+
+    digest = downloads.compute_sha256("ClipPremium-Setup.exe")
+    revalidated = await client.get("/api/update-check", params={"action": "download"},
+                                   headers={"If-None-Match": first.headers["etag"]})
+    assert revalidated.status_code == 200
+    assert revalidated.json()["sha256"] == digest
+    assert revalidated.headers["etag"] != first.headers["etag"]
+
+    again = await client.get("/api/update-check", params={"action": "download"},
+                             headers={"If-None-Match": revalidated.headers["etag"]})
+    assert again.status_code == 304
+
+
+def signed(filename="ClipPremium-Setup.exe"):
+    expires = int(time.time()) + 600
+    return f"/api/downloads/{filename}", {"expires": expires, "sig": index._download_signature(filename, expires)}
+
+
+@pytest.mark.anyio
+async def test_resume_survives_hashing(client, downloads):
+    url, params = signed()
+    first = await client.get(url, params=params)
+    assert first.status_code == 200
+    assert first.content == INSTALLER
+    assert "repr-digest" not in first.headers
+
+    downloads.compute_sha256("ClipPremium-Setup.exe")
+    resumed = await client.get(url, params=params, headers={"Range": "bytes=100-", "If-Range": first.headers["etag"]})
+    assert resumed.status_code == 206
+    assert resumed.content == INSTALLER[100:]
+    assert resumed.headers["etag"] == first.headers["etag"]
+    assert resumed.headers["repr-digest"].startswith("sha-256=:")
+
+
+@pytest.mark.anyio
+async def test_if_range_validators(client, downloads):
+    url, params = signed()
+    digest = downloads.compute_sha256("ClipPremium-Setup.exe")
+    first = await client.get(url, params=params)
+    for validator in (first.headers["last-modified"], f'"{digest[:32]}"'):
+        response = await client.get(url, params=params, headers={"Range": "bytes=0-9", "If-Range": validator})
+        assert response.status_code == 206
+        assert response.content == INSTALLER[:10]
+    stale = await client.get(url, params=params, headers={"Range": "bytes=0-9", "If-Range": '"0-0"'})
+    assert stale.status_code == 200
+    assert stale.content == INSTALLER
+
+
+def test_byte_range_parsing():
+    assert index._byte_range("bytes=0-9", 1000) == (0, 9)
+    assert index._byte_range("bytes=990-", 1000) == (990, 999)
+    assert index._byte_range("bytes=-100", 1000) == (900, 999)
+    assert index._byte_range("bytes=-5000", 1000) == (0, 999)
+    assert index._byte_range("bytes=abc", 1000) is None
+    assert index._byte_range("bytes=0-1,5-6", 1000) is None
+    for unsatisfiable in ("bytes=-0", "bytes=1000-", "bytes=9-3"):
+        with pytest.raises(ValueError):
+            index._byte_range(unsatisfiable, 1000)
+
+
+@pytest.mark.anyio
+async def test_zero_length_suffix_range_is_unsatisfiable(client, downloads):
+    url, params = signed()
+    response = await client.get(url, params=params, headers={"Range": "bytes=-0"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(INSTALLER)}"
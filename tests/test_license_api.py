@@ -0,0 +1,143 @@
+"""License code validation, the issued-code index, the limiters and /license/activate."""
+import httpx
+import pytest
+
+import _license as license_api
+import index
+
+HWID = "0123456789abcdef0123456789abcdef"
+OTHER_HWID = "fedcba9876543210fedcba9876543210"
+ISSUED = [("CLIPPREM-PERS-2026-0001", "personal"), ("CLIPPREM-AGNC-2026-0002", "agency")]
+
+
+def issue(body):
+    checksum = license_api.license_code_checksum(body)
+    return f"{body}-{checksum[:5]}-{checksum[5:]}"
+
+
+@pytest.fixture
+def secret(monkeypatch):
+    monkeypatch.setattr(license_api, "LICENSE_CODE_SECRET", "test-secret")
+
+
+def test_valid_license_code_checks_the_checksum(secret):
+    code = issue("CLIPPREM-PERS-2026-0000B")
+    assert license_api.valid_license_code(code)
+    tampered = code[:-1] + ("0" if code[-1] != "0" else "1")
+    assert not license_api.valid_license_code(tampered)
+    assert not license_api.valid_license_code(issue("CLIPPREM-PERS-2026-0000C")[:-11] + code[-11:])
+    assert not license_api.valid_license_code("CLIPPREM-XXXX-2026-0001")
+
+
+def test_valid_license_code_without_secret(secret, monkeypatch):
+    code = issue("CLIPPREM-AGNC-2026-0000D")
+    monkeypatch.setattr(license_api, "LICENSE_CODE_SECRET", "")
+    assert not license_api.valid_license_code(code)
+    # legacy sequential codes carry no checksum and are left to the index
+    assert license_api.valid_license_code("CLIPPREM-PERS-2026-0001")
+
+
+def test_code_index_lookup():
+    codes = license_api._LicenseCodeIndex()
+    assert codes.lookup("CLIPPREM-PERS-2026-0001") is None  # not loaded yet
+    assert codes.load(ISSUED) == 2
+    assert codes.lookup("CLIPPREM-PERS-2026-0001") == "personal"
+    assert codes.lookup("CLIPPREM-AGNC-2026-0002") == "agency"
+    assert codes.lookup("CLIPPREM-PERS-2026-0003") is None
+
+
+def test_limiter_caps_tracked_keys():
+    limiter = license_api._SlidingWindowLimiter(limit=5, window=3600, max_keys=3)
+    for key in "abcd":
+        assert limiter.hit(key) == 0
+    assert len(limiter._entries) == 3
+    assert "a" not in limiter._entries  # least recently seen goes first
+
+
+def test_limiter_refusal_does_not_charge_the_other_key(monkeypatch):
+    monkeypatch.setattr(license_api, "license_hwid_limiter", license_api._SlidingWindowLimiter(5, 3600))
+    monkeypatch.setattr(license_api, "license_ip_limiter", license_api._SlidingWindowLimiter(1, 3600))
+    assert license_api._license_limit_exceeded(HWID, "10.0.0.1") is None
+    assert license_api._license_limit_exceeded(HWID, "10.0.0.1")
+    assert license_api.license_hwid_limiter._entries[HWID][2] == 1
+
+
+@pytest.fixture
+async def client(db, monkeypatch):
+    monkeypatch.setattr(index, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(license_api, "LICENSE_API_ENABLED", True)
+    monkeypatch.setattr(license_api, "license_hwid_limiter", license_api._SlidingWindowLimiter(100, 3600))
+    monkeypatch.setattr(license_api, "license_ip_limiter", license_api._SlidingWindowLimiter(500, 3600))
+    # loaded from license_codes on the first activation
+    monkeypatch.setattr(license_api, "license_codes_index", license_api._LicenseCodeIndex())
+    await db.license_codes.insert_many([
+        {"_id": code, "license_type": license_type, "status": "unused"} for code, license_type in ISSUED
+    ])
+    transport = httpx.ASGITransport(app=index.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+def activation(hwid, code="CLIPPREM-PERS-2026-0001"):
+    return {"email": "buyer@example.com", "license_code": code, "hwid": hwid}
+
+
+@pytest.mark.anyio
+async def test_routes_are_off_until_enabled(client, monkeypatch):
+    monkeypatch.setattr(license_api, "LICENSE_API_ENABLED", False)
+    response = await client.post("/api/license/check", json={"hwid": HWID})
+    assert response.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_activate_claims_an_unused_code(client, db):
+    response = await client.post("/api/license/activate", json=activation(HWID, "CLIPPREM-AGNC-2026-0002"))
+
+    assert response.status_code == 200
+    assert response.json()["license"]["type"] == "agency"
+    assert license_api.license_codes_index.size == len(ISSUED)
+    code = await db.license_codes.find_one({"_id": "CLIPPREM-AGNC-2026-0002"})
+    assert code["status"] == "active" and code["activated_by_hwid"] == HWID
+    license = await db.licenses.find_one({"_id": HWID})
+    assert license["license_type"] == "agency" and license["license_code"] == "CLIPPREM-AGNC-2026-0002"
+
+
+@pytest.mark.anyio
+async def test_activate_finishes_a_half_done_claim(client, db):
+    # the code was claimed by this device but the license write never happened
+    await db.license_codes.update_one({"_id": "CLIPPREM-PERS-2026-0001"}, {"$set": {
+        "status": "active", "activated_by_hwid": HWID, "activated_at": "2026-01-10T00:00:00+00:00",
+    }})
+
+    response = await client.post("/api/license/activate", json=activation(HWID))
+    assert response.status_code == 200
+    assert response.json()["license"]["type"] == "personal"
+    license = await db.licenses.find_one({"_id": HWID})
+    assert license["license_type"] == "personal"
+    assert license["activated_at"] == "2026-01-10T00:00:00+00:00"
+
+    response = await client.post("/api/license/activate", json=activation(OTHER_HWID))
+    assert response.status_code == 400
+    assert response.json()["code"] == "CODE_USED"
+
+
+@pytest.mark.anyio
+async def test_activate_rejects_unissued_codes(client, db):
+    response = await client.post("/api/license/activate", json=activation(HWID, "CLIPPREM-PERS-2026-0009"))
+    assert response.status_code == 400
+    assert response.json()["code"] == "INVALID_CODE"
+    assert await db.license_codes.count_documents({"status": "unused"}) == len(ISSUED)
+
+
+@pytest.mark.anyio
+async def test_checksummed_code_imported_after_the_index_was_built(client, db, secret):
+    await client.post("/api/license/activate", json=activation(OTHER_HWID))  # builds the index
+    code = issue("CLIPPREM-AGNC-2026-0000B")
+    await db.license_codes.insert_one({"_id": code, "license_type": "agency", "status": "unused"})
+
+    response = await client.post("/api/license/activate", json=activation(HWID, code))
+
+    assert response.status_code == 200
+    assert response.json()["license"]["type"] == "agency"
+    unknown = await client.post("/api/license/activate", json=activation("a" * 32, issue("CLIPPREM-AGNC-2026-0000C")))
+    assert unknown.json()["code"] == "INVALID_CODE"
@@ -0,0 +1,149 @@
+"""reconcile_pending_payments against the in-process Midtrans stand-in."""
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+import index
+from midtrans_standin import create_app
+
+SERVER_KEY = "standin-server-key"
+
+
+@pytest.fixture
+def standin(db, monkeypatch):
+    monkeypatch.setattr(index, "MIDTRANS_SERVER_KEY", SERVER_KEY)
+    notified = []
+
+    async def notify(order_id):
+        notified.append(order_id)
+
+    monkeypatch.setattr(index, "notify_payment_success", notify)
+    app = create_app(SERVER_KEY)
+    app.state.notified = notified
+    return app
+
+
+async def add_pending(order_id, age, gross_amount=150000):
+    tx = {
+        "order_id": order_id,
+        "gross_amount": gross_amount,
+        "status": "pending",
+        "created_at": (datetime.now(timezone.utc) - age).isoformat(),
+    }
+    await index.db.transactions.insert_one(tx)
+    await index.record_revenue_change(tx, None, "pending")
+
+
+def set_outcome(app, order_id, transaction_status, payment_type="bank_transfer"):
+    app.state.orders[order_id] = {
+        "order_id": order_id,
+        "gross_amount": 150000,
+        "transaction_status": transaction_status,
+        "payment_type": payment_type,
+        "token": None,
+        "transaction_time": "",
+    }
+
+
+async def reconcile(app):
+    return await index.reconcile_pending_payments(transport=httpx.ASGITransport(app=app))
+
+
+async def status_of(order_id):
+    tx = await index.db.transactions.find_one({"order_id": order_id})
+    return tx["status"]
+
+
+@pytest.mark.anyio
+async def test_settled_order_becomes_success(standin):
+    await add_pending("paid", timedelta(hours=1))
+    set_outcome(standin, "paid", "settlement", "gopay")
+
+    report = await reconcile(standin)
+
+    assert report["updated"] == 1
+    assert report["transitions"] == {"success": 1}
+    tx = await index.db.transactions.find_one({"order_id": "paid"})
+    assert (tx["status"], tx["payment_type"], tx["status_source"]) == ("success", "gopay", "reconcile")
+    assert standin.state.notified == ["paid"]
+    day = await index.db.revenue_daily.find_one({"_id": index.stats_day(tx["created_at"])})
+    assert day["status"]["success"] == 1 and day["status"]["pending"] == 0
+    assert day["revenue"] == 150000
+
+
+@pytest.mark.anyio
+async def test_expired_and_abandoned_orders_become_expire(standin):
+    await add_pending("expired", timedelta(hours=1))
+    set_outcome(standin, "expired", "expire")
+    # Midtrans never heard of it and it is past RECONCILE_ABANDONED_HOURS
+    await add_pending("abandoned", timedelta(hours=index.RECONCILE_ABANDONED_HOURS + 1))
+
+    report = await reconcile(standin)
+
+    assert report["transitions"] == {"expired": 2}
+    assert await status_of("expired") == "expired"
+    assert await status_of("abandoned") == "expired"
+    assert standin.state.notified == []
+
+
+@pytest.mark.anyio
+async def test_orders_still_pending_or_recent_are_left_alone(standin):
+    await add_pending("waiting", timedelta(hours=1))
+    set_outcome(standin, "waiting", "pending")
+    await add_pending("unknown", timedelta(hours=1))  # 404, not abandoned yet
+    await add_pending("fresh", timedelta(minutes=1))  # younger than RECONCILE_AFTER_MINUTES
+    set_outcome(standin, "fresh", "settlement")
+
+    report = await reconcile(standin)
+
+    assert report["checked"] == 2
+    assert report["unchanged"] == 2
+    assert report["updated"] == 0
+    for order_id in ("waiting", "unknown", "fresh"):
+        assert await status_of(order_id) == "pending"
+
+
+@pytest.mark.anyio
+async def test_second_run_is_idempotent(standin):
+    await add_pending("paid", timedelta(hours=1))
+    set_outcome(standin, "paid", "settlement")
+    await add_pending("expired", timedelta(hours=1))
+    set_outcome(standin, "expired", "expire")
+
+    first = await reconcile(standin)
+    rollups = await index.db.revenue_daily.find({}, {"updated_at": 0}).to_list(None)
+    second = await reconcile(standin)
+
+    assert first["updated"] == 2
+    assert second == {"checked": 0, "updated": 0, "unchanged": 0, "errors": 0, "transitions": {}, "reaped": 0}
+    assert await index.db.revenue_daily.find({}, {"updated_at": 0}).to_list(None) == rollups
+    assert standin.state.notified == ["paid"]
+
+
+@pytest.mark.anyio
+async def test_webhook_that_lands_first_wins(standin):
+    await add_pending("raced", timedelta(hours=1))
+    set_outcome(standin, "raced", "settlement")
+    await index.apply_payment_status("raced", "cancel", None)
+
+    report = await reconcile(standin)
+
+    assert report["checked"] == 0
+    assert await status_of("raced") == "cancelled"
+
+
+@pytest.mark.anyio
+async def test_stale_checkout_claims_are_reaped(standin):
+    old = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
+    recent = datetime.now(timezone.utc).isoformat()
+    await index.db.transactions.insert_many([
+        {"order_id": "dead", "status": "creating", "snap_token": None, "created_at": old, "claimed_at": old},
+        {"order_id": "live", "status": "creating", "snap_token": None, "created_at": recent, "claimed_at": recent},
+    ])
+
+    report = await reconcile(standin)
+
+    assert report["reaped"] == 1
+    assert await index.db.transactions.find_one({"order_id": "dead"}) is None
+    assert await status_of("live") == "creating"
@@ -0,0 +1,43 @@
+"""GET /api/snapshots (the bundle publish_snapshots.py writes at build time) and edge caching."""
+import httpx
+import pytest
+
+import index
+
+
+@pytest.fixture
+async def client(db, monkeypatch):
+    monkeypatch.setattr(index, "RATE_LIMIT_ENABLED", False)
+    transport = httpx.ASGITransport(app=index.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+@pytest.mark.anyio
+async def test_bundle_names_the_publisher(client, monkeypatch):
+    monkeypatch.setattr(index, "snapshots", index._SnapshotManager(index._NullSnapshotPublisher()))
+    response = await client.get("/api/snapshots")
+    assert response.headers["cache-control"] == "no-store"
+    bundle = response.json()
+    # the SPA ignores snapshots from an API that won't republish them
+    assert bundle["publisher"] == "none"
+    assert set(bundle["files"]) == set(index._SnapshotManager.SOURCES)
+
+
+@pytest.mark.anyio
+async def test_bundle_reflects_a_write_immediately(client, db):
+    before = (await client.get("/api/snapshots")).json()
+    await db.pricing.insert_one({"id": "p1", "name": "New plan", "order": 1})
+    after = (await client.get("/api/snapshots")).json()
+    assert after["version"] != before["version"]
+    assert after["files"]["pricing"] == [{"id": "p1", "name": "New plan", "order": 1}]
+
+
+@pytest.mark.anyio
+async def test_settings_with_an_unknown_version_is_not_cached(client):
+    current = await client.get("/api/settings")
+    version = current.headers["x-settings-version"]
+    pinned = await client.get("/api/settings", params={"v": version})
+    assert "immutable" in pinned.headers["cache-control"]
+    ahead = await client.get("/api/settings", params={"v": "newer-elsewhere"})
+    assert ahead.headers["cache-control"] == "no-store"